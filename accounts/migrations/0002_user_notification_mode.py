@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="notification_mode",
+            field=models.CharField(
+                choices=[("immediate", "Immediate"), ("digest", "Digest")],
+                default="immediate",
+                max_length=20,
+            ),
+        ),
+    ]
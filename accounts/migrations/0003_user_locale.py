@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_user_notification_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="locale",
+            field=models.CharField(
+                blank=True,
+                choices=[("id", "Bahasa Indonesia"), ("en", "English")],
+                default="",
+                max_length=10,
+            ),
+        ),
+    ]
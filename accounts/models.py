@@ -2,10 +2,15 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 import uuid
 
+from common.constants import EMAIL_LOCALE_CHOICES, NOTIFICATION_MODE_CHOICES
+
 
 class User(AbstractUser):
     id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
     email = models.EmailField(unique=True)
+    notification_mode = models.CharField(max_length=20, choices=NOTIFICATION_MODE_CHOICES, default="immediate")
+    # Language of the emails sent to the user; blank uses EMAIL_DEFAULT_LOCALE
+    locale = models.CharField(max_length=10, choices=EMAIL_LOCALE_CHOICES, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -24,6 +24,8 @@ class UserSerializer(serializers.ModelSerializer):
             "email",
             "first_name",
             "last_name",
+            "notification_mode",
+            "locale",
             "created_at",
             "updated_at",
             "roles",
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from common.permissions import invalidate_checkin_roles
+from common.versions import bump_collection_version
+from .models import AssignRole, Group, User
+
+
+def _touch_users(user_ids):
+    # Role names are embedded in the user representation, so its validators follow role changes
+    if User.objects.filter(pk__in=user_ids).update(updated_at=timezone.now()):
+        bump_collection_version(User)
+
+
+@receiver([post_save, post_delete], sender=AssignRole, dispatch_uid="user_roles_changed")
+def touch_role_user(sender, instance, **kwargs):
+    _touch_users([instance.user_id])
+    invalidate_checkin_roles(instance.user_id)
+
+
+@receiver(post_save, sender=Group, dispatch_uid="user_group_renamed")
+def touch_group_members(sender, instance, created=False, **kwargs):
+    if not created:
+        _touch_users(AssignRole.objects.filter(group=instance).values("user_id"))
+        invalidate_checkin_roles(*AssignRole.objects.filter(group=instance).values_list("user_id", flat=True))
@@ -3,6 +3,7 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from .models import User, Group, AssignRole
 from .serializers import UserSerializer, GroupSerializer, AssignRoleSerializer
+from common.mixins import ConditionalGetMixin
 from common.permissions import IsSuperUser, IsAdminOrSuperUser
 from rest_framework.pagination import PageNumberPagination
 from loguru import logger
@@ -93,7 +94,7 @@ class GroupViewSet(viewsets.ModelViewSet):
             raise
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("-date_joined")
     serializer_class = UserSerializer
     pagination_class = UserPagination
@@ -19,3 +19,25 @@ PAYMENT_STATUS_CHOICES = [
     ("failed", "Failed"),
     ("cancelled", "Cancelled"),
 ]
+
+REGISTRATION_STATUS_CHOICES = [
+    ("active", "Active"),
+    ("cancelled", "Cancelled"),
+]
+
+NOTIFICATION_MODE_CHOICES = [
+    ("immediate", "Immediate"),
+    ("digest", "Digest"),
+]
+
+EMAIL_LOCALE_CHOICES = [
+    ("id", "Bahasa Indonesia"),
+    ("en", "English"),
+]
+
+BROADCAST_STATUS_CHOICES = [
+    ("queued", "Queued"),
+    ("sending", "Sending"),
+    ("completed", "Completed"),
+    ("failed", "Failed"),
+]
@@ -0,0 +1,392 @@
+import asyncio
+import base64
+import json
+import smtplib
+import time
+from datetime import timedelta
+
+import aiosmtplib
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from common.redis_client import get_redis_client
+from .models import DeadLetterEmail
+from loguru import logger
+
+OUTGOING_KEY = "mail:outgoing"
+PROCESSING_KEY = "mail:processing:{}"
+RETRY_KEY = "mail:retry"
+
+# Move messages whose backoff has elapsed from the retry set back onto the outgoing list
+_PROMOTE_DUE_SCRIPT = """
+local due = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+if #due > 0 then
+    redis.call("ZREM", KEYS[1], unpack(due))
+    redis.call("RPUSH", KEYS[2], unpack(due))
+end
+return #due
+"""
+
+# Transient failures worth retrying: SMTP errors, network errors and an unreachable mail queue
+DELIVERY_ERRORS = (smtplib.SMTPException, OSError, RedisConnectionError)
+
+EMAIL_TASK_OPTIONS = {
+    "bind": True,
+    "autoretry_for": DELIVERY_ERRORS,
+    "retry_backoff": True,
+    "retry_backoff_max": settings.EMAIL_RETRY_BACKOFF_MAX,
+    "retry_jitter": True,
+    "max_retries": settings.EMAIL_MAX_RETRIES,
+}
+
+
+def message_payload(message):
+    """Rendered form of an ``EmailMessage``: envelope addresses plus the base64-encoded MIME message."""
+    encoding = message.encoding or settings.DEFAULT_CHARSET
+    return {
+        "from": sanitize_address(message.from_email, encoding),
+        "to": [sanitize_address(address, encoding) for address in message.recipients()],
+        "raw": base64.b64encode(message.message().as_bytes(linesep="\r\n")).decode(),
+        "attempts": 0,
+    }
+
+
+def serialize_message(message):
+    return json.dumps(message_payload(message))
+
+
+def dead_letter_payloads(task_name, payloads, error, attempts):
+    """Persist undeliverable messages so ``manage.py redrive_dead_letters`` can send them later."""
+    DeadLetterEmail.objects.bulk_create(
+        [
+            DeadLetterEmail(
+                task_name=task_name,
+                sender=payload["from"],
+                recipients=payload["to"],
+                payload=payload["raw"],
+                attempts=attempts,
+                last_error=str(error),
+            )
+            for payload in payloads
+        ]
+    )
+    logger.error(f"Dead-lettered {len(payloads)} messages from {task_name} after {attempts} attempts: {error}")
+
+
+def send_each(messages):
+    """Send ``messages`` one by one over a single connection. Returns ``(failed_indexes, last_error)``."""
+    failed = []
+    error = None
+    connection = get_connection()
+    try:
+        connection.open()
+    except DELIVERY_ERRORS as e:
+        return list(range(len(messages))), e
+    try:
+        for index, message in enumerate(messages):
+            try:
+                connection.send_messages([message])
+            except DELIVERY_ERRORS as e:
+                failed.append(index)
+                error = e
+    finally:
+        connection.close()
+    return failed, error
+
+
+def send_with_retry(task, messages, retry_args):
+    """Send ``messages`` over one connection from inside a bound email task.
+
+    Failed messages are retried with the task's jittered exponential backoff. Only they are retried:
+    ``retry_args(failed_indexes)`` returns task arguments covering just those messages. Once
+    ``task.max_retries`` is spent they are dead-lettered instead. Returns the number of messages sent.
+    """
+    failed, error = send_each(messages)
+    if not failed:
+        return len(messages)
+    if task.request.retries >= task.max_retries:
+        failed_payloads = [message_payload(messages[index]) for index in failed]
+        dead_letter_payloads(task.name, failed_payloads, error, task.request.retries + 1)
+        return len(messages) - len(failed)
+
+    countdown = get_exponential_backoff_interval(
+        factor=int(task.retry_backoff),
+        retries=task.request.retries,
+        maximum=task.retry_backoff_max,
+        full_jitter=task.retry_jitter,
+    )
+    logger.warning(
+        f"{task.name}: {len(failed)} of {len(messages)} messages failed, retry {task.request.retries + 1} "
+        f"in {countdown}s: {error}"
+    )
+    raise task.retry(args=retry_args(failed), exc=error, countdown=countdown)
+
+
+# Seconds a claimed dead letter is skipped by other re-drivers; covers a crash between claim and send
+DEAD_LETTER_LEASE = 600
+# Seconds before a dead letter that failed again is retried, doubled with every attempt up to EMAIL_RETRY_BACKOFF_MAX
+DEAD_LETTER_BACKOFF = 60
+
+
+def is_permanent_failure(error):
+    """Whether the SMTP server rejected the message itself (5xx reply or refused recipients)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _claim_dead_letters(batch_size):
+    """Lease up to ``batch_size`` due dead letters, oldest first, and commit the claim."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            DeadLetterEmail.objects.select_for_update(skip_locked=True)
+            .filter(redriven_at__isnull=True, abandoned_at__isnull=True)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by("created_at")[:batch_size]
+        )
+        DeadLetterEmail.objects.filter(id__in=[letter.id for letter in batch]).update(
+            next_attempt_at=now + timedelta(seconds=DEAD_LETTER_LEASE)
+        )
+    return batch
+
+
+def _record_failure(letter, error):
+    letter.attempts += 1
+    letter.last_error = str(error)
+    if is_permanent_failure(error) and letter.attempts >= settings.DEAD_LETTER_MAX_ATTEMPTS:
+        letter.abandoned_at = timezone.now()
+        letter.next_attempt_at = None
+        logger.error(f"Abandoned dead letter {letter.id} after {letter.attempts} attempts: {error}")
+    else:
+        countdown = get_exponential_backoff_interval(
+            factor=DEAD_LETTER_BACKOFF,
+            retries=letter.attempts - 1,
+            maximum=settings.EMAIL_RETRY_BACKOFF_MAX,
+            full_jitter=True,
+        )
+        letter.next_attempt_at = timezone.now() + timedelta(seconds=countdown)
+        logger.warning(f"Re-drive of dead letter {letter.id} failed, retry in {countdown}s: {error}")
+    letter.save(update_fields=["attempts", "last_error", "abandoned_at", "next_attempt_at"])
+
+
+def redrive_dead_letters(batch_size=100):
+    """Send one batch of due dead letters over a single SMTP connection, oldest first.
+
+    Returns ``(claimed, redriven)``. The batch is claimed in a short transaction and sent after it
+    commits, so no row lock is held during SMTP round trips. A letter the server rejects is retried
+    later with exponential backoff and the batch moves on to the next one; a permanent rejection is
+    abandoned after ``DEAD_LETTER_MAX_ATTEMPTS``. If the connection itself fails, the unsent letters are
+    released untouched for the next batch.
+    """
+    batch = _claim_dead_letters(batch_size)
+    if not batch:
+        return 0, 0
+
+    redriven = []
+    handled = 0
+    connection = get_connection("django.core.mail.backends.smtp.EmailBackend")
+    try:
+        connection.open()
+        for letter in batch:
+            try:
+                connection.connection.sendmail(letter.sender, letter.recipients, base64.b64decode(letter.payload))
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                _record_failure(letter, e)
+            else:
+                redriven.append(letter.id)
+            handled += 1
+    except DELIVERY_ERRORS as e:
+        logger.warning(f"SMTP connection failed during dead-letter re-drive: {e}")
+        DeadLetterEmail.objects.filter(id__in=[letter.id for letter in batch[handled:]]).update(next_attempt_at=None)
+    finally:
+        connection.close()
+
+    DeadLetterEmail.objects.filter(id__in=redriven).update(redriven_at=timezone.now(), next_attempt_at=None)
+    logger.info(f"Re-drove {len(redriven)} of {len(batch)} dead letters")
+    return len(batch), len(redriven)
+
+
+def smtp_options_from_settings():
+    return {
+        "hostname": settings.EMAIL_HOST,
+        "port": settings.EMAIL_PORT,
+        "username": settings.EMAIL_HOST_USER or None,
+        "password": settings.EMAIL_HOST_PASSWORD or None,
+        "start_tls": settings.EMAIL_USE_TLS,
+        "use_tls": settings.EMAIL_USE_SSL,
+        "timeout": settings.EMAIL_TIMEOUT or 60,
+    }
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Hand messages to the asyncio SMTP sender (``manage.py run_mail_sender``) through a Redis list.
+
+    Email tasks return as soon as their messages are queued instead of holding a worker process
+    for the SMTP handshake and TLS negotiation.
+    """
+
+    def send_messages(self, email_messages):
+        payloads = [serialize_message(message) for message in email_messages if message.recipients()]
+        if not payloads:
+            return 0
+        try:
+            get_redis_client().rpush(OUTGOING_KEY, *payloads)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(payloads)
+
+
+class AsyncSMTPSender:
+    """Deliver messages concurrently over a bounded pool of persistent SMTP sessions.
+
+    ``run()`` pulls ``(token, message)`` pairs from an async iterable into a bounded queue; when every
+    session is busy and the queue is full it stops pulling, so the source is never drained faster than
+    the SMTP server accepts mail. Subclasses acknowledge results through ``on_sent`` and ``on_failed``.
+    """
+
+    def __init__(self, pool_size=10, queue_size=100, smtp_options=None):
+        self.pool_size = pool_size
+        self.queue_size = queue_size
+        self.smtp_options = smtp_options or smtp_options_from_settings()
+        self.sent = 0
+        self.failed = 0
+
+    async def on_sent(self, token, message):
+        pass
+
+    async def on_failed(self, token, message, error):
+        pass
+
+    async def _connect(self):
+        smtp = aiosmtplib.SMTP(**self.smtp_options)
+        await smtp.connect()
+        return smtp
+
+    async def _send(self, smtp, message):
+        raw = base64.b64decode(message["raw"])
+        for attempt in (1, 2):
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            try:
+                await smtp.sendmail(message["from"], message["to"], raw)
+                return smtp
+            except aiosmtplib.SMTPServerDisconnected:
+                # Servers drop idle sessions; reconnect once before counting the message as failed
+                smtp = None
+                if attempt == 2:
+                    raise
+        return smtp
+
+    async def _session(self, queue):
+        smtp = None
+        try:
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    token, message = item
+                    try:
+                        smtp = await self._send(smtp, message)
+                    except (aiosmtplib.SMTPException, OSError) as e:
+                        self.failed += 1
+                        smtp = None
+                        logger.warning(f"SMTP delivery to {message['to']} failed: {e}")
+                        await self.on_failed(token, message, e)
+                    else:
+                        self.sent += 1
+                        await self.on_sent(token, message)
+                finally:
+                    queue.task_done()
+        finally:
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except aiosmtplib.SMTPException:
+                    pass
+
+    async def run(self, source):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        sessions = [asyncio.create_task(self._session(queue)) for _ in range(self.pool_size)]
+        try:
+            async for item in source:
+                await queue.put(item)
+        finally:
+            for _ in sessions:
+                await queue.put(None)
+            await asyncio.gather(*sessions)
+        logger.info(f"SMTP sender stopped: {self.sent} sent, {self.failed} failed")
+
+
+class RedisMailSender(AsyncSMTPSender):
+    """Consume messages queued by ``QueuedEmailBackend``.
+
+    Each message is moved to a per-sender processing list while in flight and removed once the SMTP
+    server accepts it, so messages claimed by a crashed sender are requeued when it restarts under the
+    same name. Failed messages wait in a retry set for a jittered exponential backoff, capped at
+    ``EMAIL_RETRY_BACKOFF_MAX``, so a provider outage does not burn every attempt at once. They are
+    retried up to ``max_attempts`` times and then dead-lettered.
+    """
+
+    def __init__(self, name, max_attempts=None, poll_timeout=5, **kwargs):
+        super().__init__(**kwargs)
+        self.processing_key = PROCESSING_KEY.format(name)
+        # The first attempt plus the same retry budget as the email tasks
+        self.max_attempts = max_attempts or settings.EMAIL_MAX_RETRIES + 1
+        self.poll_timeout = poll_timeout
+        self.stopping = False
+        self.client = redis.asyncio.Redis.from_url(settings.CACHES["default"]["LOCATION"], decode_responses=True)
+
+    def stop(self):
+        self.stopping = True
+
+    async def _promote_due_retries(self, batch_size=100):
+        promoted = await self.client.eval(_PROMOTE_DUE_SCRIPT, 2, RETRY_KEY, OUTGOING_KEY, time.time(), batch_size)
+        if promoted:
+            logger.info(f"Requeued {promoted} messages whose retry backoff has elapsed")
+
+    async def source(self):
+        requeued = 0
+        while await self.client.lmove(self.processing_key, OUTGOING_KEY, "RIGHT", "LEFT"):
+            requeued += 1
+        if requeued:
+            logger.warning(f"Requeued {requeued} messages left in {self.processing_key} by a previous run")
+
+        while not self.stopping:
+            await self._promote_due_retries()
+            payload = await self.client.blmove(OUTGOING_KEY, self.processing_key, self.poll_timeout, "LEFT", "RIGHT")
+            if payload is not None:
+                yield payload, json.loads(payload)
+
+    async def on_sent(self, token, message):
+        await self.client.lrem(self.processing_key, 1, token)
+
+    async def on_failed(self, token, message, error):
+        message["attempts"] += 1
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, token)
+        if message["attempts"] < self.max_attempts:
+            countdown = get_exponential_backoff_interval(
+                factor=1,
+                retries=message["attempts"] - 1,
+                maximum=settings.EMAIL_RETRY_BACKOFF_MAX,
+                full_jitter=True,
+            )
+            pipe.zadd(RETRY_KEY, {json.dumps(message): time.time() + countdown})
+        else:
+            await sync_to_async(dead_letter_payloads)(
+                "common.mail.run_mail_sender", [message], error, message["attempts"]
+            )
+        await pipe.execute()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from common.mail import AsyncSMTPSender, serialize_message
+from registrations.emails import EVENT_REMINDER, reminder_offset_context, render_emails
+
+
+class _SlowSink:
+    """aiosmtpd handler that accepts and discards mail after a simulated provider delay."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        return "250 Message accepted for delivery"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare delivery throughput of the blocking per-task SMTP path with the asyncio sender "
+        "against a local aiosmtpd sink. Requires the aiosmtpd dev dependency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=500)
+        parser.add_argument("--pool-size", type=int, default=10)
+        parser.add_argument("--delay", type=float, default=0.02, help="Simulated seconds the sink spends per message")
+        parser.add_argument("--port", type=int, default=8025)
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError("aiosmtpd is not installed; run `pipenv install --dev`.")
+
+        total = options["messages"]
+        context = {"start_time": timezone.now(), **reminder_offset_context(120)}
+        messages = render_emails(
+            EVENT_REMINDER, [(f"user{i}@example.com", {"username": f"user{i}"}) for i in range(total)], context
+        )
+
+        controller = Controller(_SlowSink(options["delay"]), hostname="127.0.0.1", port=options["port"])
+        controller.start()
+        try:
+            blocking = self._bench_blocking(messages, options["port"])
+            concurrent = self._bench_async(messages, options["port"], options["pool_size"])
+        finally:
+            controller.stop()
+
+        self.stdout.write(f"blocking task path: {total / blocking:.0f} messages/s ({blocking:.2f}s)")
+        self.stdout.write(
+            f"asyncio sender (pool of {options['pool_size']}): {total / concurrent:.0f} messages/s ({concurrent:.2f}s)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {blocking / concurrent:.1f}x"))
+
+    def _bench_blocking(self, messages, port):
+        # What a single worker process does today: one SMTP session per send_ticket_email task
+        started = time.perf_counter()
+        for message in messages:
+            message.connection = get_connection(
+                "django.core.mail.backends.smtp.EmailBackend", host="127.0.0.1", port=port, use_tls=False
+            )
+            message.send()
+        return time.perf_counter() - started
+
+    def _bench_async(self, messages, port, pool_size):
+        sender = AsyncSMTPSender(
+            pool_size=pool_size,
+            smtp_options={"hostname": "127.0.0.1", "port": port, "start_tls": False, "use_tls": False},
+        )
+        payloads = [json.loads(serialize_message(message)) for message in messages]
+
+        async def source():
+            for index, payload in enumerate(payloads):
+                yield index, payload
+
+        started = time.perf_counter()
+        asyncio.run(sender.run(source()))
+        elapsed = time.perf_counter() - started
+        if sender.failed:
+            raise CommandError(f"{sender.failed} messages failed to deliver")
+        return elapsed
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.mail import redrive_dead_letters
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-send due dead-lettered emails in rate-limited batches, backing off while the provider keeps failing. "
+        "Exits non-zero once --max-stalled-batches batches in a row re-drive nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--rate", type=float, default=20.0, help="Maximum messages per second.")
+        parser.add_argument("--max-backoff", type=float, default=300.0, help="Longest pause after failed batches.")
+        parser.add_argument(
+            "--max-stalled-batches", type=int, default=5, help="Give up after this many batches in a row send nothing."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = batch_size / options["rate"]
+        backoff = interval
+        total = 0
+        stalled = 0
+        logger.info(f"Dead-letter re-drive started: batch_size={batch_size}, rate={options['rate']}/s")
+        while True:
+            started = time.monotonic()
+            try:
+                claimed, redriven = redrive_dead_letters(batch_size)
+            except Exception as e:
+                logger.error(f"Error re-driving dead letters: {e}", exc_info=True)
+                claimed, redriven = None, 0
+            total += redriven
+            if claimed == 0:
+                break
+
+            if not redriven:
+                stalled += 1
+                if stalled >= options["max_stalled_batches"]:
+                    logger.error(f"Dead-letter re-drive gave up after {stalled} batches without progress")
+                    raise CommandError(f"{stalled} batches in a row re-drove nothing; re-drove {total} in all")
+                backoff = min(backoff * 2, options["max_backoff"])
+                logger.warning(f"Re-drive batch sent nothing, pausing {backoff:.0f}s")
+                time.sleep(backoff)
+                continue
+            stalled = 0
+            backoff = interval
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+        self.stdout.write(self.style.SUCCESS(f"Re-drove {total} dead-lettered emails"))
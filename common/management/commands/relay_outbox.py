@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.outbox import prune_outbox, relay_outbox
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = "Publish pending outbox messages to Celery in batches and delete published ones past their retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        logger.info(f"Outbox relay started: batch_size={batch_size}")
+        while True:
+            try:
+                claimed, _ = relay_outbox(batch_size)
+            except Exception as e:
+                logger.error(f"Error relaying outbox: {e}", exc_info=True)
+                claimed = 0
+            if claimed == batch_size:
+                continue
+            # Caught up: clear out messages published past the retention period before idling
+            try:
+                prune_outbox()
+            except Exception as e:
+                logger.error(f"Error pruning outbox: {e}", exc_info=True)
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
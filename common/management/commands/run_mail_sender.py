@@ -0,0 +1,38 @@
+import asyncio
+import signal
+import socket
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.mail import RedisMailSender
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = "Deliver mail queued by QueuedEmailBackend over a pool of persistent asyncio SMTP sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default=socket.gethostname(), help="Stable sender name for crash recovery.")
+        parser.add_argument("--pool-size", type=int, default=settings.MAIL_SENDER_POOL_SIZE)
+        parser.add_argument("--queue-size", type=int, default=settings.MAIL_SENDER_QUEUE_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=settings.EMAIL_MAX_RETRIES + 1)
+
+    def handle(self, *args, **options):
+        sender = RedisMailSender(
+            options["name"],
+            max_attempts=options["max_attempts"],
+            pool_size=options["pool_size"],
+            queue_size=options["queue_size"],
+        )
+        logger.info(
+            f"Mail sender {options['name']} started: pool_size={options['pool_size']}, "
+            f"queue_size={options['queue_size']}"
+        )
+        asyncio.run(self._run(sender))
+
+    async def _run(self, sender):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, sender.stop)
+        await sender.run(sender.source())
@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-18 02:59
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0002_outboxmessage_eta_outboxmessage_task_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeadLetterEmail",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("task_name", models.CharField(max_length=255)),
+                ("sender", models.CharField(max_length=255)),
+                ("recipients", models.JSONField(default=list)),
+                (
+                    "payload",
+                    models.TextField(help_text="Base64-encoded rendered MIME message"),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("redriven_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "dead_letter_emails",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="deadletteremail",
+            index=models.Index(
+                condition=models.Q(("redriven_at__isnull", True)),
+                fields=["created_at"],
+                name="dead_letter_pending_idx",
+            ),
+        ),
+    ]
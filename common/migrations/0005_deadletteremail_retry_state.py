@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0004_outboxmessage_published_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="deadletteremail",
+            name="dead_letter_pending_idx",
+        ),
+        migrations.AddField(
+            model_name="deadletteremail",
+            name="abandoned_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="deadletteremail",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="deadletteremail",
+            index=models.Index(
+                condition=models.Q(
+                    ("abandoned_at__isnull", True), ("redriven_at__isnull", True)
+                ),
+                fields=["created_at"],
+                name="dead_letter_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common", "0006_outboxmessage_next_attempt_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                condition=models.Q(("published_at__isnull", True)),
+                fields=["task_id"],
+                name="outbox_pending_task_idx",
+            ),
+        ),
+    ]
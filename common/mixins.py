@@ -0,0 +1,315 @@
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+
+from .versions import get_collection_versions
+from loguru import logger
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = "idempotency_conflict"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request body."
+    default_code = "idempotency_key_reused"
+
+
+class _IdempotentReplay(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class IdempotentCreateMixin:
+    """Honour the ``Idempotency-Key`` header on write actions of a viewset.
+
+    The first response for a key is stored in the cache and replayed byte-for-byte for repeats.
+    A duplicate that arrives while the first request is still running waits for its result
+    instead of executing the action a second time.
+    """
+
+    idempotent_actions = ("create",)
+    idempotency_ttl = 60 * 60 * 24
+    idempotency_lock_timeout = 30
+    idempotency_wait_timeout = 10
+    idempotency_poll_interval = 0.05
+
+    def _get_idempotency_key(self, request):
+        key = request.headers.get("Idempotency-Key")
+        if not key or self.action not in self.idempotent_actions:
+            return None
+        return f"idempotency:{self.basename}:{self.action}:{request.user.pk}:{key}"
+
+    def _request_fingerprint(self, request):
+        body = json.dumps(request.data, sort_keys=True, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    def _replay(self, stored, fingerprint):
+        if stored["fingerprint"] != fingerprint:
+            raise IdempotencyKeyReused()
+        response = HttpResponse(stored["content"], status=stored["status"], content_type=stored["content_type"])
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        cache_key = self._get_idempotency_key(request)
+        if cache_key is None:
+            return
+
+        fingerprint = self._request_fingerprint(request)
+        lock_key = f"{cache_key}:lock"
+        deadline = time.monotonic() + self.idempotency_wait_timeout
+        while True:
+            stored = cache.get(cache_key)
+            if stored is not None:
+                logger.info(f"Replaying stored response for idempotency key {cache_key}")
+                raise _IdempotentReplay(self._replay(stored, fingerprint))
+            if cache.add(lock_key, fingerprint, timeout=self.idempotency_lock_timeout):
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for in-flight request with idempotency key {cache_key}")
+                raise IdempotencyConflict()
+            time.sleep(self.idempotency_poll_interval)
+
+        self._idempotency = (cache_key, lock_key, fingerprint)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _IdempotentReplay):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Unhandled errors never reach finalize_response, so let a retry run the action again
+            idempotency = getattr(self, "_idempotency", None)
+            if idempotency is not None:
+                cache.delete(idempotency[1])
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        idempotency = getattr(self, "_idempotency", None)
+        if idempotency is None:
+            return response
+
+        cache_key, lock_key, fingerprint = idempotency
+        try:
+            if response.status_code < 500:
+                response.render()
+                cache.set(
+                    cache_key,
+                    {
+                        "fingerprint": fingerprint,
+                        "status": response.status_code,
+                        "content": response.content,
+                        "content_type": response["Content-Type"],
+                    },
+                    timeout=self.idempotency_ttl,
+                )
+                logger.info(f"Stored response for idempotency key {cache_key}")
+        finally:
+            cache.delete(lock_key)
+        return response
+
+
+def _lookup_pk(view):
+    """Primary key from the URL of a detail route, parsed by the model field. Raises ``Http404`` if invalid."""
+    value = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+    try:
+        return view.get_queryset().model._meta.pk.to_python(value)
+    except ValidationError:
+        raise Http404
+
+
+def _check_object_permissions(view, request, fields):
+    """Run the view's object permissions against a stand-in built from ``fields`` instead of a model instance."""
+    view.check_object_permissions(request, SimpleNamespace(id=fields["pk"], **fields))
+
+
+def _validators_from_stamps(pk, media_type, stamps):
+    """``(etag, last_modified)`` of a detail representation from the timestamps it is built from."""
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    raw = f"{pk}|{media_type}|{'|'.join(stamp.isoformat() for stamp in stamps)}"
+    # Whole seconds, the resolution of HTTP dates
+    last_modified = int(max(stamps).timestamp()) if stamps else None
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"', last_modified
+
+
+def _instance_stamps(instance, timestamps):
+    """Values of ``timestamps`` (``updated_at``, ``organizer__updated_at``, ...) read off a loaded instance."""
+    stamps = []
+    for path in timestamps:
+        value = instance
+        for name in path.split("__"):
+            value = getattr(value, name) if value is not None else None
+        stamps.append(value)
+    return stamps
+
+
+def invalidate_details(key_template, object_ids):
+    """Drop the cached detail responses of ``object_ids`` once the current transaction commits."""
+    keys = [key_template.format(object_id) for object_id in object_ids]
+    if keys:
+        transaction.on_commit(lambda: _delete_details(keys))
+
+
+def _delete_details(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        # Entries expire after DETAIL_CACHE_TTL regardless
+        logger.warning(f"Could not invalidate {len(keys)} cached detail response(s): {e}")
+
+
+class CachedDetailMixin:
+    """Serve ``retrieve`` from the rendered JSON of the object, cached per id.
+
+    A hit returns the stored bytes with no ORM access and no serializer work. The object permissions
+    of the view are checked against ``object_permission_fields``, stored next to the body, so a
+    hit cannot leak an object the caller may not see. The timestamps the body was built from are
+    stored too, so ``ConditionalGetMixin`` can validate a hit without a query. Apps invalidate entries
+    with ``invalidate_details(detail_cache_key, ids)`` on every write that changes the serialized
+    fields, including fields embedded from related objects.
+    """
+
+    detail_cache_key = None
+    object_permission_fields = ()
+    conditional_related_timestamps = ()
+
+    def _detail_cache_key(self):
+        # Normalised so every spelling of the id shares the entry that invalidation deletes
+        return self.detail_cache_key.format(_lookup_pk(self))
+
+    def _json_response(self, content, source):
+        response = HttpResponse(content, content_type="application/json")
+        response["X-Data-Source"] = source
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.detail_cache_key is None or not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().retrieve(request, *args, **kwargs)
+
+        cache_key = self._detail_cache_key()
+        # Already fetched by ConditionalGetMixin to compute the validators
+        cached = getattr(self, "_cached_detail", None) or cache.get(cache_key)
+        if cached is not None:
+            _check_object_permissions(self, request, cached["permission_fields"])
+            return self._json_response(cached["content"], "cache")
+
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        content = request.accepted_renderer.render(data, request.accepted_media_type, self.get_renderer_context())
+        permission_fields = {field: getattr(instance, field) for field in ("pk", *self.object_permission_fields)}
+        stamps = _instance_stamps(instance, ("updated_at", *self.conditional_related_timestamps))
+        cache.set(
+            cache_key,
+            {"content": content, "permission_fields": permission_fields, "stamps": stamps},
+            timeout=settings.DETAIL_CACHE_TTL,
+        )
+        return self._json_response(content, "database")
+
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """``ETag``/``Last-Modified`` validators and ``304 Not Modified`` for ``list`` and ``retrieve``.
+
+    Detail validators come from the ``updated_at`` of the object and of the related rows its
+    representation embeds (``conditional_related_timestamps``). With ``CachedDetailMixin`` they are
+    read from the cached detail entry, so a hit stays free of ORM access; otherwise, and on a cache
+    miss, they are read with one narrow query. List
+    ETags hash the request with the collection versions of ``conditional_list_models``, one cache
+    round trip. A matching request is answered from ``initial()``, before the action, the serializer
+    or any other query runs. Writes that bypass ``save()`` must stamp ``updated_at`` and call
+    ``bump_collection_version`` themselves.
+    """
+
+    conditional_list_models = ()
+    conditional_related_timestamps = ()
+    object_permission_fields = ()
+    detail_cache_key = None
+
+    def _list_validators(self, request):
+        models = (self.queryset.model, *self.conditional_list_models)
+        versions = get_collection_versions(models)
+        raw = f"{request.user.pk}|{request.accepted_media_type}|{request.get_full_path()}|{'|'.join(versions)}"
+        return f'"{hashlib.sha1(raw.encode()).hexdigest()}"', None
+
+    def _cached_detail_stamps(self, request, pk):
+        if self.detail_cache_key is None or not isinstance(request.accepted_renderer, JSONRenderer):
+            return None
+        cached = cache.get(self.detail_cache_key.format(pk))
+        if cached is None or "stamps" not in cached:
+            return None
+        _check_object_permissions(self, request, cached["permission_fields"])
+        self._cached_detail = cached
+        return cached["stamps"]
+
+    def _detail_validators(self, request):
+        try:
+            pk = _lookup_pk(self)
+        except Http404:
+            return None
+        stamps = self._cached_detail_stamps(request, pk)
+        if stamps is None:
+            timestamps = ("updated_at", *self.conditional_related_timestamps)
+            row = self.get_queryset().filter(pk=pk).values(*timestamps, *self.object_permission_fields).first()
+            if row is None:
+                # Let the action produce the 404
+                return None
+            _check_object_permissions(
+                self, request, {"pk": pk, **{field: row[field] for field in self.object_permission_fields}}
+            )
+            stamps = [row[field] for field in timestamps]
+        return _validators_from_stamps(pk, request.accepted_media_type, stamps)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method not in ("GET", "HEAD") or self.action not in ("list", "retrieve"):
+            return
+        if self.action == "list":
+            self._validators = self._list_validators(request)
+        else:
+            self._validators = self._detail_validators(request)
+        if self._validators is None:
+            return
+
+        etag, last_modified = self._validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response["ETag"] = etag
+            raise _NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "_validators", None)
+        if validators is not None and response.status_code == status.HTTP_200_OK:
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
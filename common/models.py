@@ -1,3 +1,69 @@
 from django.db import models
+from django.db.models import Q
+import uuid
 
-# Create your models here.
+
+class OutboxMessage(models.Model):
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    eta = models.DateTimeField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, blank=True, default="")
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task_name} ({self.id})"
+
+    class Meta:
+        db_table = "outbox_messages"
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(published_at__isnull=True),
+                name="outbox_unpublished_idx",
+            ),
+            models.Index(
+                fields=["published_at"],
+                condition=Q(published_at__isnull=False),
+                name="outbox_published_idx",
+            ),
+            # Cancelling or rescheduling reminders deletes their still-pending jobs by task id
+            models.Index(
+                fields=["task_id"],
+                condition=Q(published_at__isnull=True),
+                name="outbox_pending_task_idx",
+            ),
+        ]
+
+
+class DeadLetterEmail(models.Model):
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    task_name = models.CharField(max_length=255)
+    sender = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    payload = models.TextField(help_text="Base64-encoded rendered MIME message")
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    redriven_at = models.DateTimeField(null=True, blank=True)
+    # Not re-driven before this time: a failed letter's backoff, or the lease of a re-drive in progress
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Set once a permanent failure (5xx reply, refused recipients) has used up DEAD_LETTER_MAX_ATTEMPTS
+    abandoned_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task_name} to {', '.join(self.recipients)} ({self.id})"
+
+    class Meta:
+        db_table = "dead_letter_emails"
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(redriven_at__isnull=True, abandoned_at__isnull=True),
+                name="dead_letter_pending_idx",
+            )
+        ]
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from celery import current_app
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+from loguru import logger
+
+# Seconds a claimed message stays leased to the relay that claimed it before another relay may take it over
+OUTBOX_LEASE = 300
+# Seconds before a message that failed to publish is retried, doubled with every attempt up to OUTBOX_BACKOFF_MAX
+OUTBOX_BACKOFF = 5
+OUTBOX_BACKOFF_MAX = 600
+
+
+def enqueue_task(task_name, *args, eta=None, task_id=""):
+    """Record a Celery task in the outbox. Call inside the transaction that writes the data it refers to."""
+    return OutboxMessage.objects.create(task_name=task_name, args=list(args), eta=eta, task_id=task_id)
+
+
+def enqueue_tasks(task_name, args_list):
+    return OutboxMessage.objects.bulk_create(
+        [OutboxMessage(task_name=task_name, args=list(args)) for args in args_list]
+    )
+
+
+def _claim_outbox(batch_size):
+    """Lease up to ``batch_size`` due messages, oldest first, and commit the claim."""
+    now = timezone.now()
+    horizon = now + timedelta(seconds=settings.OUTBOX_ETA_HORIZON)
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True)
+            .filter(Q(eta__isnull=True) | Q(eta__lte=horizon))
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by("created_at")[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=[message.id for message in batch]).update(
+            next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE)
+        )
+    return batch
+
+
+def _record_failure(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    countdown = get_exponential_backoff_interval(
+        factor=OUTBOX_BACKOFF, retries=message.attempts - 1, maximum=OUTBOX_BACKOFF_MAX, full_jitter=True
+    )
+    message.next_attempt_at = timezone.now() + timedelta(seconds=countdown)
+    message.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+    logger.warning(f"Publishing outbox message {message.id} failed, retry in {countdown}s: {error}")
+
+
+def relay_outbox(batch_size=100):
+    """Publish one batch of pending outbox messages to the broker and mark them as published.
+
+    Returns ``(claimed, published)``. The batch is leased in a short ``SKIP LOCKED`` transaction and
+    published after it commits, so several relays can run side by side and no row lock is held while
+    talking to the broker. A message that fails to publish is retried later with exponential backoff
+    and the batch moves on to the next one. Delivery is at-least-once: a relay that dies after
+    publishing but before marking the batch republishes it once the lease runs out.
+    Messages with an ETA stay here until they are ``OUTBOX_ETA_HORIZON`` seconds from due: a worker
+    holds a published ETA task unacknowledged until it runs, and the Redis broker redelivers any
+    message left unacknowledged past its visibility timeout to another worker.
+    """
+    batch = _claim_outbox(batch_size)
+    if not batch:
+        return 0, 0
+
+    published = []
+    for message in batch:
+        try:
+            current_app.send_task(
+                message.task_name, args=message.args, eta=message.eta, task_id=message.task_id or None
+            )
+        except Exception as e:
+            _record_failure(message, e)
+        else:
+            published.append(message.id)
+
+    OutboxMessage.objects.filter(id__in=published).update(published_at=timezone.now(), next_attempt_at=None)
+    logger.info(f"Relayed {len(published)} of {len(batch)} outbox messages")
+    return len(batch), len(published)
+
+
+def prune_outbox(batch_size=1000):
+    """Delete one batch of messages published more than ``OUTBOX_RETENTION_DAYS`` ago. Returns the number deleted."""
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    expired = list(
+        OutboxMessage.objects.filter(published_at__lt=cutoff)
+        .order_by("published_at")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not expired:
+        return 0
+    deleted, _ = OutboxMessage.objects.filter(id__in=expired).delete()
+    logger.info(f"Pruned {deleted} published outbox messages")
+    return deleted
@@ -0,0 +1,288 @@
+import base64
+import binascii
+import hashlib
+import json
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .versions import get_collection_version
+
+COUNT_KEY = "count:{}:{}:{}"
+
+
+def estimate_row_count(model, using="default"):
+    """Row count of ``model``'s table from the PostgreSQL planner statistics, or ``None`` if unknown."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 until the table is first vacuumed or analyzed
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class _EstimatedPage(Page):
+    """Page of an estimated count: whether a next page exists comes from one extra fetched row."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that avoids running ``COUNT(*)`` on every page.
+
+    Unfiltered querysets over tables of at least ``PAGINATION_ESTIMATE_THRESHOLD`` rows report the planner
+    estimate. Other counts are cached for ``PAGINATION_COUNT_TTL`` seconds under the SQL of the query and
+    the collection version of its table, so any write to the table invalidates them. ``count_exact``
+    tells which of the two the count is.
+
+    An estimate is only shown, never trusted: it can be short of the real row count, so pages are then
+    validated by fetching them, and clamping an out-of-range page falls back to the exact count.
+    """
+
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+                self.count_exact = False
+                return estimate
+        return self.exact_count
+
+    @cached_property
+    def exact_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        signature = hashlib.sha1(f"{sql}{params}".encode()).hexdigest()
+        key = COUNT_KEY.format(queryset.model._meta.db_table, get_collection_version(queryset.model), signature)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, timeout=settings.PAGINATION_COUNT_TTL)
+        return count
+
+    def _is_estimate(self):
+        # Evaluating the count decides whether it is exact
+        self.count
+        return not self.count_exact
+
+    def validate_number(self, number):
+        if not self._is_estimate():
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        if not self._is_estimate():
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        return _EstimatedPage(rows[: self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+    def get_page(self, number):
+        """Like ``Paginator.get_page()``, clamping to the real last page when the count is an estimate."""
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            return self.page(self.last_page)
+
+    @property
+    def last_page(self):
+        """Number of the real last page; counts exactly when ``count`` is an estimate."""
+        if not self._is_estimate():
+            return self.num_pages
+        return max(1, math.ceil(self.exact_count / self.per_page))
+
+
+class EnvelopePagination(PageNumberPagination):
+    """Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Page-number mode stays the default. Sending ``?cursor=`` (empty for the first page) switches to
+    keyset mode: rows are ordered by ``cursor_ordering``, the page starts right after the row encoded in
+    the cursor, and ``next``/``previous`` carry opaque cursors. Keyset mode runs no ``COUNT(*)`` and no
+    ``OFFSET``, so ``count`` is ``null`` and deep pages cost the same as the first one. Both modes return
+    the same envelope, with the rows under ``results_key``. Page-number counts come from
+    ``CachedCountPaginator``; ``count_exact`` is false when the count is a planner estimate.
+    """
+
+    django_paginator_class = CachedCountPaginator
+    page_size = 10
+    results_key = "results"
+    cursor_query_param = "cursor"
+    # Must end in a unique column so every row has a distinct position
+    cursor_ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+    # Output fields of annotations used in cursor_ordering, keyed by annotation name
+    cursor_fields = {}
+    # Serve every request in keyset mode, for orderings page numbers cannot follow cheaply
+    cursor_only = False
+
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_only or self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return self.paginate_page_number(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self._to_python(queryset.model, position)
+
+        ordering = self._reversed_ordering() if reverse else self.cursor_ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        # One extra row tells whether another page exists in the direction of travel
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.rows = rows
+        return rows
+
+    def paginate_page_number(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = paginator.last_page
+        return page_number
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": None if self.cursor_mode else self.page.paginator.count,
+                "count_exact": not self.cursor_mode and self.page.paginator.count_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                self.results_key: data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or not self.rows:
+            return None
+        return self._cursor_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or not self.rows:
+            return None
+        return self._cursor_link(self.rows[0], reverse=True)
+
+    def decode_cursor(self, request):
+        """``(position, reverse)`` of the cursor in the request; ``(None, False)`` for the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            values, reverse = payload["p"], bool(payload["r"])
+            if not isinstance(values, list) or len(values) != len(self.cursor_ordering):
+                raise ValueError
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, row, reverse):
+        values = [self._field_value(row, field) for field in self.cursor_ordering]
+        payload = json.dumps({"p": values, "r": int(reverse)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode("ascii").rstrip("=")
+
+    def _cursor_link(self, row, reverse):
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def _field_value(self, row, field):
+        value = getattr(row, field.lstrip("-"))
+        return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+    def _cursor_field(self, model, name):
+        return self.cursor_fields[name] if name in self.cursor_fields else model._meta.get_field(name)
+
+    def _to_python(self, model, position):
+        try:
+            return [
+                self._cursor_field(model, field.lstrip("-")).to_python(value)
+                for field, value in zip(self.cursor_ordering, position)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _reversed_ordering(self):
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in self.cursor_ordering)
+
+    def _after(self, ordering, position):
+        """Rows strictly after ``position`` in ``ordering``, expanded from the row comparison ``(a, b) > (x, y)``.
+
+        The expansion is an OR that PostgreSQL cannot turn into an index range, so it is ANDed with the
+        redundant bound ``a >= x`` on the leading column. The index scan then starts at the cursor instead
+        of at the head of the index.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        leading = ordering[0]
+        bound = "lte" if leading.startswith("-") else "gte"
+        return Q(**{f"{leading.lstrip('-')}__{bound}": position[0]}) & condition
@@ -1,5 +1,13 @@
+from django.core.cache import cache
+from django.db.models import Q
 from rest_framework.permissions import BasePermission
 
+from accounts.models import User
+from events.models import Event
+
+CHECKIN_ROLE_KEY = "checkin_role_{}"
+CHECKIN_EVENT_ORGANIZER_KEY = "checkin_event_organizer_{}"
+
 
 def _is_admin(user):
     return user.is_authenticated and user.roles.filter(group__name__iexact="admin").exists()
@@ -9,6 +17,41 @@ def _is_event_organizer(user):
     return user.is_authenticated and user.roles.filter(group__name__iexact="organizer").exists()
 
 
+# Both lookups are cached so door scanners authenticated from JWT claims alone never hit the database per scan.
+# Role changes (accounts.signals) and event saves (events.signals) drop the cached entries.
+def _checkin_role(user_id):
+    """``"admin"`` for superusers and admins, ``"organizer"`` for organizers, ``""`` for everyone else."""
+    cache_key = CHECKIN_ROLE_KEY.format(user_id)
+    role = cache.get(cache_key)
+    if role is None:
+        users = User.objects.filter(pk=user_id)
+        if users.filter(Q(is_superuser=True) | Q(roles__group__name__iexact="admin")).exists():
+            role = "admin"
+        elif users.filter(roles__group__name__iexact="organizer").exists():
+            role = "organizer"
+        else:
+            role = ""
+        cache.set(cache_key, role, timeout=300)
+    return role
+
+
+def _event_organizer_id(event_id):
+    cache_key = CHECKIN_EVENT_ORGANIZER_KEY.format(event_id)
+    organizer_id = cache.get(cache_key)
+    if organizer_id is None:
+        organizer_id = str(Event.objects.filter(pk=event_id).values_list("organizer_id", flat=True).first() or "")
+        cache.set(cache_key, organizer_id, timeout=300)
+    return organizer_id
+
+
+def invalidate_checkin_roles(*user_ids):
+    cache.delete_many([CHECKIN_ROLE_KEY.format(user_id) for user_id in user_ids])
+
+
+def invalidate_checkin_event(event_id):
+    cache.delete(CHECKIN_EVENT_ORGANIZER_KEY.format(event_id))
+
+
 class IsSuperUser(BasePermission):
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_authenticated and request.user.is_superuser)
@@ -30,16 +73,31 @@ class IsSuperUserOrAdminOrOrganizer(BasePermission):
         )
 
     def has_object_permission(self, request, view, obj):
+        # Method first: reads never pay for the role lookup
         if (
-            request.user.is_authenticated
+            request.method in ("PUT", "PATCH", "DELETE")
+            and request.user.is_authenticated
             and _is_event_organizer(request.user)
-            and (request.method == "PUT" or request.method == "PATCH" or request.method == "DELETE")
         ):
             if obj.organizer_id != request.user.id:
                 return False
         return super().has_object_permission(request, view, obj)
 
 
+class IsEventManager(BasePermission):
+    """Superusers and admins manage every event; organizers only the events they organize."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated and (user.is_superuser or _is_admin(user) or _is_event_organizer(user))
+        )
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        return bool(user.is_superuser or _is_admin(user) or obj.organizer_id == user.id)
+
+
 class UserPermission(BasePermission):
     def has_permission(self, request, view):
         user = request.user
@@ -49,3 +107,18 @@ class UserPermission(BasePermission):
             if view.action == "retrieve":
                 return bool(user and user.is_authenticated)
         return bool(user and user.is_authenticated and (user.is_superuser or _is_admin(user)))
+
+
+class IsCheckInStaff(BasePermission):
+    """Superusers and admins check attendees in to every event; organizers only to the events they organize.
+
+    The object is the id of the event being checked in to, read from the scanned token.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and _checkin_role(user.id))
+
+    def has_object_permission(self, request, view, obj):
+        role = _checkin_role(request.user.id)
+        return role == "admin" or (role == "organizer" and _event_organizer_id(obj) == str(request.user.id))
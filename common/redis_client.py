@@ -0,0 +1,22 @@
+import redis
+from django.conf import settings
+from loguru import logger
+
+_client = None
+
+
+def get_redis_client():
+    """Return a raw redis-py client for the ``default`` cache server.
+
+    Django's cache API has no atomic multi-key operations or Lua scripting, which the
+    inventory, queueing and check-in code relies on, so those go through this client.
+    """
+    global _client
+    if _client is None:
+        try:
+            _client = redis.Redis.from_url(settings.CACHES["default"]["LOCATION"], decode_responses=True)
+            logger.info("Redis client initialized successfully")
+        except Exception as e:
+            logger.error(f"Error initializing Redis client: {e}", exc_info=True)
+            raise
+    return _client
@@ -1,3 +1,256 @@
-from django.test import TestCase
+import base64
+import socket
+import unittest
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from aiosmtpd.controller import Controller
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from events.models import Event
+from .mail import redrive_dead_letters
+from .models import DeadLetterEmail, OutboxMessage
+from .outbox import enqueue_task, relay_outbox
+from .pagination import CachedCountPaginator, EnvelopePagination
+
+
+class _RejectingHandler:
+    """Accept every recipient except those on ``rejected``, which get a permanent 550."""
+
+    def __init__(self, rejected):
+        self.rejected = rejected
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.rejected:
+            return "550 5.1.1 Mailbox does not exist"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+@override_settings(DEAD_LETTER_MAX_ATTEMPTS=2)
+class RedriveDeadLettersTests(TestCase):
+    def setUp(self):
+        self.handler = _RejectingHandler({"gone@example.com"})
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        controller = Controller(self.handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+        smtp = override_settings(EMAIL_HOST="127.0.0.1", EMAIL_PORT=port, EMAIL_USE_TLS=False)
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+
+    def _letter(self, recipient, age):
+        letter = DeadLetterEmail.objects.create(
+            task_name="test",
+            sender="no-reply@example.com",
+            recipients=[recipient],
+            payload=base64.b64encode(b"Subject: Hi\r\n\r\nHello\r\n").decode(),
+        )
+        DeadLetterEmail.objects.filter(pk=letter.pk).update(created_at=timezone.now() - timedelta(minutes=age))
+        return letter
+
+    def test_rejected_letter_does_not_block_the_ones_behind_it(self):
+        rejected = self._letter("gone@example.com", age=10)
+        accepted = [self._letter(f"user{i}@example.com", age=5 - i) for i in range(3)]
+
+        self.assertEqual(redrive_dead_letters(batch_size=10), (4, 3))
+        self.assertEqual(self.handler.delivered, [f"user{i}@example.com" for i in range(3)])
+        for letter in accepted:
+            letter.refresh_from_db()
+            self.assertIsNotNone(letter.redriven_at)
+
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.attempts, 1)
+        self.assertIsNone(rejected.redriven_at)
+        self.assertGreater(rejected.next_attempt_at, timezone.now())
+        # Backing off: the next batch does not retry it yet
+        self.assertEqual(redrive_dead_letters(batch_size=10), (0, 0))
+
+    def test_permanent_rejection_is_abandoned_after_max_attempts(self):
+        rejected = self._letter("gone@example.com", age=1)
+        for _ in range(2):
+            DeadLetterEmail.objects.filter(pk=rejected.pk).update(next_attempt_at=None)
+            self.assertEqual(redrive_dead_letters(), (1, 0))
+
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.attempts, 2)
+        self.assertIsNotNone(rejected.abandoned_at)
+        DeadLetterEmail.objects.filter(pk=rejected.pk).update(next_attempt_at=None)
+        self.assertEqual(redrive_dead_letters(), (0, 0))
+
+
+class RelayOutboxTests(TestCase):
+    def setUp(self):
+        self.published = []
+        patcher = mock.patch(
+            "common.outbox.current_app.send_task",
+            side_effect=lambda *args, **options: self._send_task(*args, **options),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _send_task(self, name, args=None, **options):
+        if name == "broken":
+            raise ValueError("unroutable")
+        self.published.append(name)
+
+    def _message(self, task_name, age):
+        message = enqueue_task(task_name)
+        OutboxMessage.objects.filter(pk=message.pk).update(created_at=timezone.now() - timedelta(minutes=age))
+        return message
+
+    def test_failed_message_does_not_block_the_ones_behind_it(self):
+        broken = self._message("broken", age=10)
+        for i in range(3):
+            self._message(f"task{i}", age=5 - i)
+
+        self.assertEqual(relay_outbox(batch_size=10), (4, 3))
+        self.assertEqual(self.published, ["task0", "task1", "task2"])
+        self.assertEqual(OutboxMessage.objects.filter(published_at__isnull=False).count(), 3)
+
+        broken.refresh_from_db()
+        self.assertIsNone(broken.published_at)
+        self.assertEqual(broken.attempts, 1)
+        self.assertEqual(broken.last_error, "unroutable")
+        self.assertGreater(broken.next_attempt_at, timezone.now())
+        # Backing off: the next batch does not retry it yet
+        self.assertEqual(relay_outbox(batch_size=10), (0, 0))
+
+    def test_message_is_leased_before_it_is_published(self):
+        message = self._message("task0", age=1)
+        leases = []
+        self._send_task = lambda name, **options: leases.append(
+            OutboxMessage.objects.values_list("next_attempt_at", flat=True).get(pk=message.pk)
+        )
+
+        self.assertEqual(relay_outbox(), (1, 1))
+        self.assertGreater(leases[0], timezone.now())
+        message.refresh_from_db()
+        self.assertIsNotNone(message.published_at)
+        self.assertIsNone(message.next_attempt_at)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Row estimates come from the PostgreSQL planner statistics")
+@override_settings(PAGINATION_ESTIMATE_THRESHOLD=1)
+class EstimatedCountPaginationTests(TestCase):
+    """A planner estimate below the real row count must not hide the trailing pages."""
+
+    def setUp(self):
+        organizer = User.objects.create(username="organizer", email="organizer@example.com")
+        now = timezone.now()
+
+        def create_events(count):
+            Event.objects.bulk_create(
+                Event(
+                    name="Event",
+                    description="",
+                    location="Jakarta",
+                    start_time=now,
+                    end_time=now,
+                    status="scheduled",
+                    quota=1,
+                    category="music",
+                    organizer=organizer,
+                )
+                for _ in range(count)
+            )
+
+        create_events(5)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE events")
+        # Not in the statistics yet: the estimate stays at 5 of 25 rows
+        create_events(20)
+        self.paginator = CachedCountPaginator(Event.objects.order_by("created_at", "id"), 10)
+
+    def test_pages_past_the_estimate_are_served(self):
+        self.assertEqual(self.paginator.count, 5)
+        self.assertFalse(self.paginator.count_exact)
+        self.assertTrue(self.paginator.page(2).has_next())
+        last = self.paginator.page(3)
+        self.assertEqual(len(last), 5)
+        self.assertEqual((last.start_index(), last.end_index()), (21, 25))
+        self.assertFalse(last.has_next())
+        with self.assertRaises(EmptyPage):
+            self.paginator.page(4)
+
+    def test_out_of_range_page_clamps_to_the_real_last_page(self):
+        self.assertEqual(self.paginator.last_page, 3)
+        self.assertEqual(self.paginator.get_page(99).number, 3)
+        self.assertEqual(self.paginator.get_page("x").number, 1)
+
+
+class CursorPaginationTests(TestCase):
+    """Keyset pages must follow ``(created_at, id)`` exactly, including runs of rows sharing ``created_at``."""
+
+    def setUp(self):
+        organizer = User.objects.create(username="organizer", email="organizer@example.com")
+        now = timezone.now()
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                description="",
+                location="Jakarta",
+                start_time=now,
+                end_time=now,
+                status="scheduled",
+                quota=1,
+                category="music",
+                organizer=organizer,
+            )
+            for i in range(11)
+        )
+        # Ties that straddle page boundaries: 4 rows at one instant, 5 at another, 2 at a third
+        events = list(Event.objects.order_by("id"))
+        for index, event in enumerate(events):
+            tie = 0 if index < 4 else 1 if index < 9 else 2
+            Event.objects.filter(pk=event.pk).update(created_at=now - timedelta(minutes=tie))
+        self.expected = list(Event.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def _page(self, cursor=""):
+        paginator = EnvelopePagination()
+        paginator.page_size = 3
+        request = Request(APIRequestFactory().get("/api/events/", {"cursor": cursor}))
+        rows = paginator.paginate_queryset(Event.objects.all(), request)
+        links = {"next": paginator.get_next_link(), "previous": paginator.get_previous_link()}
+        cursors = {name: link and parse_qs(urlparse(link).query)["cursor"][0] for name, link in links.items()}
+        return [row.id for row in rows], cursors
+
+    def test_pages_walk_every_row_once_across_ties(self):
+        seen, pages = [], []
+        rows, cursors = self._page()
+        while True:
+            seen.extend(rows)
+            pages.append(cursors)
+            if not cursors["next"]:
+                break
+            rows, cursors = self._page(cursors["next"])
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 4)
+
+        # And back again from the last page
+        back = list(rows)
+        while cursors["previous"]:
+            rows, cursors = self._page(cursors["previous"])
+            back[:0] = rows
+        self.assertEqual(back, self.expected)
+
+    def test_cursor_bounds_the_leading_column(self):
+        paginator = EnvelopePagination()
+        event = Event.objects.order_by("-created_at", "-id")[4]
+        queryset = Event.objects.filter(paginator._after(paginator.cursor_ordering, [event.created_at, event.id]))
+        self.assertEqual(list(queryset.order_by("-created_at", "-id").values_list("id", flat=True)), self.expected[5:])
+        self.assertIn('"events"."created_at" <=', str(queryset.query))
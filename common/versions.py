@@ -0,0 +1,65 @@
+import uuid
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from loguru import logger
+
+VERSION_KEY = "collection_version:{}"
+
+# Models whose list responses are cached against a collection version
+VERSIONED_MODELS = (
+    "accounts.User",
+    "events.Event",
+    "tickets.Ticket",
+    "registrations.Registration",
+    "payments.Payment",
+)
+
+
+def get_collection_version(model):
+    """Opaque token that changes whenever a row of ``model``'s table is written."""
+    return get_collection_versions([model])[0]
+
+
+def get_collection_versions(models):
+    """Collection versions of several models in one cache round trip."""
+    keys = [VERSION_KEY.format(model._meta.db_table) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            # add() so concurrent readers of a missing key settle on the same token
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def bump_collection_version(model):
+    """Invalidate everything cached against ``model``'s collection version once the transaction commits.
+
+    Saves and deletes bump it through signals; call this after ``bulk_create()`` and queryset ``update()``
+    or ``delete()``, which send none.
+    """
+    transaction.on_commit(lambda: _bump(model))
+
+
+def _bump(model):
+    try:
+        cache.set(VERSION_KEY.format(model._meta.db_table), uuid.uuid4().hex, timeout=None)
+    except Exception as e:
+        # Cached counts still expire after PAGINATION_COUNT_TTL
+        logger.warning(f"Could not bump collection version of {model._meta.db_table}: {e}")
+
+
+def _bump_on_write(sender, **kwargs):
+    bump_collection_version(sender)
+
+
+def connect_version_signals():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_bump_on_write, sender=model, dispatch_uid=f"collection_version_save_{label}")
+        post_delete.connect(_bump_on_write, sender=model, dispatch_uid=f"collection_version_delete_{label}")
@@ -2,6 +2,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Queue
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dico_event.settings")
@@ -14,13 +15,55 @@ app = Celery("dico_event")
 #   should have a `CELERY_` prefix.
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
-# Load task modules from all registered Django apps.
-app.autodiscover_tasks()
+# Load task modules from all registered Django apps. Apps keep their tasks in ``task.py``.
+app.autodiscover_tasks(related_name="task")
+
+DEFAULT_QUEUE = "celery"
+TRANSACTIONAL_QUEUE = "transactional"
+BULK_QUEUE = "bulk"
+
+# Mail a user is waiting for (registration confirmations) and mass reminder fan-out run on separate
+# queues so a reminder burst never sits in front of a confirmation. Size each queue's workers on its own:
+#
+#   celery -A dico_event worker -Q transactional -c 4 -n transactional@%h
+#   celery -A dico_event worker -Q bulk -c 2 -n bulk@%h
+#   celery -A dico_event worker -Q celery -n default@%h
+#
+# Bulk tasks are rate limited per worker (BULK_EMAIL_RATE_LIMIT) to stay under the SMTP provider's quota.
+# A single worker started with ``-Q transactional,bulk,celery`` always drains the queues in that order.
+app.conf.task_default_queue = DEFAULT_QUEUE
+app.conf.task_queues = (Queue(TRANSACTIONAL_QUEUE), Queue(BULK_QUEUE), Queue(DEFAULT_QUEUE))
+app.conf.task_routes = {
+    "registrations.task.send_ticket_email": {"queue": TRANSACTIONAL_QUEUE},
+    "registrations.task.send_ticket_emails": {"queue": TRANSACTIONAL_QUEUE},
+    "registrations.task.send_ticket_digest": {"queue": TRANSACTIONAL_QUEUE},
+    "registrations.task.send_event_reminders": {"queue": BULK_QUEUE},
+    "events.task.send_broadcast": {"queue": BULK_QUEUE},
+    "registrations.task.send_event_reminder_email": {"queue": BULK_QUEUE},
+    "registrations.task.send_event_reminder_emails": {"queue": BULK_QUEUE},
+}
 
 app.conf.beat_schedule = {
-    "send-event-reminders": {
-        "task": "registrations.task.send_event_reminders",
-        "schedule": crontab(minute="*/15"),
+    "release-expired-ticket-holds": {
+        "task": "registrations.task.release_expired_ticket_holds",
+        "schedule": 30.0,
+    },
+    "admit-from-waiting-rooms": {
+        "task": "events.task.admit_from_waiting_rooms",
+        "schedule": 1.0,
+    },
+    "flush-ticket-digests": {
+        "task": "registrations.task.flush_ticket_digests",
+        "schedule": 60.0,
+    },
+    "flush-registration-checkins": {
+        "task": "registrations.task.flush_registration_checkins",
+        "schedule": 5.0,
+    },
+    # Seeds only the counters a Redis restart lost; live counters are never rewritten from PostgreSQL
+    "sync-ticket-inventory": {
+        "task": "registrations.task.sync_ticket_inventory",
+        "schedule": crontab(minute=0),
     },
 }
 
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "accounts.apps.AccountsConfig",
@@ -106,20 +107,65 @@ CACHES = {
     }
 }
 
+# Seconds a ticket hold keeps its seats before they flow back to inventory
+TICKET_HOLD_TTL = int(os.getenv("TICKET_HOLD_TTL", 600))
+# Seconds an admitted waiting-room user has to register before the admission token expires
+ADMISSION_TOKEN_TTL = int(os.getenv("ADMISSION_TOKEN_TTL", 600))
+# Seconds a list count stays cached; writes to the table invalidate it sooner
+PAGINATION_COUNT_TTL = int(os.getenv("PAGINATION_COUNT_TTL", 60))
+# Unfiltered lists of tables at least this large report the planner's row estimate instead of COUNT(*)
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv("PAGINATION_ESTIMATE_THRESHOLD", 100000))
+# Seconds a rendered event or ticket detail response stays cached; writes invalidate it sooner
+DETAIL_CACHE_TTL = int(os.getenv("DETAIL_CACHE_TTL", 3600))
+# Seconds event name suggestions stay cached per prefix
+AUTOCOMPLETE_CACHE_TTL = int(os.getenv("AUTOCOMPLETE_CACHE_TTL", 30))
+# Seconds before its ETA that the outbox relay publishes a delayed task; kept far below the broker's visibility timeout
+OUTBOX_ETA_HORIZON = int(os.getenv("OUTBOX_ETA_HORIZON", 300))
+# Days published outbox messages are kept for inspection before the outbox relay deletes them
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Jakarta"
 CELERY_ENABLE_UTC = True
-
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# The broker is Redis (redis://host:port/db). A publish returns once Redis has executed the LPUSH, so an outbox
+# row marked published is in the broker; it survives a Redis restart only with appendonly persistence enabled.
+# Workers acknowledge a task when it starts: messages reserved but not started are redelivered after the
+# visibility timeout, a task that crashes mid-run is not. Tasks must therefore tolerate running twice.
+# Delayed tasks wait in the outbox until OUTBOX_ETA_HORIZON before their ETA, so no worker holds one for
+# anywhere near the visibility timeout and Redis never hands a copy to a second worker.
+# A worker consuming several queues drains them in the order given to ``-Q`` (see dico_event/celery.py).
+CELERY_BROKER_TRANSPORT_OPTIONS = {"queue_order_strategy": "priority", "visibility_timeout": 3600}
+# Reserve one message at a time so a bulk burst is never prefetched ahead of transactional mail
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Set to "common.mail.QueuedEmailBackend" to hand mail to the asyncio sender (manage.py run_mail_sender)
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
 EMAIL_HOST = os.getenv("MAIL_HOST")
 EMAIL_PORT = int(os.getenv("MAIL_PORT"))
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("MAIL_USER")
 EMAIL_HOST_PASSWORD = os.getenv("MAIL_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("MAIL_USER", "no-reply@dicoevent.com")
+# Number of messages sent over a single SMTP connection by the batch email tasks
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 100))
+# Batch reminder tasks per bulk worker; SMTP throughput is roughly rate x EMAIL_BATCH_SIZE x bulk workers
+BULK_EMAIL_RATE_LIMIT = os.getenv("BULK_EMAIL_RATE_LIMIT", "30/m")
+# Retry budget of the email tasks; retries back off exponentially with jitter up to the maximum (seconds)
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", 8))
+EMAIL_RETRY_BACKOFF_MAX = int(os.getenv("EMAIL_RETRY_BACKOFF_MAX", 900))
+# Re-drives of a dead letter the SMTP server rejects permanently (5xx, refused recipients) before it is abandoned
+DEAD_LETTER_MAX_ATTEMPTS = int(os.getenv("DEAD_LETTER_MAX_ATTEMPTS", 5))
+# Concurrent SMTP sessions and in-memory buffer of each run_mail_sender process
+MAIL_SENDER_POOL_SIZE = int(os.getenv("MAIL_SENDER_POOL_SIZE", 10))
+MAIL_SENDER_QUEUE_SIZE = int(os.getenv("MAIL_SENDER_QUEUE_SIZE", 100))
+# Seconds a digest-mode user's confirmations are collected before they go out as one email
+EMAIL_DIGEST_WINDOW = int(os.getenv("EMAIL_DIGEST_WINDOW", 600))
+EMAIL_LOCALES = ("id", "en")
+EMAIL_DEFAULT_LOCALE = os.getenv("EMAIL_DEFAULT_LOCALE", "id")
+EMAIL_TIME_ZONE = "Asia/Jakarta"
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from accounts.models import User
+from common.mail import dead_letter_payloads, message_payload, send_each
+from common.outbox import enqueue_task
+from registrations.emails import EVENT_BROADCAST, render_emails
+from registrations.models import Registration
+from .models import Broadcast
+from loguru import logger
+
+SEND_BROADCAST_TASK = "events.task.send_broadcast"
+
+
+def start_broadcast(event, created_by, subject, message):
+    with transaction.atomic():
+        broadcast = Broadcast.objects.create(event=event, created_by=created_by, subject=subject, message=message)
+        enqueue_task(SEND_BROADCAST_TASK, str(broadcast.id))
+    logger.info(f"Broadcast {broadcast.id} queued for event {event.id}")
+    return broadcast
+
+
+def _recipients(event_id):
+    # One row per user however many active registrations they hold on the event's tickets
+    registered = Registration.objects.filter(user=OuterRef("pk"), ticket__event_id=event_id, status="active")
+    return User.objects.filter(Exists(registered)).order_by("id")
+
+
+def iter_broadcast_recipients(event_id, chunk_size, after_user_id=None):
+    """Yield ``(user_id, email, username, locale)`` rows of an event's registrants, ``chunk_size`` at a time.
+
+    Keyset pagination on the user primary key keeps memory flat regardless of attendee count.
+    """
+    recipients = _recipients(event_id)
+    while True:
+        page = recipients.filter(id__gt=after_user_id) if after_user_id else recipients
+        rows = list(page.values_list("id", "email", "username", "locale")[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        after_user_id = rows[-1][0]
+
+
+def run_broadcast(broadcast_id, chunk_size):
+    """Send a broadcast chunk by chunk, recording progress after each chunk.
+
+    Undeliverable messages in a chunk are dead-lettered. A chunk where every message fails raises, so
+    the task retries later and resumes from ``last_user_id``.
+    """
+    broadcast = Broadcast.objects.select_related("event").get(pk=broadcast_id)
+    if broadcast.status == "completed":
+        return broadcast
+    if broadcast.status == "queued":
+        broadcast.status = "sending"
+        broadcast.started_at = timezone.now()
+        broadcast.total_recipients = _recipients(broadcast.event_id).count()
+        broadcast.save(update_fields=["status", "started_at", "total_recipients"])
+
+    event = broadcast.event
+    context = {"event": event, "subject": broadcast.subject, "message": broadcast.message}
+    for rows in iter_broadcast_recipients(event.id, chunk_size, broadcast.last_user_id):
+        messages = render_emails(
+            EVENT_BROADCAST, [(email, {"username": username}, locale) for _, email, username, locale in rows], context
+        )
+        failed, error = send_each(messages)
+        if failed and len(failed) == len(messages):
+            Broadcast.objects.filter(pk=broadcast.pk).update(last_error=str(error))
+            raise error
+        if failed:
+            dead_letter_payloads(SEND_BROADCAST_TASK, [message_payload(messages[index]) for index in failed], error, 1)
+
+        Broadcast.objects.filter(pk=broadcast.pk).update(
+            sent_count=F("sent_count") + len(messages) - len(failed),
+            failed_count=F("failed_count") + len(failed),
+            last_user_id=rows[-1][0],
+            last_error=str(error) if error else "",
+        )
+        logger.info(f"Broadcast {broadcast.pk}: chunk of {len(messages)} sent, {len(failed)} failed")
+
+    Broadcast.objects.filter(pk=broadcast.pk).update(status="completed", completed_at=timezone.now())
+    broadcast.refresh_from_db()
+    logger.info(f"Broadcast {broadcast.pk} completed: {broadcast.sent_count} sent, {broadcast.failed_count} failed")
+    return broadcast
+
+
+def fail_broadcast(broadcast_id, error):
+    Broadcast.objects.filter(pk=broadcast_id).update(status="failed", last_error=str(error))
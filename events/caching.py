@@ -0,0 +1,7 @@
+from common.mixins import invalidate_details
+
+EVENT_DETAIL_KEY = "event_detail_{}"
+
+
+def invalidate_event_details(*event_ids):
+    invalidate_details(EVENT_DETAIL_KEY, event_ids)
@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from common.constants import EVENT_STATUS_CHOICES
+
+EVENT_STATUSES = {value for value, _ in EVENT_STATUS_CHOICES}
+
+# Query-parameter combinations the composite indexes of Event are designed for; see events.tests.EventFilterPlanTests
+FILTER_COMBINATIONS = (
+    ("status",),
+    ("status", "start_time"),
+    ("category",),
+    ("category", "status"),
+    ("category", "start_time"),
+    ("category", "status", "start_time"),
+    ("organizer_id",),
+    ("organizer_id", "status"),
+    ("organizer_id", "start_time"),
+)
+
+
+def _parse_start(value, param, end_of_day=False):
+    """Parse an ISO 8601 datetime or date. A bare date covers the whole day; naive values are in TIME_ZONE."""
+    try:
+        day = parse_date(value)
+        if day is not None:
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+        else:
+            parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({param: "Enter a valid ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_events(queryset, params, user):
+    """Apply the ``status``, ``category``, ``organizer_id`` and ``start_time_after``/``start_time_before``
+    query parameters. ``organizer_id=me`` selects the events organized by ``user``."""
+    filters = {}
+
+    status = params.get("status")
+    if status:
+        if status not in EVENT_STATUSES:
+            raise ValidationError({"status": f"Must be one of: {', '.join(sorted(EVENT_STATUSES))}."})
+        filters["status"] = status
+
+    category = params.get("category")
+    if category:
+        filters["category"] = category
+
+    organizer_id = params.get("organizer_id")
+    if organizer_id:
+        if organizer_id == "me":
+            filters["organizer_id"] = user.id
+        else:
+            try:
+                filters["organizer_id"] = uuid.UUID(organizer_id)
+            except ValueError:
+                raise ValidationError({"organizer_id": "Must be a valid UUID or 'me'."})
+
+    start_after = params.get("start_time_after")
+    if start_after:
+        filters["start_time__gte"] = _parse_start(start_after, "start_time_after")
+    start_before = params.get("start_time_before")
+    if start_before:
+        filters["start_time__lte"] = _parse_start(start_before, "start_time_before", end_of_day=True)
+    if start_after and start_before and filters["start_time__gte"] > filters["start_time__lte"]:
+        raise ValidationError({"start_time_before": "Must not be earlier than start_time_after."})
+
+    return queryset.filter(**filters) if filters else queryset
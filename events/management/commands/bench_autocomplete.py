@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from events.models import Event
+from events.search import AUTOCOMPLETE_KEY, MIN_AUTOCOMPLETE_LENGTH, normalize_prefix
+from events.views import EventViewSet
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure autocomplete latency through the full view stack (JWT authentication included) "
+        "with prefixes typed from existing event names. Read-only apart from the suggestion cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="Timed autocomplete requests")
+        parser.add_argument("--names", type=int, default=200, help="Event names the prefixes are typed from")
+        parser.add_argument("--cold", action="store_true", help="Drop cached suggestions before each request")
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by("created_at").first()
+        if user is None:
+            raise CommandError("The benchmark needs at least one user to mint an access token for.")
+        names = list(Event.objects.order_by("?").values_list("name", flat=True)[: options["names"]])
+        if not names:
+            raise CommandError("The benchmark needs events to type prefixes from.")
+
+        # Every keystroke from the third character on, as a user typing each name would send them
+        prefixes = [
+            name[:length] for name in names for length in range(MIN_AUTOCOMPLETE_LENGTH, min(len(name), 12) + 1)
+        ]
+        factory = APIRequestFactory()
+        authorization = f"Bearer {AccessToken.for_user(user)}"
+        view = EventViewSet.as_view({"get": "autocomplete"})
+
+        timings = []
+        for _ in range(options["requests"]):
+            prefix = random.choice(prefixes)
+            if options["cold"]:
+                cache.delete(AUTOCOMPLETE_KEY.format(10, normalize_prefix(prefix)))
+            request = factory.get("/api/events/autocomplete/", {"q": prefix}, HTTP_AUTHORIZATION=authorization)
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"Autocomplete returned {response.status_code}: {response.content[:200]}")
+
+        ordered = sorted(timings)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+        rate = len(ordered) / sum(ordered)
+        line = (
+            f"{'cold' if options['cold'] else 'warm'} autocomplete over {len(prefixes)} prefixes: "
+            f"p50={p50 * 1000:.2f}ms p99={p99 * 1000:.2f}ms, {rate:.0f} requests/s per process"
+        )
+        logger.info(line)
+        self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,135 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from events.models import Event
+from events.search import search_events
+from loguru import logger
+
+# Filler vocabulary for the seeded rows; none of it matches NEEDLES, in English or Indonesian stemming
+FILLER = (
+    "festival seni budaya pameran lokakarya seminar pertunjukan teater tari pasar malam kuliner "
+    "workshop meetup summit conference expo gathering marathon tournament exhibition screening"
+).split()
+CITIES = ("Jakarta", "Bandung", "Surabaya", "Yogyakarta", "Denpasar", "Medan", "Makassar", "Semarang")
+# Every size step holds exactly NEEDLE_ROWS rows per needle, so the match set stays constant while the table grows
+NEEDLES = ("konser jazz", "hackathon", "pendakian gunung", "photography")
+NEEDLE_ROWS = 50
+
+SEED_SQL = """
+INSERT INTO events (
+    id, name, description, location, start_time, end_time, status, quota, sold,
+    reminder_offsets, category, organizer_id, created_at, updated_at
+)
+SELECT
+    gen_random_uuid(),
+    (%(filler)s)[1 + (g %% %(filler_len)s)] || ' ' || (%(filler)s)[1 + ((g / 7) %% %(filler_len)s)] || ' ' || g,
+    (%(filler)s)[1 + ((g / 3) %% %(filler_len)s)] || ' ' || (%(filler)s)[1 + ((g / 11) %% %(filler_len)s)],
+    (%(cities)s)[1 + (g %% %(cities_len)s)],
+    now() + make_interval(days => g %% 365),
+    now() + make_interval(days => g %% 365, hours => 3),
+    'scheduled', 100, 0, '[120]'::jsonb,
+    (%(filler)s)[1 + ((g / 5) %% %(filler_len)s)],
+    %(organizer)s, now(), now()
+FROM generate_series(%(start)s, %(stop)s) AS g
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure event search latency on a seeded events table as it grows, by default up to one million rows. "
+        "Everything runs in one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10000,100000,1000000",
+            help="Comma-separated table sizes at which latency is measured",
+        )
+        parser.add_argument("--queries", type=int, default=50, help="Timed searches per needle and size")
+        parser.add_argument("--page-size", type=int, default=10, help="Results fetched per search")
+
+    def _seed(self, organizer_id, start, stop):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SEED_SQL,
+                {
+                    "filler": list(FILLER),
+                    "filler_len": len(FILLER),
+                    "cities": list(CITIES),
+                    "cities_len": len(CITIES),
+                    "organizer": organizer_id,
+                    "start": start,
+                    "stop": stop,
+                },
+            )
+
+    def _seed_needles(self, organizer):
+        now = timezone.now()
+        Event.objects.bulk_create(
+            [
+                Event(
+                    name=f"{needle} {i}",
+                    description=f"{needle} bersama komunitas",
+                    location=CITIES[i % len(CITIES)],
+                    start_time=now,
+                    end_time=now,
+                    status="scheduled",
+                    quota=100,
+                    category=FILLER[i % len(FILLER)],
+                    organizer=organizer,
+                )
+                for needle in NEEDLES
+                for i in range(NEEDLE_ROWS)
+            ]
+        )
+
+    def _measure(self, needle, queries, page_size):
+        timings = []
+        for _ in range(queries):
+            started = time.perf_counter()
+            rows = list(
+                search_events(Event.objects.defer("search_vector"), needle).order_by("-rank", "-id")[:page_size]
+            )
+            timings.append(time.perf_counter() - started)
+        if not rows:
+            raise RuntimeError(f"Search for {needle!r} matched nothing; is migration events 0008 applied?")
+        ordered = sorted(timings)
+        return statistics.median(ordered), ordered[max(0, int(len(ordered) * 0.95) - 1)]
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        latencies = {}
+        with transaction.atomic():
+            organizer = User.objects.create(username="search-bench", email="search-bench@example.com")
+            self._seed_needles(organizer)
+            seeded = len(NEEDLES) * NEEDLE_ROWS
+            for size in sizes:
+                if size > seeded:
+                    started = time.perf_counter()
+                    self._seed(organizer.id, seeded + 1, size)
+                    self.stdout.write(f"Seeded {size - seeded} events in {time.perf_counter() - started:.1f}s")
+                    seeded = size
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE events")
+                for needle in NEEDLES:
+                    p50, p95 = self._measure(needle, options["queries"], options["page_size"])
+                    latencies.setdefault(seeded, []).append(p50)
+                    line = f"{seeded:>9} events  q={needle!r:<20} p50={p50 * 1000:.2f}ms p95={p95 * 1000:.2f}ms"
+                    logger.info(f"Event search benchmark: {line}")
+                    self.stdout.write(line)
+            transaction.set_rollback(True)
+
+        smallest, largest = min(latencies), max(latencies)
+        small, large = statistics.median(latencies[smallest]), statistics.median(latencies[largest])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Table grew {largest / smallest:.0f}x, median search latency grew {large / small:.2f}x "
+                f"({small * 1000:.2f}ms -> {large * 1000:.2f}ms)"
+            )
+        )
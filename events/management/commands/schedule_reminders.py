@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event
+from events.reminders import schedule_event_reminders
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = "(Re)create the reminder jobs of every upcoming scheduled event."
+
+    def handle(self, *args, **options):
+        events = Event.objects.filter(status="scheduled", start_time__gt=timezone.now()).order_by("start_time")
+        jobs = 0
+        for event in events.iterator(chunk_size=500):
+            with transaction.atomic():
+                jobs += len(schedule_event_reminders(event))
+
+        logger.info(f"Scheduled {jobs} reminder jobs for upcoming events")
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {jobs} reminder jobs for upcoming events"))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0002_eventposter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="sold",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="admission_rate",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
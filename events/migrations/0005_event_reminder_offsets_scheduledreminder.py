@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-18 02:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import events.models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0004_event_admission_rate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="reminder_offsets",
+            field=models.JSONField(default=events.models.default_reminder_offsets),
+        ),
+        migrations.CreateModel(
+            name="ScheduledReminder",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("offset_minutes", models.PositiveIntegerField()),
+                ("task_id", models.CharField(max_length=255, unique=True)),
+                ("eta", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scheduled_reminders",
+                        to="events.event",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "scheduled_reminders",
+            },
+        ),
+    ]
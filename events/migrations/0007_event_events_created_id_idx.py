@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0006_broadcast"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["created_at", "id"], name="events_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-18 03:07
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Indonesian stemming needs PostgreSQL 12 or newer. Keep in sync with events.search.SEARCH_CONFIGS.
+CREATE_TRIGGER = """
+CREATE FUNCTION events_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('indonesian', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B')
+        || setweight(to_tsvector('indonesian', coalesce(NEW.category, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(NEW.location, '')), 'C')
+        || setweight(to_tsvector('indonesian', coalesce(NEW.location, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D')
+        || setweight(to_tsvector('indonesian', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER events_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, category, location, description, search_vector ON events
+    FOR EACH ROW EXECUTE FUNCTION events_search_vector_update();
+
+UPDATE events SET name = name;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS events_search_vector_trigger ON events;
+DROP FUNCTION IF EXISTS events_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0007_event_events_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # Backfill before the index exists so it is built once instead of updated per row
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name="event",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="events_search_vector_idx"
+            ),
+        ),
+    ]
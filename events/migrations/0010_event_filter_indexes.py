@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0009_event_name_trigram"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["status", "start_time"], name="events_status_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["category", "status", "start_time"],
+                name="events_cat_status_start_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["organizer", "start_time"], name="events_organizer_start_idx"
+            ),
+        ),
+    ]
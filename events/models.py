@@ -1,10 +1,17 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 import uuid
 
 from rest_framework.fields import MinValueValidator
 
 from accounts.models import User
-from common.constants import EVENT_STATUS_CHOICES
+from common.constants import BROADCAST_STATUS_CHOICES, EVENT_STATUS_CHOICES
+
+
+def default_reminder_offsets():
+    return [120]
 
 
 class Event(models.Model):
@@ -16,16 +23,35 @@ class Event(models.Model):
     end_time = models.DateTimeField()
     status = models.CharField(max_length=50, choices=EVENT_STATUS_CHOICES)
     quota = models.IntegerField(validators=[MinValueValidator(1)])
+    sold = models.IntegerField(default=0)
+    # Users admitted per second from the waiting room; empty disables the waiting room
+    admission_rate = models.PositiveIntegerField(null=True, blank=True)
+    # Minutes before start_time at which attendees get a reminder email
+    reminder_offsets = models.JSONField(default=default_reminder_offsets)
     category = models.CharField(max_length=50)
     organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="organized_events")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted English + Indonesian tsvector of name, category, location and description.
+    # Maintained by the events_search_vector_trigger database trigger (migration 0008), never written by Django.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.name
 
     class Meta:
         db_table = "events"
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=["created_at", "id"], name="events_created_id_idx"),
+            # List filters (events.filters.FILTER_COMBINATIONS); equality columns first, start_time range last
+            models.Index(fields=["status", "start_time"], name="events_status_start_idx"),
+            models.Index(fields=["category", "status", "start_time"], name="events_cat_status_start_idx"),
+            models.Index(fields=["organizer", "start_time"], name="events_organizer_start_idx"),
+            GinIndex(fields=["search_vector"], name="events_search_vector_idx"),
+            # Autocomplete: the UPPER(name) LIKE UPPER(...) of name__icontains and the typo-tolerant UPPER(name) %> ...
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="events_name_trgm_idx"),
+        ]
 
 
 class EventPoster(models.Model):
@@ -38,3 +64,42 @@ class EventPoster(models.Model):
 
     class Meta:
         db_table = "event_posters"
+
+
+class ScheduledReminder(models.Model):
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="scheduled_reminders")
+    offset_minutes = models.PositiveIntegerField()
+    task_id = models.CharField(max_length=255, unique=True)
+    eta = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event.name} - {self.offset_minutes}m"
+
+    class Meta:
+        db_table = "scheduled_reminders"
+
+
+class Broadcast(models.Model):
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="broadcasts")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="broadcasts")
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=BROADCAST_STATUS_CHOICES, default="queued")
+    total_recipients = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    # Keyset cursor: a restarted job resumes after the last recipient it handled
+    last_user_id = models.UUIDField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event.name} - {self.subject}"
+
+    class Meta:
+        db_table = "broadcasts"
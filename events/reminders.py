@@ -0,0 +1,57 @@
+import uuid
+from datetime import timedelta
+
+from celery import current_app
+from django.db import transaction
+from django.utils import timezone
+
+from common.models import OutboxMessage
+from common.outbox import enqueue_task
+from .models import ScheduledReminder
+from loguru import logger
+
+SEND_EVENT_REMINDERS_TASK = "registrations.task.send_event_reminders"
+
+
+def _revoke(task_ids):
+    try:
+        current_app.control.revoke(task_ids)
+    except Exception as e:
+        # The task re-checks its ScheduledReminder row before sending, so a missed revoke is harmless
+        logger.warning(f"Could not revoke reminder tasks {task_ids}: {e}")
+
+
+def cancel_event_reminders(event_id):
+    """Drop the pending reminder jobs of an event. Must be called inside ``transaction.atomic()``."""
+    pending = ScheduledReminder.objects.filter(event_id=event_id)
+    task_ids = list(pending.values_list("task_id", flat=True))
+    if not task_ids:
+        return
+    pending.delete()
+    # Jobs not yet within OUTBOX_ETA_HORIZON of their ETA are still in the outbox and never reach a worker
+    OutboxMessage.objects.filter(task_id__in=task_ids, published_at__isnull=True).delete()
+    transaction.on_commit(lambda: _revoke(task_ids))
+    logger.info(f"Cancelled {len(task_ids)} pending reminder job(s) for event {event_id}")
+
+
+def schedule_event_reminders(event):
+    """Replace the reminder jobs of an event with one ETA task per configured offset.
+
+    Must be called inside ``transaction.atomic()``; the jobs are published through the outbox.
+    """
+    cancel_event_reminders(event.id)
+    if event.status != "scheduled":
+        return []
+
+    now = timezone.now()
+    scheduled = []
+    for offset in sorted(set(event.reminder_offsets), reverse=True):
+        eta = event.start_time - timedelta(minutes=offset)
+        if eta <= now:
+            continue
+        task_id = str(uuid.uuid4())
+        scheduled.append(ScheduledReminder.objects.create(event=event, offset_minutes=offset, task_id=task_id, eta=eta))
+        enqueue_task(SEND_EVENT_REMINDERS_TASK, str(event.id), offset, eta=eta, task_id=task_id)
+
+    logger.info(f"Scheduled {len(scheduled)} reminder job(s) for event {event.id}")
+    return scheduled
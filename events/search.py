@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.core.cache import cache
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, Upper
+
+from .models import Event
+
+# Text search configurations the search vector is built with; a query matches if either stemmer matches
+SEARCH_CONFIGS = ("english", "indonesian")
+MAX_QUERY_LENGTH = 200
+
+AUTOCOMPLETE_KEY = "autocomplete:{}:{}"
+# Trigram indexes cannot narrow down shorter prefixes, so those would scan the whole index
+MIN_AUTOCOMPLETE_LENGTH = 3
+MAX_AUTOCOMPLETE_LENGTH = 50
+MAX_AUTOCOMPLETE_LIMIT = 20
+
+
+def build_search_query(terms):
+    """``websearch_to_tsquery`` of ``terms`` under every configuration, OR-ed together."""
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(terms, search_type="websearch", config=config)
+        query = part if query is None else query | part
+    return query
+
+
+def search_events(queryset, terms):
+    """Events matching ``terms``, annotated with their ``rank``. The match runs on the GIN index."""
+    query = build_search_query(terms)
+    # ts_rank() returns real; as double precision the rank survives the round trip through a cursor exactly
+    rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+    return queryset.filter(search_vector=query).annotate(rank=rank)
+
+
+def normalize_prefix(prefix):
+    return " ".join(prefix.lower().split())[:MAX_AUTOCOMPLETE_LENGTH]
+
+
+def _suggestions(queryset, limit):
+    return [{"id": str(event_id), "name": name} for event_id, name in queryset.values_list("id", "name")[:limit]]
+
+
+def autocomplete_events(prefix, limit=10):
+    """Up to ``limit`` ``{"id", "name"}`` suggestions for events whose name contains ``prefix``, tolerating typos.
+
+    Exact substring matches come first, from an ``ILIKE`` on the ``pg_trgm`` GIN index of
+    ``UPPER(events.name)``. If there are fewer than ``limit`` of them, the rest are names whose best
+    matching word is trigram-similar to ``prefix`` (the ``%>`` operator, which uses the same index),
+    most similar first. Word similarity rather than whole-name similarity, because a short prefix is
+    never similar to a long name. Suggestions are cached per normalized prefix for
+    ``AUTOCOMPLETE_CACHE_TTL`` seconds, so popular prefixes are served from Redis and new or renamed
+    events show up once the entry expires.
+    """
+    prefix = normalize_prefix(prefix)
+    if len(prefix) < MIN_AUTOCOMPLETE_LENGTH:
+        return []
+    key = AUTOCOMPLETE_KEY.format(limit, prefix)
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = _suggestions(Event.objects.filter(name__icontains=prefix).order_by("name", "id"), limit)
+        if len(suggestions) < limit:
+            similar = (
+                Event.objects.alias(upper_name=Upper("name"))
+                .filter(upper_name__trigram_word_similar=prefix.upper())
+                .exclude(id__in=[suggestion["id"] for suggestion in suggestions])
+                .annotate(similarity=TrigramWordSimilarity(prefix.upper(), "upper_name"))
+                .order_by("-similarity", "name", "id")
+            )
+            suggestions += _suggestions(similar, limit - len(suggestions))
+        cache.set(key, suggestions, timeout=settings.AUTOCOMPLETE_CACHE_TTL)
+    return suggestions
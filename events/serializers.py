@@ -1,11 +1,14 @@
 import os
 import tempfile
-from django.core.cache import cache
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from accounts.models import User
-from .models import Event, EventPoster
+from .broadcasts import start_broadcast
+from .models import Broadcast, Event, EventPoster
+from .reminders import schedule_event_reminders
+from .waitingroom import sync_admission_rate
 
 from minio import Minio
 from loguru import logger
@@ -119,7 +122,7 @@ class EventSerializer(serializers.ModelSerializer):
     end_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
     organizer_id = serializers.UUIDField(write_only=True)
     organizer = serializers.SerializerMethodField(read_only=True)
-    CACHE_KEY_DETAIL = "event_detail_{}"
+    remaining = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Event
@@ -132,13 +135,20 @@ class EventSerializer(serializers.ModelSerializer):
             "end_time",
             "status",
             "quota",
+            "sold",
+            "remaining",
             "category",
+            "admission_rate",
+            "reminder_offsets",
             "organizer_id",
             "organizer",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at", "organizer"]
+        read_only_fields = ["id", "sold", "created_at", "updated_at", "organizer"]
+
+    def get_remaining(self, obj):
+        return max(obj.quota - obj.sold, 0)
 
     def get_organizer(self, obj):
         return {
@@ -147,12 +157,22 @@ class EventSerializer(serializers.ModelSerializer):
             "email": obj.organizer.email,
         }
 
+    def validate_reminder_offsets(self, value):
+        if not isinstance(value, list) or len(value) > 5:
+            raise serializers.ValidationError("Reminder offsets must be a list of at most 5 values.")
+        if any(not isinstance(offset, int) or isinstance(offset, bool) or not 1 <= offset <= 10080 for offset in value):
+            raise serializers.ValidationError("Each reminder offset must be a number of minutes between 1 and 10080.")
+        return value
+
     def create(self, validated_data):
         event_name = validated_data.get("name")
         organizer_id = validated_data.get("organizer_id")
         logger.info(f"Creating Event: name={event_name}, organizer_id={organizer_id}")
         try:
-            event = Event.objects.create(**validated_data)
+            with transaction.atomic():
+                event = Event.objects.create(**validated_data)
+                schedule_event_reminders(event)
+            sync_admission_rate(event)
             logger.info(f"Event created successfully: {event.id}, name={event_name}")
             return event
         except Exception as e:
@@ -165,13 +185,70 @@ class EventSerializer(serializers.ModelSerializer):
         try:
             if "organizer_id" in validated_data:
                 get_object_or_404(User, pk=validated_data["organizer_id"])
+            reschedule = any(
+                field in validated_data and validated_data[field] != getattr(instance, field)
+                for field in ("start_time", "status", "reminder_offsets")
+            )
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
-            instance.save()
-            cache_key = self.CACHE_KEY_DETAIL.format(instance.id)
-            cache.delete(cache_key)
-            logger.info(f"Event updated successfully: {event_id}, cache invalidated")
+            with transaction.atomic():
+                instance.save()
+                if reschedule:
+                    schedule_event_reminders(instance)
+            sync_admission_rate(instance)
+            logger.info(f"Event updated successfully: {event_id}")
             return instance
         except Exception as e:
             logger.error(f"Error updating Event {event_id}: {e}", exc_info=True)
             raise
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    event_id = serializers.UUIDField(read_only=True)
+    progress = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Broadcast
+        fields = [
+            "id",
+            "event_id",
+            "subject",
+            "message",
+            "status",
+            "total_recipients",
+            "sent_count",
+            "failed_count",
+            "progress",
+            "last_error",
+            "created_at",
+            "started_at",
+            "completed_at",
+        ]
+        read_only_fields = [
+            "id",
+            "status",
+            "total_recipients",
+            "sent_count",
+            "failed_count",
+            "last_error",
+            "created_at",
+            "started_at",
+            "completed_at",
+        ]
+
+    def get_progress(self, obj):
+        if obj.status == "completed":
+            return 100
+        if not obj.total_recipients:
+            return 0
+        return min(100, round((obj.sent_count + obj.failed_count) * 100 / obj.total_recipients))
+
+    def create(self, validated_data):
+        event = self.context["event"]
+        user = self.context["request"].user
+        logger.info(f"Creating broadcast for event {event.id} by user {user.id}")
+        try:
+            return start_broadcast(event, user, validated_data["subject"], validated_data["message"])
+        except Exception as e:
+            logger.error(f"Error creating broadcast for event {event.id}: {e}", exc_info=True)
+            raise
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from common.permissions import invalidate_checkin_event
+from .caching import invalidate_event_details
+from .models import Event
+
+# Organizer fields embedded in the event detail response
+ORGANIZER_FIELDS = {"username", "email"}
+
+
+@receiver([post_save, post_delete], sender=Event, dispatch_uid="event_detail_cache")
+def invalidate_event_detail(sender, instance, **kwargs):
+    invalidate_event_details(instance.pk)
+    invalidate_checkin_event(instance.pk)
+
+
+@receiver(post_save, sender=User, dispatch_uid="event_detail_cache_organizer")
+def invalidate_organized_event_details(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not ORGANIZER_FIELDS & set(update_fields)):
+        return
+    invalidate_event_details(*Event.objects.filter(organizer=instance).values_list("id", flat=True))
@@ -0,0 +1,38 @@
+from celery import shared_task
+from django.conf import settings
+
+from common.mail import DELIVERY_ERRORS, EMAIL_TASK_OPTIONS
+from events.broadcasts import fail_broadcast, run_broadcast
+from events.waitingroom import admit_waiting_users
+from loguru import logger
+
+
+@shared_task(ignore_result=True)
+def admit_from_waiting_rooms():
+    try:
+        admitted = admit_waiting_users()
+        if admitted:
+            logger.info(f"Admitted {admitted} users from waiting rooms")
+        return admitted
+    except Exception as e:
+        logger.error(f"Error in admit_from_waiting_rooms task: {e}", exc_info=True)
+        raise
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+def send_broadcast(self, broadcast_id):
+    logger.info(f"Starting send_broadcast task: broadcast_id={broadcast_id}, retry={self.request.retries}")
+
+    try:
+        broadcast = run_broadcast(broadcast_id, settings.EMAIL_BATCH_SIZE)
+        return f"Broadcast {broadcast_id}: {broadcast.sent_count} sent, {broadcast.failed_count} failed"
+    except DELIVERY_ERRORS as e:
+        # Retried with backoff and resumed from the last finished chunk until the budget runs out
+        if self.request.retries >= self.max_retries:
+            fail_broadcast(broadcast_id, e)
+        logger.warning(f"Broadcast {broadcast_id} interrupted by a delivery error: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error in send_broadcast task for broadcast {broadcast_id}: {e}", exc_info=True)
+        fail_broadcast(broadcast_id, e)
+        raise
@@ -1,3 +1,198 @@
+import json
+import random
+import unittest
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from common.redis_client import get_redis_client
+from .caching import EVENT_DETAIL_KEY
+from .filters import FILTER_COMBINATIONS, filter_events
+from .models import Event
+from .views import EventViewSet
+from .waitingroom import ADMITTED_KEY, QUEUE_KEY, RATES_KEY, admit_waiting_users, get_queue_status, join_queue
+
+
+def _scans(plan):
+    """``(node type, relation, index)`` of every scan node in an ``EXPLAIN (FORMAT JSON)`` plan tree."""
+    scans = []
+    if "Relation Name" in plan or "Index Name" in plan:
+        scans.append((plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        scans.extend(_scans(child))
+    return scans
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Query plans are only checked against PostgreSQL")
+class EventFilterPlanTests(TestCase):
+    """Query-plan regression test: every supported filter combination of the event list must be read
+    through the index expected for it, normally the composite index designed for it.
+
+    The table is filled so that each filter is selective, as on a production-sized database, and then
+    analyzed. Planner settings are left alone, so a sequential scan or the wrong index fails the test.
+    """
+
+    expected_indexes = {
+        # A lone status matches too many rows to beat walking the list order until the page is full
+        ("status",): "events_created_id_idx",
+        ("status", "start_time"): "events_status_start_idx",
+        ("category",): "events_cat_status_start_idx",
+        ("category", "status"): "events_cat_status_start_idx",
+        ("category", "start_time"): "events_cat_status_start_idx",
+        ("category", "status", "start_time"): "events_cat_status_start_idx",
+        ("organizer_id",): "events_organizer_start_idx",
+        ("organizer_id", "status"): "events_organizer_start_idx",
+        ("organizer_id", "start_time"): "events_organizer_start_idx",
+    }
+    events = 20000
+    organizers = 200
+    categories = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        cls.start = timezone.now()
+        organizers = User.objects.bulk_create(
+            [User(username=f"organizer{i}", email=f"organizer{i}@example.com") for i in range(cls.organizers)]
+        )
+        Event.objects.bulk_create(
+            [
+                Event(
+                    name=f"Event {i}",
+                    description="",
+                    location="Jakarta",
+                    # One event every 72 minutes, about 1000 days in all
+                    start_time=cls.start + timedelta(minutes=72 * i),
+                    end_time=cls.start + timedelta(minutes=72 * i + 180),
+                    # Most events of a long-running platform are over
+                    status=rng.choices(("scheduled", "completed", "cancelled"), weights=(5, 90, 5))[0],
+                    quota=100,
+                    category=f"category{rng.randrange(cls.categories)}",
+                    organizer=rng.choice(organizers),
+                )
+                for i in range(cls.events)
+            ],
+            batch_size=2000,
+        )
+        Event.objects.update(created_at=F("start_time") - timedelta(days=30))
+        cls.organizer = organizers[0]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE events")
+
+    def _params(self, combination):
+        values = {
+            "status": {"status": "scheduled"},
+            "category": {"category": "category0"},
+            "organizer_id": {"organizer_id": str(self.organizer.id)},
+            "start_time": {
+                "start_time_after": (self.start + timedelta(days=500)).isoformat(),
+                "start_time_before": (self.start + timedelta(days=507)).isoformat(),
+            },
+        }
+        params = QueryDict(mutable=True)
+        for name in combination:
+            params.update(values[name])
+        return params
+
+    def _explain(self, combination):
+        # The first page of the default (page-number) list
+        queryset = filter_events(EventViewSet.queryset, self._params(combination), user=None)[:10]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _scans(plan[0]["Plan"])
+
+    def test_every_combination_has_an_expected_index(self):
+        self.assertEqual(set(self.expected_indexes), set(FILTER_COMBINATIONS))
+
+    def test_filter_combinations_use_their_composite_index(self):
+        for combination in FILTER_COMBINATIONS:
+            with self.subTest(filters=" + ".join(combination)):
+                scans = self._explain(combination)
+                self.assertNotIn(("Seq Scan", "events", None), scans)
+                self.assertIn(self.expected_indexes[combination], [index for _, _, index in scans], scans)
+
+
+class WaitingRoomTests(TestCase):
+    def setUp(self):
+        self.event_id = "11111111-1111-1111-1111-111111111111"
+        self.user_id = "22222222-2222-2222-2222-222222222222"
+        client = get_redis_client()
+        self.addCleanup(
+            client.delete, QUEUE_KEY.format(self.event_id), ADMITTED_KEY.format(self.event_id, self.user_id)
+        )
+
+    def test_status_polls_return_the_token_issued_on_admission(self):
+        self.assertFalse(join_queue(self.event_id, self.user_id)["admitted"])
+        client = get_redis_client()
+        client.hset(RATES_KEY, self.event_id, 1)
+        self.addCleanup(client.hdel, RATES_KEY, self.event_id)
+        admit_waiting_users()
+
+        first = get_queue_status(self.event_id, self.user_id)
+        self.assertTrue(first["admitted"])
+        self.assertEqual(get_queue_status(self.event_id, self.user_id)["token"], first["token"])
+
+        # Once the admission expires, polling no longer yields a token
+        client.delete(ADMITTED_KEY.format(self.event_id, self.user_id))
+        self.assertIsNone(get_queue_status(self.event_id, self.user_id))
+
+
+class EventConditionalGetTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.organizer = User.objects.create(username="organizer", email="organizer@example.com")
+        self.event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=self.organizer,
+        )
+        self.addCleanup(cache.delete, EVENT_DETAIL_KEY.format(self.event.id))
+        self.api = APIClient()
+        self.api.force_authenticate(self.organizer)
+
+    def _get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.api.get(f"/api/events/{self.event.id}/", HTTP_ACCEPT="application/json", **headers)
+
+    def test_unchanged_event_is_not_modified_without_queries(self):
+        etag = self._get()["ETag"]
+        with self.assertNumQueries(0):
+            response = self._get(etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_reject_the_stale_etag(self):
+        etag = self._get()["ETag"]
+        self.assertEqual(self._get(etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.name = "Konser Jazz Malam"
+            self.event.save()
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        etag = response["ETag"]
 
-# Create your tests here.
+        # The embedded organizer counts as well
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organizer.username = "organizer-baru"
+            self.organizer.save()
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("organizer-baru", response.content.decode())
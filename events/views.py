@@ -1,17 +1,26 @@
 import os
 from minio import Minio
 from rest_framework import viewsets, status
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from accounts.models import User
 from .models import Event, EventPoster
 from rest_framework.decorators import action
-from .serializers import EventPosterSerializer, EventSerializer
-from common.permissions import IsSuperUserOrAdminOrOrganizer
+from .serializers import BroadcastSerializer, EventPosterSerializer, EventSerializer
+from common.mixins import CachedDetailMixin, ConditionalGetMixin
+from common.pagination import EnvelopePagination
+from common.permissions import IsEventManager, IsSuperUserOrAdminOrOrganizer
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.core.cache import cache
+from django.db import transaction
 from loguru import logger
-from rest_framework.exceptions import NotFound
+from django.db.models import FloatField
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from .caching import EVENT_DETAIL_KEY
+from .filters import filter_events
+from .reminders import cancel_event_reminders
+from .search import MAX_AUTOCOMPLETE_LIMIT, MAX_QUERY_LENGTH, autocomplete_events, search_events
+from .waitingroom import get_admission_rate, get_queue_depth, get_queue_status, join_queue, remove_admission_rate
 
 
 def get_minio_client():
@@ -29,43 +38,19 @@ def get_minio_client():
         raise
 
 
-class EventsPagination(PageNumberPagination):
-    page_size = 10
+class EventsPagination(EnvelopePagination):
     page_size_query_param = "page_size"
     max_page_size = 100
+    results_key = "events"
 
-    def get_paginated_response(self, data):
-        return Response(
-            {
-                "count": self.page.paginator.count,
-                "next": self.get_next_link(),
-                "previous": self.get_previous_link(),
-                "events": data,
-            }
-        )
-
-    def paginate_queryset(self, queryset, request, view=None):
+    def paginate_page_number(self, queryset, request, view=None):
         page_size = self.get_page_size(request)
         if not page_size:
             return None
 
+        # get_page() clamps invalid and out-of-range page numbers to the first or last page
         paginator = self.django_paginator_class(queryset, page_size)
-        page_number = request.query_params.get(self.page_query_param, 1)
-
-        try:
-            page_number = int(page_number)
-            if page_number < 1:
-                page_number = 1
-        except (TypeError, ValueError):
-            page_number = 1
-
-        try:
-            self.page = paginator.page(page_number)
-        except Exception:
-            if paginator.num_pages > 0:
-                self.page = paginator.page(paginator.num_pages)
-            else:
-                self.page = paginator.page(1)
+        self.page = paginator.get_page(self.get_page_number(request, paginator))
 
         if paginator.num_pages > 1 and self.template is not None:
             self.display_page_controls = True
@@ -74,11 +59,27 @@ class EventsPagination(PageNumberPagination):
         return list(self.page)
 
 
-class EventViewSet(viewsets.ModelViewSet):
-    queryset = Event.objects.select_related("organizer").all().order_by("-created_at")
+class EventSearchPagination(EventsPagination):
+    cursor_only = True
+    cursor_ordering = ("-rank", "-id")
+    cursor_fields = {"rank": FloatField()}
+
+
+class EventViewSet(ConditionalGetMixin, CachedDetailMixin, viewsets.ModelViewSet):
+    queryset = Event.objects.select_related("organizer").defer("search_vector").order_by("-created_at")
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated, IsSuperUserOrAdminOrOrganizer]
     pagination_class = EventsPagination
+    detail_cache_key = EVENT_DETAIL_KEY
+    object_permission_fields = ("organizer_id",)
+    conditional_list_models = (User,)
+    conditional_related_timestamps = ("organizer__updated_at",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "search"):
+            queryset = filter_events(queryset, self.request.query_params, self.request.user)
+        return queryset
 
     def list(self, request, *args, **kwargs):
         logger.info(f"Event list requested by user: {request.user.username}")
@@ -86,7 +87,13 @@ class EventViewSet(viewsets.ModelViewSet):
             response = super().list(request, *args, **kwargs)
             logger.info(f"Event list retrieved successfully. Count: {response.data.get('count', 0)}")
             return response
+        except ValidationError as e:
+            logger.warning(f"Invalid event list filters {dict(request.query_params)}: {e.detail}")
+            raise
         except NotFound as e:
+            if self.paginator.cursor_mode:
+                logger.warning(f"Invalid cursor requested: {request.query_params.get('cursor')}")
+                raise
             # Handle invalid page number
             logger.warning(f"Invalid page requested: {request.query_params.get('page', 'not provided')}")
             # Return first page instead of error
@@ -106,24 +113,9 @@ class EventViewSet(viewsets.ModelViewSet):
         event_id = kwargs.get("pk")
         logger.info(f"Event retrieve requested by user: {request.user.username}, event_id: {event_id}")
         try:
-            instance = self.get_object()
-            cache_key = EventSerializer.CACHE_KEY_DETAIL.format(instance.id)
-
-            cached_event = cache.get(cache_key)
-
-            if cached_event:
-                serializer = self.get_serializer(cached_event)
-                response = Response(serializer.data, status=status.HTTP_200_OK)
-                response["X-Data-Source"] = "cache"
-                logger.info(f"Event {event_id} retrieved from cache")
-                return response
-            else:
-                serializer = self.get_serializer(instance)
-                response = Response(serializer.data, status=status.HTTP_200_OK)
-                response["X-Data-Source"] = "database"
-                cache.set(cache_key, instance, timeout=3600)
-                logger.info(f"Event {event_id} retrieved from database and cached")
-                return response
+            response = super().retrieve(request, *args, **kwargs)
+            logger.info(f"Event {event_id} retrieved from {response.get('X-Data-Source', 'database')}")
+            return response
         except Exception as e:
             logger.error(f"Error retrieving event {event_id}: {e}", exc_info=True)
             raise
@@ -143,28 +135,71 @@ class EventViewSet(viewsets.ModelViewSet):
         logger.info(f"Event update requested by user: {request.user.username}, event_id: {event_id}")
         try:
             response = super().update(request, *args, **kwargs)
-            cache_key = self.serializer_class.CACHE_KEY_DETAIL.format(event_id)
-            cache.delete(cache_key)
-            logger.info(f"Event updated successfully: {event_id}, cache invalidated")
+            logger.info(f"Event updated successfully: {event_id}")
             return response
         except Exception as e:
             logger.error(f"Error updating event {event_id}: {e}", exc_info=True)
             raise
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            cancel_event_reminders(instance.id)
+            instance.delete()
+
     def destroy(self, request, *args, **kwargs):
         event_id = kwargs.get("pk")
         logger.info(f"Event delete requested by user: {request.user.username}, event_id: {event_id}")
         try:
             instance = self.get_object()
-            cache_key = self.serializer_class.CACHE_KEY_DETAIL.format(instance.id)
-            cache.delete(cache_key)
+            remove_admission_rate(instance.id)
             response = super().destroy(request, *args, **kwargs)
-            logger.info(f"Event deleted successfully: {event_id}, cache invalidated")
+            logger.info(f"Event deleted successfully: {event_id}")
             return response
         except Exception as e:
             logger.error(f"Error deleting event {event_id}: {e}", exc_info=True)
             raise
 
+    @action(detail=False, methods=["get"], url_path="search", pagination_class=EventSearchPagination)
+    def search(self, request):
+        terms = request.query_params.get("q", "").strip()
+        logger.info(f"Event search requested by user: {request.user.username}, q: {terms!r}")
+        try:
+            if not terms:
+                raise ValidationError({"q": "This query parameter is required."})
+            if len(terms) > MAX_QUERY_LENGTH:
+                raise ValidationError({"q": f"Ensure this value has at most {MAX_QUERY_LENGTH} characters."})
+            page = self.paginate_queryset(search_events(self.get_queryset(), terms))
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+            logger.info(f"Event search returned {len(page)} events for q: {terms!r}")
+            return response
+        except (ValidationError, NotFound):
+            raise
+        except Exception as e:
+            logger.error(f"Error searching events for q {terms!r}: {e}", exc_info=True)
+            raise
+
+    # Suggestions are requested on every keystroke: stateless JWT, no serializer, no count, cached per prefix
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="autocomplete",
+        authentication_classes=[JWTStatelessUserAuthentication],
+        permission_classes=[IsAuthenticated],
+    )
+    def autocomplete(self, request):
+        prefix = request.query_params.get("q", "")
+        try:
+            try:
+                limit = min(max(int(request.query_params.get("limit", 10)), 1), MAX_AUTOCOMPLETE_LIMIT)
+            except ValueError:
+                raise ValidationError({"limit": "A valid integer is required."})
+            return Response(autocomplete_events(prefix, limit), status=status.HTTP_200_OK)
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error autocompleting events for q {prefix!r}: {e}", exc_info=True)
+            raise
+
     @action(detail=True, methods=["get"], url_path="poster")
     def poster(self, request, pk=None):
         logger.info(f"Event poster requested by user: {request.user.username}, event_id: {pk}")
@@ -191,6 +226,84 @@ class EventViewSet(viewsets.ModelViewSet):
             logger.error(f"Error retrieving event posters for event {pk}: {e}", exc_info=True)
             raise
 
+    @action(detail=True, methods=["post"], url_path="broadcast", permission_classes=[IsAuthenticated, IsEventManager])
+    def broadcast(self, request, pk=None):
+        logger.info(f"Event broadcast requested by user: {request.user.username}, event_id: {pk}")
+        try:
+            event = self.get_object()
+            serializer = BroadcastSerializer(data=request.data, context={"request": request, "event": event})
+            serializer.is_valid(raise_exception=True)
+            broadcast = serializer.save()
+            logger.info(f"Broadcast {broadcast.id} queued for event {pk}")
+            return Response(BroadcastSerializer(broadcast).data, status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            logger.error(f"Error queuing broadcast for event {pk}: {e}", exc_info=True)
+            raise
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"broadcast/(?P<broadcast_id>[^/.]+)",
+        permission_classes=[IsAuthenticated, IsEventManager],
+    )
+    def broadcast_status(self, request, pk=None, broadcast_id=None):
+        try:
+            event = self.get_object()
+            broadcast = event.broadcasts.filter(pk=broadcast_id).first()
+            if broadcast is None:
+                raise NotFound("Broadcast not found.")
+            return Response(BroadcastSerializer(broadcast).data, status=status.HTTP_200_OK)
+        except NotFound:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving broadcast {broadcast_id} of event {pk}: {e}", exc_info=True)
+            raise
+
+    # Waiting-room endpoints authenticate from the JWT claims alone and only talk to Redis,
+    # so they stay cheap while thousands of clients poll them during an on-sale moment.
+    @action(
+        detail=True,
+        methods=["get", "post"],
+        url_path="queue",
+        authentication_classes=[JWTStatelessUserAuthentication],
+        permission_classes=[IsAuthenticated],
+    )
+    def queue(self, request, pk=None):
+        try:
+            rate = get_admission_rate(pk)
+            if request.method == "GET":
+                return Response(
+                    {"event_id": pk, "waiting": get_queue_depth(pk), "admission_rate": rate},
+                    status=status.HTTP_200_OK,
+                )
+
+            logger.info(f"Waiting room join requested by user: {request.user.id}, event_id: {pk}")
+            if rate is None:
+                return Response({"admitted": True, "token": None}, status=status.HTTP_200_OK)
+            return Response(join_queue(pk, request.user.id), status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.error(f"Error handling waiting room request for event {pk}: {e}", exc_info=True)
+            raise
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="queue/status",
+        authentication_classes=[JWTStatelessUserAuthentication],
+        permission_classes=[IsAuthenticated],
+    )
+    def queue_status(self, request, pk=None):
+        try:
+            queue_status = get_queue_status(pk, request.user.id)
+            if queue_status is None:
+                raise NotFound("You are not in the waiting room for this event.")
+            return Response(queue_status, status=status.HTTP_200_OK)
+        except NotFound:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving waiting room status for event {pk}: {e}", exc_info=True)
+            raise
+
 
 class EventPosterViewSet(viewsets.ModelViewSet):
     queryset = EventPoster.objects.all()
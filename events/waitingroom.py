@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core import signing
+
+from common.redis_client import get_redis_client
+from loguru import logger
+
+RATES_KEY = "waitingroom:rates"
+QUEUE_KEY = "waitingroom:{}:queue"
+SEQUENCE_KEY = "waitingroom:{}:seq"
+ADMITTED_KEY = "waitingroom:{}:admitted:{}"
+TOKEN_SALT = "events.waitingroom"
+
+_ADMIT_SCRIPT = """
+local admitted = redis.call("ZPOPMIN", KEYS[1], ARGV[1])
+for i = 1, #admitted, 2 do
+    redis.call("SET", ARGV[3] .. admitted[i], "1", "EX", ARGV[2])
+end
+return #admitted / 2
+"""
+
+# The admitted key holds "1" until the first status poll stores the user's token in it, keeping its expiry
+_ADMISSION_TOKEN_SCRIPT = """
+local value = redis.call("GET", KEYS[1])
+if value == "1" then
+    redis.call("SET", KEYS[1], ARGV[1], "KEEPTTL")
+    return ARGV[1]
+end
+return value
+"""
+
+
+def sync_admission_rate(event):
+    """Mirror ``Event.admission_rate`` into Redis so queue endpoints and the scheduler never read PostgreSQL."""
+    client = get_redis_client()
+    if event.admission_rate and event.status == "scheduled":
+        client.hset(RATES_KEY, str(event.id), event.admission_rate)
+    else:
+        client.hdel(RATES_KEY, str(event.id))
+
+
+def remove_admission_rate(event_id):
+    get_redis_client().hdel(RATES_KEY, str(event_id))
+
+
+def get_admission_rate(event_id):
+    rate = get_redis_client().hget(RATES_KEY, str(event_id))
+    return int(rate) if rate else None
+
+
+def join_queue(event_id, user_id):
+    client = get_redis_client()
+    key = QUEUE_KEY.format(event_id)
+    if client.zscore(key, str(user_id)) is None and not client.exists(ADMITTED_KEY.format(event_id, user_id)):
+        client.zadd(key, {str(user_id): client.incr(SEQUENCE_KEY.format(event_id))}, nx=True)
+        logger.info(f"User {user_id} joined waiting room of event {event_id}")
+    return get_queue_status(event_id, user_id)
+
+
+def get_queue_status(event_id, user_id):
+    """Queue position of a waiting user, or the admission token of an admitted one; ``None`` if neither.
+
+    An admitted user gets the same token on every poll, issued on the first one, so polling cannot
+    extend the admission window past ``ADMISSION_TOKEN_TTL``.
+    """
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.eval(
+        _ADMISSION_TOKEN_SCRIPT, 1, ADMITTED_KEY.format(event_id, user_id), issue_admission_token(event_id, user_id)
+    )
+    pipe.zrank(QUEUE_KEY.format(event_id), str(user_id))
+    pipe.zcard(QUEUE_KEY.format(event_id))
+    token, rank, waiting = pipe.execute()
+    if token:
+        return {"admitted": True, "token": token, "waiting": waiting}
+    if rank is None:
+        return None
+    return {"admitted": False, "position": rank + 1, "waiting": waiting}
+
+
+def get_queue_depth(event_id):
+    return get_redis_client().zcard(QUEUE_KEY.format(event_id))
+
+
+def admit_waiting_users():
+    """Move up to ``admission_rate`` users per event from the queue to the admitted set. Run once per second."""
+    client = get_redis_client()
+    ttl = settings.ADMISSION_TOKEN_TTL
+    admitted = 0
+    for event_id, rate in client.hgetall(RATES_KEY).items():
+        admitted += client.eval(
+            _ADMIT_SCRIPT, 1, QUEUE_KEY.format(event_id), int(rate), ttl, ADMITTED_KEY.format(event_id, "")
+        )
+    return admitted
+
+
+def issue_admission_token(event_id, user_id):
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(f"{event_id}:{user_id}")
+
+
+def verify_admission_token(token, event_id, user_id):
+    """Check a signed admission token offline: no database or Redis access."""
+    if not token:
+        return False
+    try:
+        value = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.ADMISSION_TOKEN_TTL)
+    except signing.BadSignature:
+        return False
+    return value == f"{event_id}:{user_id}"
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["created_at", "id"], name="payments_created_id_idx"
+            ),
+        ),
+    ]
@@ -18,3 +18,4 @@ class Payment(models.Model):
 
     class Meta:
         db_table = "payments"
+        indexes = [models.Index(fields=["created_at", "id"], name="payments_created_id_idx")]
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Payment
 from common.constants import PAYMENT_METHOD_CHOICES, PAYMENT_STATUS_CHOICES
+from registrations.waitlist import cancel_registration
 from loguru import logger
 
 
@@ -57,6 +58,8 @@ class PaymentSerializer(serializers.ModelSerializer):
         try:
             payment = Payment.objects.create(**validated_data)
             logger.info(f"Payment created successfully: {payment.id}, registration_id={registration_id}")
+            if payment.payment_status == "failed":
+                cancel_registration(payment.registration)
             return payment
         except Exception as e:
             logger.error(f"Error creating Payment: {e}", exc_info=True)
@@ -74,10 +77,13 @@ class PaymentSerializer(serializers.ModelSerializer):
                 if validated_data["payment_status"] not in [choice[0] for choice in PAYMENT_STATUS_CHOICES]:
                     logger.warning(f"Payment update validation failed: invalid payment status {validated_data['payment_status']}")
                     raise serializers.ValidationError("Invalid payment status.")
+            previous_status = instance.payment_status
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
             instance.save()
             logger.info(f"Payment updated successfully: {payment_id}")
+            if instance.payment_status == "failed" and previous_status != "failed":
+                cancel_registration(instance.registration)
             return instance
         except serializers.ValidationError:
             raise
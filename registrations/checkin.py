@@ -0,0 +1,88 @@
+import base64
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.core import signing
+from django.utils import timezone
+
+from common.redis_client import get_redis_client
+from common.versions import bump_collection_version
+from .models import Registration
+from loguru import logger
+
+TOKEN_SALT = "registrations.checkin"
+CHECKED_IN_KEY = "checkin:event:{}"
+REVOKED_KEY = "checkin:revoked"
+PENDING_KEY = "checkin:pending"
+
+# Returns 1 for a first scan, 0 for a duplicate and -1 for a cancelled registration
+_CHECKIN_SCRIPT = """
+if redis.call("SISMEMBER", KEYS[2], ARGV[1]) == 1 then
+    return -1
+end
+if redis.call("SADD", KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call("RPUSH", KEYS[3], ARGV[1] .. ":" .. ARGV[2])
+return 1
+"""
+
+
+def make_checkin_token(registration_id, event_id):
+    """Compact HMAC-signed token for a registration, suitable for rendering as a QR code."""
+    raw = uuid.UUID(str(registration_id)).bytes + uuid.UUID(str(event_id)).bytes
+    payload = base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+    return signing.Signer(salt=TOKEN_SALT).sign(payload)
+
+
+def read_checkin_token(token):
+    """Return ``(registration_id, event_id)`` from a valid token or ``None``. Verified offline."""
+    try:
+        payload = signing.Signer(salt=TOKEN_SALT).unsign(token)
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except (signing.BadSignature, ValueError):
+        return None
+    if len(raw) != 32:
+        return None
+    return str(uuid.UUID(bytes=raw[:16])), str(uuid.UUID(bytes=raw[16:]))
+
+
+def record_checkin(registration_id, event_id):
+    keys = [CHECKED_IN_KEY.format(event_id), REVOKED_KEY, PENDING_KEY]
+    return get_redis_client().eval(_CHECKIN_SCRIPT, len(keys), *keys, registration_id, time.time())
+
+
+def revoke_checkin(registration_id):
+    get_redis_client().sadd(REVOKED_KEY, str(registration_id))
+
+
+def flush_checkins(batch_size=1000):
+    """Persist queued check-ins to PostgreSQL in batches. Returns the number of check-ins written."""
+    client = get_redis_client()
+    flushed = 0
+    while True:
+        items = client.lpop(PENDING_KEY, batch_size)
+        if not items:
+            return flushed
+        registrations = []
+        now = timezone.now()
+        for item in items:
+            registration_id, checked_in_at = item.split(":")
+            registrations.append(
+                Registration(
+                    id=registration_id,
+                    checked_in_at=datetime.fromtimestamp(float(checked_in_at), tz=dt_timezone.utc),
+                    updated_at=now,
+                )
+            )
+        try:
+            Registration.objects.bulk_update(registrations, ["checked_in_at", "updated_at"], batch_size=batch_size)
+        except Exception:
+            client.lpush(PENDING_KEY, *reversed(items))
+            raise
+        bump_collection_version(Registration)
+        flushed += len(items)
+        logger.info(f"Flushed {len(items)} check-ins to the database")
+        if len(items) < batch_size:
+            return flushed
@@ -0,0 +1,71 @@
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from common.outbox import enqueue_task
+from common.redis_client import get_redis_client
+from .models import Registration
+from loguru import logger
+
+DIGEST_KEY = "digest:user:{}"
+DUE_KEY = "digest:due"
+SEND_TICKET_DIGEST_TASK = "registrations.task.send_ticket_digest"
+
+# Drop the flushed items; a user who got more notifications meanwhile stays due for a new window
+_ACK_SCRIPT = """
+redis.call("LTRIM", KEYS[1], ARGV[1], -1)
+if redis.call("LLEN", KEYS[1]) == 0 then
+    redis.call("ZREM", KEYS[2], ARGV[2])
+else
+    redis.call("ZADD", KEYS[2], ARGV[3], ARGV[2])
+end
+return 1
+"""
+
+
+def buffer_digest_notifications(registration_ids):
+    """Buffer the confirmations of digest-mode users. Returns the ids that were buffered instead of sent.
+
+    A user's first buffered confirmation opens a window of ``EMAIL_DIGEST_WINDOW`` seconds; everything
+    that arrives before it closes goes out as one email.
+    """
+    buffered = defaultdict(list)
+    digest_registrations = Registration.objects.filter(
+        pk__in=registration_ids, user__notification_mode="digest"
+    ).values_list("id", "user_id")
+    for registration_id, user_id in digest_registrations:
+        buffered[str(user_id)].append(str(registration_id))
+    if not buffered:
+        return set()
+
+    due_at = time.time() + settings.EMAIL_DIGEST_WINDOW
+    pipe = get_redis_client().pipeline(transaction=True)
+    for user_id, ids in buffered.items():
+        pipe.rpush(DIGEST_KEY.format(user_id), *ids)
+        pipe.zadd(DUE_KEY, {user_id: due_at}, nx=True)
+    pipe.execute()
+    return {registration_id for ids in buffered.values() for registration_id in ids}
+
+
+def flush_due_digests(limit=500):
+    """Queue one ``send_ticket_digest`` task per user whose window has closed. Returns the number queued.
+
+    Buffered items are trimmed only after the task is committed to the outbox, so a crash in between
+    sends a digest twice rather than losing it.
+    """
+    client = get_redis_client()
+    now = time.time()
+    flushed = 0
+    for user_id in client.zrangebyscore(DUE_KEY, "-inf", now, start=0, num=limit):
+        key = DIGEST_KEY.format(user_id)
+        registration_ids = client.lrange(key, 0, -1)
+        if registration_ids:
+            with transaction.atomic():
+                enqueue_task(SEND_TICKET_DIGEST_TASK, user_id, list(dict.fromkeys(registration_ids)))
+            flushed += 1
+        client.eval(_ACK_SCRIPT, 2, key, DUE_KEY, len(registration_ids), user_id, now + settings.EMAIL_DIGEST_WINDOW)
+    if flushed:
+        logger.info(f"Flushed {flushed} ticket digests")
+    return flushed
@@ -0,0 +1,68 @@
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template import Context
+from django.template.loader import get_template
+from django.utils import timezone, translation
+
+FROM_EMAIL = "no-reply@dicoevent.com"
+TICKET_CONFIRMATION = "ticket_confirmation"
+EVENT_REMINDER = "event_reminder"
+TICKET_DIGEST = "ticket_digest"
+EVENT_BROADCAST = "event_broadcast"
+
+
+def resolve_locale(locale=None):
+    """The email locale to render for a recipient: their own if it is supported, else ``EMAIL_DEFAULT_LOCALE``."""
+    return locale if locale in settings.EMAIL_LOCALES else settings.EMAIL_DEFAULT_LOCALE
+
+
+@lru_cache(maxsize=None)
+def get_email_templates(name, locale):
+    """Compiled ``(subject, text, html)`` templates of an email, parsed once per worker process.
+
+    Templates live in ``registrations/templates/emails/<locale>/`` so the copy can change without touching code.
+    """
+    return tuple(get_template(f"emails/{locale}/{name}.{suffix}").template for suffix in ("subject.txt", "txt", "html"))
+
+
+def render_emails(name, recipients, context=None, locale=None):
+    """Render one message per ``(user_email, recipient_context[, locale])`` recipient in a single call.
+
+    Recipients are rendered in one group per locale, falling back to ``locale`` and then to
+    ``EMAIL_DEFAULT_LOCALE``. The templates, time zone and shared ``context`` are set up once per
+    group; each recipient only pushes its own variables onto the same context. Messages are
+    returned in recipient order.
+    """
+    groups = {}
+    for index, (_, _, *recipient_locale) in enumerate(recipients):
+        groups.setdefault(resolve_locale(recipient_locale[0] if recipient_locale else locale), []).append(index)
+
+    messages = [None] * len(recipients)
+    for group_locale, indexes in groups.items():
+        subject_template, text_template, html_template = get_email_templates(name, group_locale)
+        with translation.override(group_locale), timezone.override(ZoneInfo(settings.EMAIL_TIME_ZONE)):
+            batch_context = Context(context or {})
+            for index in indexes:
+                user_email, recipient_context = recipients[index][:2]
+                with batch_context.push(recipient_context):
+                    subject = " ".join(subject_template.render(batch_context).split())
+                    text_content = text_template.render(batch_context)
+                    html_content = html_template.render(batch_context)
+                message = EmailMultiAlternatives(subject, text_content, FROM_EMAIL, [user_email])
+                message.attach_alternative(html_content, "text/html")
+                messages[index] = message
+    return messages
+
+
+def render_email(name, user_email, context, locale=None):
+    return render_emails(name, [(user_email, context)], locale=locale)[0]
+
+
+def reminder_offset_context(offset_minutes):
+    return {
+        "offset_minutes": offset_minutes,
+        "offset_hours": offset_minutes // 60 if offset_minutes % 60 == 0 else None,
+    }
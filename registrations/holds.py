@@ -0,0 +1,279 @@
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import serializers
+
+from common.outbox import enqueue_task
+from common.redis_client import get_redis_client
+from common.versions import bump_collection_version
+from tickets.models import Ticket
+from .inventory import INVENTORY_KEY, claim_seats, restock_inventory
+from .models import Registration
+from loguru import logger
+
+HOLD_KEY = "hold:{}"
+HOLD_EXPIRY_KEY = "holds:ticket:{}"
+HOLD_TICKETS_KEY = "holds:tickets"
+TICKET_META_KEY = "ticket_meta_{}"
+
+# Hold members in the per-ticket expiry set are "<hold_id>:<quantity>" so expired holds can be
+# returned to inventory after their hold key is gone.
+_RESERVE_SCRIPT = """
+local available = redis.call("GET", KEYS[1])
+if not available then
+    return -1
+end
+if tonumber(available) < tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("DECRBY", KEYS[1], ARGV[1])
+redis.call("SET", KEYS[2], ARGV[4], "EX", ARGV[2])
+redis.call("ZADD", KEYS[3], ARGV[3], ARGV[5])
+redis.call("SADD", KEYS[4], ARGV[6])
+return 1
+"""
+
+_TAKE_SEATS_SCRIPT = """
+local available = redis.call("GET", KEYS[1])
+if not available then
+    return -1
+end
+if tonumber(available) < tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("DECRBY", KEYS[1], ARGV[1])
+return 1
+"""
+
+_TAKE_HOLD_SCRIPT = """
+local hold = redis.call("GET", KEYS[1])
+if not hold then
+    return false
+end
+if cjson.decode(hold)["user_id"] ~= ARGV[1] then
+    return false
+end
+redis.call("DEL", KEYS[1])
+redis.call("ZREM", KEYS[2], ARGV[2])
+if ARGV[3] == "1" then
+    redis.call("INCRBY", KEYS[3], cjson.decode(hold)["quantity"])
+end
+return hold
+"""
+
+_RELEASE_EXPIRED_SCRIPT = """
+local members = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+local returned = 0
+for _, member in ipairs(members) do
+    local sep = string.find(member, ":")
+    local hold_id = string.sub(member, 1, sep - 1)
+    if redis.call("EXISTS", ARGV[2] .. hold_id) == 0 then
+        returned = returned + tonumber(string.sub(member, sep + 1))
+        redis.call("ZREM", KEYS[1], member)
+    end
+end
+if returned > 0 and redis.call("EXISTS", KEYS[2]) == 1 then
+    redis.call("INCRBY", KEYS[2], returned)
+end
+if redis.call("ZCARD", KEYS[1]) == 0 then
+    redis.call("SREM", KEYS[3], ARGV[3])
+end
+return returned
+"""
+
+# Seeds a missing counter only: a live one already reflects claims whose transactions are still in flight
+_SYNC_INVENTORY_SCRIPT = """
+if redis.call("EXISTS", KEYS[2]) == 1 then
+    return 0
+end
+local held = 0
+for _, member in ipairs(redis.call("ZRANGEBYSCORE", KEYS[1], ARGV[2], "+inf")) do
+    held = held + tonumber(string.sub(member, string.find(member, ":") + 1))
+end
+local available = tonumber(ARGV[1]) - held
+if available < 0 then
+    available = 0
+end
+redis.call("SET", KEYS[2], available)
+return 1
+"""
+
+
+def _held_quantity(client, ticket_id, now):
+    members = client.zrangebyscore(HOLD_EXPIRY_KEY.format(ticket_id), now, "+inf")
+    return sum(int(member.rsplit(":", 1)[1]) for member in members)
+
+
+def get_ticket_meta(ticket_id):
+    """Sales window and event of a ticket, cached briefly so hold requests skip PostgreSQL."""
+    cache_key = TICKET_META_KEY.format(ticket_id)
+    meta = cache.get(cache_key)
+    if meta is None:
+        ticket = (
+            Ticket.objects.filter(pk=ticket_id)
+            .values("event_id", "event__admission_rate", "sales_start", "sales_end")
+            .first()
+        )
+        if ticket is None:
+            return None
+        meta = {
+            "event_id": str(ticket["event_id"]),
+            "admission_rate": ticket["event__admission_rate"],
+            "sales_start": ticket["sales_start"].timestamp(),
+            "sales_end": ticket["sales_end"].timestamp(),
+        }
+        cache.set(cache_key, meta, timeout=30)
+    return meta
+
+
+def seed_inventory(ticket_id):
+    """Initialise the Redis inventory counter of a ticket from PostgreSQL if it is missing."""
+    client = get_redis_client()
+    ticket = Ticket.objects.filter(pk=ticket_id).values("quota", "sold").first()
+    if ticket is None:
+        return None
+    available = max(ticket["quota"] - ticket["sold"] - _held_quantity(client, ticket_id, time.time()), 0)
+    client.set(INVENTORY_KEY.format(ticket_id), available, nx=True)
+    logger.info(f"Seeded Redis inventory for ticket {ticket_id}: available={available}")
+    return available
+
+
+def create_hold(ticket_id, user_id, quantity):
+    client = get_redis_client()
+    ttl = settings.TICKET_HOLD_TTL
+    hold_id = str(uuid.uuid4())
+    expires_at = time.time() + ttl
+    payload = json.dumps({"ticket_id": str(ticket_id), "user_id": str(user_id), "quantity": quantity})
+    keys = [
+        INVENTORY_KEY.format(ticket_id),
+        HOLD_KEY.format(hold_id),
+        HOLD_EXPIRY_KEY.format(ticket_id),
+        HOLD_TICKETS_KEY,
+    ]
+    args = [quantity, ttl, expires_at, payload, f"{hold_id}:{quantity}", str(ticket_id)]
+
+    result = client.eval(_RESERVE_SCRIPT, len(keys), *keys, *args)
+    if result == -1:
+        seed_inventory(ticket_id)
+        result = client.eval(_RESERVE_SCRIPT, len(keys), *keys, *args)
+    if result != 1:
+        logger.warning(f"Hold rejected: ticket {ticket_id} has fewer than {quantity} seat(s) available")
+        raise serializers.ValidationError("Not enough seats available.")
+
+    logger.info(f"Hold {hold_id} created: ticket_id={ticket_id}, user_id={user_id}, quantity={quantity}")
+    return {"hold_id": hold_id, "ticket_id": str(ticket_id), "quantity": quantity, "expires_at": expires_at}
+
+
+def _take_seats(client, ticket_id, quantity):
+    key = INVENTORY_KEY.format(ticket_id)
+    result = client.eval(_TAKE_SEATS_SCRIPT, 1, key, quantity)
+    if result == -1:
+        seed_inventory(ticket_id)
+        result = client.eval(_TAKE_SEATS_SCRIPT, 1, key, quantity)
+    return result == 1
+
+
+@contextmanager
+def reserved_seats(counts):
+    """Take seats from the Redis inventory for a claim that does not come from a hold.
+
+    ``counts`` maps ticket ids to quantities. Seats held by other users are not available, so a
+    direct registration can never take them. If the block raises, including a failed commit of
+    a ``transaction.atomic()`` nested in it, the seats are given back.
+    """
+    client = get_redis_client()
+    taken = []
+    try:
+        for ticket_id, quantity in sorted(counts.items(), key=lambda item: str(item[0])):
+            if not _take_seats(client, ticket_id, quantity):
+                logger.warning(f"Seat claim rejected: ticket {ticket_id} has fewer than {quantity} seat(s) available")
+                raise serializers.ValidationError("Not enough seats available.")
+            taken.append((ticket_id, quantity))
+        yield
+    except BaseException:
+        for ticket_id, quantity in taken:
+            restock_inventory(ticket_id, quantity)
+        raise
+
+
+def _take_hold(hold_id, user_id, restock):
+    client = get_redis_client()
+    hold = client.get(HOLD_KEY.format(hold_id))
+    if hold is None:
+        return None
+    hold = json.loads(hold)
+    keys = [
+        HOLD_KEY.format(hold_id),
+        HOLD_EXPIRY_KEY.format(hold["ticket_id"]),
+        INVENTORY_KEY.format(hold["ticket_id"]),
+    ]
+    args = [str(user_id), f"{hold_id}:{hold['quantity']}", "1" if restock else "0"]
+    taken = client.eval(_TAKE_HOLD_SCRIPT, len(keys), *keys, *args)
+    return json.loads(taken) if taken else None
+
+
+def release_hold(hold_id, user_id):
+    hold = _take_hold(hold_id, user_id, restock=True)
+    if hold is None:
+        raise serializers.ValidationError("Hold not found or already expired.")
+    logger.info(f"Hold {hold_id} released: quantity={hold['quantity']} returned to ticket {hold['ticket_id']}")
+    return hold
+
+
+def confirm_hold(hold_id, user):
+    """Turn a live hold into ``Registration`` rows. Seats go back to Redis if the database rejects the claim."""
+    hold = _take_hold(hold_id, user.id, restock=False)
+    if hold is None:
+        raise serializers.ValidationError("Hold not found or already expired.")
+
+    ticket_id = hold["ticket_id"]
+    quantity = hold["quantity"]
+    try:
+        ticket = Ticket.objects.get(pk=ticket_id)
+        with transaction.atomic():
+            claim_seats(ticket, quantity)
+            registrations = Registration.objects.bulk_create(
+                [Registration(user=user, ticket=ticket) for _ in range(quantity)]
+            )
+            bump_collection_version(Registration)
+            enqueue_task(
+                "registrations.task.send_ticket_emails",
+                [[user.email, user.username, str(registration.id), user.locale] for registration in registrations],
+            )
+    except Exception:
+        restock_inventory(ticket_id, quantity)
+        logger.warning(f"Hold {hold_id} could not be confirmed, {quantity} seat(s) returned to ticket {ticket_id}")
+        raise
+
+    logger.info(f"Hold {hold_id} confirmed: {quantity} registration(s) created for ticket {ticket_id}")
+    return registrations
+
+
+def release_expired_holds():
+    client = get_redis_client()
+    now = time.time()
+    returned = 0
+    for ticket_id in client.smembers(HOLD_TICKETS_KEY):
+        keys = [HOLD_EXPIRY_KEY.format(ticket_id), INVENTORY_KEY.format(ticket_id), HOLD_TICKETS_KEY]
+        returned += client.eval(_RELEASE_EXPIRED_SCRIPT, len(keys), *keys, now, HOLD_KEY.format(""), ticket_id)
+    return returned
+
+
+def sync_inventory(ticket_ids_with_available):
+    """Seed the missing Redis inventory counters with ``available`` minus the seats in live holds.
+
+    Existing counters are left alone. Rewriting one from PostgreSQL would count the seats of claims
+    that have taken them from Redis but not committed yet a second time. Returns the number seeded.
+    """
+    client = get_redis_client()
+    now = time.time()
+    seeded = 0
+    for ticket_id, available in ticket_ids_with_available:
+        keys = [HOLD_EXPIRY_KEY.format(ticket_id), INVENTORY_KEY.format(ticket_id)]
+        seeded += client.eval(_SYNC_INVENTORY_SCRIPT, len(keys), *keys, available, now)
+    return seeded
@@ -0,0 +1,128 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from common.redis_client import get_redis_client
+from common.versions import bump_collection_version
+from events.caching import invalidate_event_details
+from events.models import Event
+from tickets.caching import invalidate_ticket_details
+from tickets.models import Ticket
+from loguru import logger
+
+# Seats of a ticket that can still be held or claimed: quota - sold - live holds. Every claim takes
+# seats from this counter before it touches PostgreSQL, so holds really reserve what they hold.
+INVENTORY_KEY = "inventory:ticket:{}"
+
+_RESTOCK_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("INCRBY", KEYS[1], ARGV[1])
+end
+return false
+"""
+
+
+def restock_inventory(ticket_id, quantity=1):
+    """Give seats back to the Redis counter of a ticket. A missing counter is left to be seeded from PostgreSQL."""
+    try:
+        get_redis_client().eval(_RESTOCK_SCRIPT, 1, INVENTORY_KEY.format(ticket_id), quantity)
+    except Exception as e:
+        # sync_ticket_inventory rebuilds the counter from the registrations table
+        logger.warning(f"Could not return {quantity} seat(s) to the Redis inventory of ticket {ticket_id}: {e}")
+
+
+# Counter updates bypass save(), so they stamp updated_at and invalidate cached representations themselves
+def _ticket_changed(ticket_id):
+    invalidate_ticket_details(ticket_id)
+    bump_collection_version(Ticket)
+
+
+def _event_changed(event_id):
+    invalidate_event_details(event_id)
+    bump_collection_version(Event)
+
+
+def claim_ticket_seats(ticket, quantity=1):
+    """Take ``quantity`` seats from ``ticket`` with a single conditional UPDATE on the ticket row."""
+    now = timezone.now()
+    claimed = Ticket.objects.filter(
+        pk=ticket.pk,
+        sold__lte=F("quota") - quantity,
+        sales_start__lte=now,
+        sales_end__gte=now,
+    ).update(sold=F("sold") + quantity, updated_at=now)
+    if not claimed:
+        if not (ticket.sales_start <= now <= ticket.sales_end):
+            logger.warning(f"Seat claim rejected: ticket {ticket.pk} is not on sale")
+            raise serializers.ValidationError("Ticket sales are closed.")
+        logger.warning(f"Seat claim rejected: ticket {ticket.pk} has fewer than {quantity} seat(s) left")
+        raise serializers.ValidationError("Ticket is sold out.")
+    _ticket_changed(ticket.pk)
+
+
+def claim_event_seats(event_id, quantity=1):
+    """Take ``quantity`` seats from the event-level quota with a single conditional UPDATE on the event row."""
+    claimed = Event.objects.filter(
+        pk=event_id,
+        status="scheduled",
+        sold__lte=F("quota") - quantity,
+    ).update(sold=F("sold") + quantity, updated_at=timezone.now())
+    if not claimed:
+        logger.warning(f"Seat claim rejected: event {event_id} is sold out or not scheduled")
+        raise serializers.ValidationError("Event is sold out.")
+    _event_changed(event_id)
+
+
+def claim_seats(ticket, quantity=1):
+    """Take ``quantity`` seats from ``ticket`` and its event.
+
+    Must be called inside ``transaction.atomic()``, with the seats already taken from the Redis
+    counter by a hold or ``holds.reserved_seats()``. Ticket rows are always updated before the
+    event row so concurrent claims never deadlock, and the row locks are only held until the
+    surrounding transaction commits.
+    """
+    claim_ticket_seats(ticket, quantity)
+    claim_event_seats(ticket.event_id, quantity)
+    logger.info(f"Claimed {quantity} seat(s) on ticket {ticket.pk}")
+
+
+def release_ticket_seats(ticket_id, quantity=1):
+    released = Ticket.objects.filter(pk=ticket_id, sold__gte=quantity).update(
+        sold=F("sold") - quantity, updated_at=timezone.now()
+    )
+    if released:
+        transaction.on_commit(lambda: restock_inventory(ticket_id, quantity))
+    _ticket_changed(ticket_id)
+
+
+def release_event_seats(event_id, quantity=1):
+    Event.objects.filter(pk=event_id, sold__gte=quantity).update(sold=F("sold") - quantity, updated_at=timezone.now())
+    _event_changed(event_id)
+
+
+def release_seats(ticket_id, event_id, quantity=1):
+    """Give ``quantity`` seats back to a ticket and its event. Must be called inside ``transaction.atomic()``."""
+    release_ticket_seats(ticket_id, quantity)
+    release_event_seats(event_id, quantity)
+    logger.info(f"Released {quantity} seat(s) on ticket {ticket_id}")
+
+
+def move_seat(old_ticket, new_ticket):
+    """Move one seat from ``old_ticket`` to ``new_ticket``. Must be called inside ``transaction.atomic()``.
+
+    Rows are touched tickets first, then events, each in primary-key order, so two opposite
+    moves cannot deadlock. Moving within one event leaves the event counter untouched.
+    """
+    for ticket in sorted([old_ticket, new_ticket], key=lambda t: str(t.pk)):
+        if ticket is new_ticket:
+            claim_ticket_seats(new_ticket)
+        else:
+            release_ticket_seats(old_ticket.pk)
+    if old_ticket.event_id != new_ticket.event_id:
+        for event_id in sorted([old_ticket.event_id, new_ticket.event_id], key=str):
+            if event_id == new_ticket.event_id:
+                claim_event_seats(new_ticket.event_id)
+            else:
+                release_event_seats(old_ticket.event_id)
+    logger.info(f"Moved one seat from ticket {old_ticket.pk} to ticket {new_ticket.pk}")
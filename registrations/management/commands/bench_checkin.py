@@ -0,0 +1,85 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from common.redis_client import get_redis_client
+from registrations.checkin import CHECKED_IN_KEY, make_checkin_token, read_checkin_token
+from registrations.views import CheckInViewSet
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure QR check-in scans per second through the full view stack (JWT authentication, staff check, "
+        "offline token verification and the Redis check-in script). Scans synthetic registrations of a throwaway "
+        "event: the queued check-ins match no rows when flushed, and the event's check-in set is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scans", type=int, default=10000, help="Timed scans")
+        parser.add_argument("--attendees", type=int, default=5000, help="Distinct tokens the scans are drawn from")
+        parser.add_argument(
+            "--duplicate-ratio",
+            type=float,
+            default=0.1,
+            help="Share of scans that re-present an already scanned token, as at a busy gate",
+        )
+
+    def handle(self, *args, **options):
+        staff = User.objects.filter(is_superuser=True).order_by("created_at").first()
+        if staff is None:
+            raise CommandError("The benchmark needs a superuser to scan as.")
+
+        event_id = str(uuid.uuid4())
+        tokens = [make_checkin_token(uuid.uuid4(), event_id) for _ in range(options["attendees"])]
+        factory = APIRequestFactory()
+        authorization = f"Bearer {AccessToken.for_user(staff)}"
+        view = CheckInViewSet.as_view({"post": "create"})
+
+        # Offline verification alone, the floor under every scan
+        started = time.perf_counter()
+        for token in tokens:
+            read_checkin_token(token)
+        verify_rate = len(tokens) / (time.perf_counter() - started)
+
+        timings = []
+        statuses = {}
+        scanned = []
+        unscanned = list(tokens)
+        random.shuffle(unscanned)
+        try:
+            for _ in range(options["scans"]):
+                if scanned and (not unscanned or random.random() < options["duplicate_ratio"]):
+                    token = random.choice(scanned)
+                else:
+                    token = unscanned.pop()
+                    scanned.append(token)
+                request = factory.post(
+                    "/api/checkin/", {"token": token}, format="json", HTTP_AUTHORIZATION=authorization
+                )
+                started = time.perf_counter()
+                response = view(request)
+                response.render()
+                timings.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code not in (200, 409):
+                    raise CommandError(f"Check-in returned {response.status_code}: {response.content[:200]}")
+        finally:
+            get_redis_client().delete(CHECKED_IN_KEY.format(event_id))
+
+        ordered = sorted(timings)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+        rate = len(ordered) / sum(ordered)
+        line = (
+            f"{len(ordered)} check-in scans ({statuses.get(200, 0)} first, {statuses.get(409, 0)} duplicate): "
+            f"p50={p50 * 1000:.2f}ms p99={p99 * 1000:.2f}ms, {rate:.0f} scans/s per process; "
+            f"token verification alone {verify_rate:.0f}/s"
+        )
+        logger.info(line)
+        self.stdout.write(self.style.SUCCESS(line))
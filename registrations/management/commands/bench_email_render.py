@@ -0,0 +1,35 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from registrations.emails import EVENT_REMINDER, reminder_offset_context, render_emails
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = "Measure how many reminder emails per second the template engine renders. Sends nothing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=10000, help="Messages to render per run")
+        parser.add_argument("--batch-size", type=int, default=100, help="Recipients per render_emails() call")
+        parser.add_argument("--locale", default=None, help="Email locale to render")
+
+    def handle(self, *args, **options):
+        total = options["messages"]
+        batch_size = options["batch_size"]
+        context = {"start_time": timezone.now(), **reminder_offset_context(120)}
+        recipients = [(f"user{i}@example.com", {"username": f"user-{uuid.uuid4().hex[:8]}"}) for i in range(total)]
+
+        # Warm-up compiles and caches the templates so the timing covers rendering only
+        render_emails(EVENT_REMINDER, recipients[:1], context, options["locale"])
+
+        started = time.perf_counter()
+        for start in range(0, total, batch_size):
+            render_emails(EVENT_REMINDER, recipients[start : start + batch_size], context, options["locale"])
+        elapsed = time.perf_counter() - started
+
+        rate = total / elapsed if elapsed else float("inf")
+        logger.info(f"Rendered {total} reminder emails in {elapsed:.3f}s ({rate:.0f} messages/s)")
+        self.stdout.write(self.style.SUCCESS(f"Rendered {total} messages in {elapsed:.3f}s: {rate:.0f} messages/s"))
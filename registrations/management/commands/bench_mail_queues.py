@@ -0,0 +1,103 @@
+import os
+import statistics
+import time
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.core.management.base import BaseCommand
+
+from dico_event.celery import BULK_QUEUE, DEFAULT_QUEUE, TRANSACTIONAL_QUEUE
+from dico_event.celery import app as project_app
+from loguru import logger
+
+CONFIRMATION_TASK = "registrations.task.send_ticket_email"
+REMINDER_TASK = "registrations.task.send_event_reminder_emails"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure confirmation latency while a bulk reminder burst drains, on an in-memory broker. "
+        "Run once with --routing shared and once with --routing routed to compare. Sends nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--routing",
+            choices=("routed", "shared"),
+            default="routed",
+            help="Use the project's queue routing, or put every task on one shared queue",
+        )
+        parser.add_argument("--bulk", type=int, default=2000, help="Reminder batches queued before confirmations")
+        parser.add_argument("--confirmations", type=int, default=50, help="Confirmations sent during the burst")
+        parser.add_argument("--interval", type=float, default=0.02, help="Seconds between confirmations")
+        parser.add_argument("--smtp-delay", type=float, default=0.005, help="Simulated seconds per SMTP send")
+
+    def _make_app(self, routed, smtp_delay, latencies):
+        bench = Celery("mail_queue_bench", broker="memory://", set_as_current=False)
+        bench.conf.broker_transport_options = {"polling_interval": 0.001}
+        bench.conf.worker_prefetch_multiplier = 1
+        bench.conf.task_default_queue = DEFAULT_QUEUE
+        if routed:
+            bench.conf.task_queues = project_app.conf.task_queues
+            bench.conf.task_routes = project_app.conf.task_routes
+
+        @bench.task(name=CONFIRMATION_TASK)
+        def confirmation(queued_at):
+            latencies.append(time.perf_counter() - queued_at)
+            time.sleep(smtp_delay)
+
+        @bench.task(name=REMINDER_TASK)
+        def reminder():
+            time.sleep(smtp_delay)
+
+        return bench, confirmation, reminder
+
+    def _run(self, routed, options):
+        latencies = []
+        bench, confirmation, reminder = self._make_app(routed, options["smtp_delay"], latencies)
+        # Same capacity in both runs: two single-process workers, either one per queue or both on the shared queue
+        queues = [[TRANSACTIONAL_QUEUE], [BULK_QUEUE]] if routed else [[DEFAULT_QUEUE], [DEFAULT_QUEUE]]
+        workers = [
+            start_worker(bench, queues=worker_queues, hostname=f"bench{i}@localhost", perform_ping_check=False)
+            for i, worker_queues in enumerate(queues)
+        ]
+
+        for _ in range(options["bulk"]):
+            reminder.delay()
+        for worker in workers:
+            worker.__enter__()
+        try:
+            for _ in range(options["confirmations"]):
+                confirmation.delay(time.perf_counter())
+                time.sleep(options["interval"])
+            deadline = time.monotonic() + 600
+            while len(latencies) < options["confirmations"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            for worker in reversed(workers):
+                worker.__exit__(None, None, None)
+        return latencies
+
+    def _report(self, label, latencies):
+        if not latencies:
+            self.stdout.write(f"{label}: no confirmations completed")
+            return
+        ordered = sorted(latencies)
+        p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+        line = (
+            f"{label}: confirmation latency p50={statistics.median(ordered) * 1000:.1f}ms "
+            f"p95={p95 * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms over {len(ordered)} messages"
+        )
+        logger.info(line)
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        # Celery prefers this variable over any configured broker, which would route the benchmark to production
+        broker_url = os.environ.pop("CELERY_BROKER_URL", None)
+        try:
+            # The in-memory broker is process-global, so each invocation measures a single routing mode
+            self._report(f"{options['routing']} queues", self._run(options["routing"] == "routed", options))
+        finally:
+            if broker_url is not None:
+                os.environ["CELERY_BROKER_URL"] = broker_url
+        self.stdout.write(self.style.SUCCESS("Benchmark finished"))
@@ -0,0 +1,43 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+
+from common.versions import bump_collection_version
+from events.caching import invalidate_event_details
+from events.models import Event
+from registrations.models import Registration
+from tickets.caching import invalidate_ticket_details
+from tickets.models import Ticket
+from loguru import logger
+
+
+class Command(BaseCommand):
+    help = "Recompute the sold counters of tickets and events from active registrations."
+
+    def handle(self, *args, **options):
+        active_per_ticket = (
+            Registration.objects.filter(ticket=OuterRef("pk"), status="active")
+            .values("ticket")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        sold_per_event = (
+            Ticket.objects.filter(event=OuterRef("pk")).values("event").annotate(total=Sum("sold")).values("total")
+        )
+
+        with transaction.atomic():
+            tickets = Ticket.objects.update(sold=Coalesce(Subquery(active_per_ticket), 0), updated_at=Now())
+            events = Event.objects.update(sold=Coalesce(Subquery(sold_per_event), 0), updated_at=Now())
+            bump_collection_version(Ticket)
+            bump_collection_version(Event)
+            # Cached detail responses embed the counters
+            for model, invalidate in ((Ticket, invalidate_ticket_details), (Event, invalidate_event_details)):
+                ids = model.objects.values_list("id", flat=True).iterator(chunk_size=1000)
+                while chunk := list(islice(ids, 1000)):
+                    invalidate(*chunk)
+
+        logger.info(f"Recounted sold counters: {tickets} tickets, {events} events")
+        self.stdout.write(self.style.SUCCESS(f"Recounted sold counters for {tickets} tickets and {events} events"))
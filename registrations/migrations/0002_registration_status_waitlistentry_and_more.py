@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-18 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0002_ticket_sold"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("registrations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="registration",
+            name="status",
+            field=models.CharField(
+                choices=[("active", "Active"), ("cancelled", "Cancelled")],
+                default="active",
+                max_length=50,
+            ),
+        ),
+        migrations.CreateModel(
+            name="WaitlistEntry",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("joined_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to="tickets.ticket",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "waitlist_entries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="waitlistentry",
+            index=models.Index(
+                fields=["ticket", "joined_at"], name="waitlist_en_ticket__d50d9f_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="waitlistentry",
+            unique_together={("ticket", "user")},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("registrations", "0002_registration_status_waitlistentry_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="registration",
+            name="checked_in_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-18 02:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("registrations", "0003_registration_checked_in_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReminderLog",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("reminder_type", models.CharField(max_length=50)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "registration",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reminder_logs",
+                        to="registrations.registration",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "reminder_logs",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="reminderlog",
+            constraint=models.UniqueConstraint(
+                fields=("registration", "reminder_type"),
+                name="unique_reminder_per_registration",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("registrations", "0004_reminderlog_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="registration",
+            index=models.Index(
+                fields=["registered_at", "id"], name="registrations_reg_id_idx"
+            ),
+        ),
+    ]
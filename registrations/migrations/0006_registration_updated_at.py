@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 03:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("registrations", "0005_registration_registrations_reg_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="registration",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
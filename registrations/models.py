@@ -2,16 +2,52 @@ from django.db import models
 import uuid
 from tickets.models import Ticket
 from accounts.models import User
+from common.constants import REGISTRATION_STATUS_CHOICES
 
 
 class Registration(models.Model):
     id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="registrations")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="registrations")
+    status = models.CharField(max_length=50, choices=REGISTRATION_STATUS_CHOICES, default="active")
     registered_at = models.DateTimeField(auto_now_add=True)
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username} - {self.ticket.name}"
 
     class Meta:
         db_table = "registrations"
+        indexes = [models.Index(fields=["registered_at", "id"], name="registrations_reg_id_idx")]
+
+
+class WaitlistEntry(models.Model):
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="waitlist_entries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="waitlist_entries")
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.ticket.name}"
+
+    class Meta:
+        db_table = "waitlist_entries"
+        unique_together = ("ticket", "user")
+        indexes = [models.Index(fields=["ticket", "joined_at"])]
+
+
+class ReminderLog(models.Model):
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True, editable=False)
+    registration = models.ForeignKey(Registration, on_delete=models.CASCADE, related_name="reminder_logs")
+    reminder_type = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.registration_id} - {self.reminder_type}"
+
+    class Meta:
+        db_table = "reminder_logs"
+        constraints = [
+            models.UniqueConstraint(fields=["registration", "reminder_type"], name="unique_reminder_per_registration")
+        ]
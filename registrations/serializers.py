@@ -3,9 +3,35 @@ from django.shortcuts import get_object_or_404
 from tickets.models import Ticket
 from accounts.models import User
 from .models import Registration
+from common.outbox import enqueue_task, enqueue_tasks
+from common.versions import bump_collection_version
+from django.conf import settings
+from events.waitingroom import verify_admission_token
+from .holds import get_ticket_meta, reserved_seats
+from .checkin import make_checkin_token
+from .inventory import claim_event_seats, claim_seats, claim_ticket_seats, move_seat
+from .waitlist import hand_to_waitlist
+from django.db import transaction
 from django.utils import timezone
+from collections import Counter
 from loguru import logger
 
+SEND_TICKET_EMAIL_TASK = "registrations.task.send_ticket_email"
+SEND_TICKET_EMAILS_TASK = "registrations.task.send_ticket_emails"
+
+
+def _require_admission(request, meta):
+    """Reject a request for a waiting-room event that lacks a valid ``X-Admission-Token``.
+
+    Reads only the cached ticket metadata and verifies the token offline, so unadmitted requests are
+    turned away before any ORM lookup.
+    """
+    if meta.get("admission_rate") and not (
+        request and verify_admission_token(request.headers.get("X-Admission-Token"), meta["event_id"], request.user.id)
+    ):
+        logger.warning(f"Validation failed: no admission token for event {meta['event_id']}")
+        raise serializers.ValidationError("A valid admission token is required for this event.")
+
 
 class RegistrationSerializer(serializers.ModelSerializer):
     registered_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
@@ -13,11 +39,23 @@ class RegistrationSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField(read_only=True)
     ticket_id = serializers.UUIDField(write_only=True)
     ticket = serializers.SerializerMethodField(read_only=True)
+    checked_in_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
+    checkin_token = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Registration
-        fields = ["id", "user_id", "user", "ticket_id", "ticket", "registered_at"]
-        read_only_fields = ["id", "user", "ticket"]
+        fields = [
+            "id",
+            "user_id",
+            "user",
+            "ticket_id",
+            "ticket",
+            "status",
+            "registered_at",
+            "checked_in_at",
+            "checkin_token",
+        ]
+        read_only_fields = ["id", "user", "ticket", "status"]
 
     def get_user(self, obj):
         return obj.user.username
@@ -25,14 +63,53 @@ class RegistrationSerializer(serializers.ModelSerializer):
     def get_ticket(self, obj):
         return obj.ticket.name
 
+    def get_checkin_token(self, obj):
+        if obj.status != "active":
+            return None
+        return make_checkin_token(obj.id, obj.ticket.event_id)
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            return attrs
+        user_id = attrs.get("user_id")
+        ticket_id = attrs.get("ticket_id")
+        logger.info(f"Validating Registration: user_id={user_id}, ticket_id={ticket_id}")
+        try:
+            meta = get_ticket_meta(ticket_id)
+            if meta is not None:
+                _require_admission(self.context.get("request"), meta)
+            user = get_object_or_404(User, pk=user_id)
+            ticket = get_object_or_404(Ticket.objects.select_related("event"), pk=ticket_id)
+            now = timezone.now()
+            if not (ticket.sales_start <= now <= ticket.sales_end):
+                logger.warning(f"Registration validation failed: ticket {ticket_id} is not on sale")
+                raise serializers.ValidationError("Ticket sales are closed.")
+            if ticket.sold >= ticket.quota:
+                logger.warning(f"Registration validation failed: ticket {ticket_id} is sold out")
+                raise serializers.ValidationError("Ticket is sold out.")
+            attrs["_user_obj"] = user
+            attrs["_ticket_obj"] = ticket
+            logger.info(f"Registration validation successful: user_id={user_id}, ticket_id={ticket_id}")
+            return attrs
+        except serializers.ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error validating Registration: {e}", exc_info=True)
+            raise
+
     def create(self, validated_data):
-        user_id = validated_data.get("user_id")
-        ticket_id = validated_data.get("ticket_id")
-        logger.info(f"Creating Registration: user_id={user_id}, ticket_id={ticket_id}")
+        user = validated_data["_user_obj"]
+        ticket = validated_data["_ticket_obj"]
+        logger.info(f"Creating Registration: user_id={user.id}, ticket_id={ticket.id}")
         try:
-            registration = Registration.objects.create(**validated_data)
-            logger.info(f"Registration created successfully: {registration.id}")
+            with reserved_seats({ticket.pk: 1}), transaction.atomic():
+                claim_seats(ticket)
+                registration = Registration.objects.create(user=user, ticket=ticket)
+                enqueue_task(SEND_TICKET_EMAIL_TASK, user.email, user.username, str(registration.id), user.locale)
+            logger.info(f"Registration created successfully: {registration.id}, confirmation email queued in outbox")
             return registration
+        except serializers.ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error creating Registration: {e}", exc_info=True)
             raise
@@ -41,15 +118,150 @@ class RegistrationSerializer(serializers.ModelSerializer):
         registration_id = instance.id
         logger.info(f"Updating Registration: {registration_id}")
         try:
+            new_ticket = None
             if "ticket_id" in validated_data:
-                get_object_or_404(Ticket, pk=validated_data["ticket_id"])
+                new_ticket = get_object_or_404(Ticket.objects.select_related("event"), pk=validated_data["ticket_id"])
             if "user_id" in validated_data:
                 get_object_or_404(User, pk=validated_data["user_id"])
-            for attr, value in validated_data.items():
-                setattr(instance, attr, value)
-            instance.save()
+            moving = new_ticket is not None and new_ticket.pk != instance.ticket_id and instance.status == "active"
+            with reserved_seats({new_ticket.pk: 1} if moving else {}), transaction.atomic():
+                # As on cancellation, the old seat goes straight to its waitlist; only if nobody waits is it restocked
+                if moving and hand_to_waitlist(instance.ticket) is not None:
+                    claim_seats(new_ticket)
+                elif moving:
+                    move_seat(instance.ticket, new_ticket)
+                for attr, value in validated_data.items():
+                    setattr(instance, attr, value)
+                if new_ticket is not None:
+                    instance.ticket = new_ticket
+                instance.save()
             logger.info(f"Registration updated successfully: {registration_id}")
             return instance
+        except serializers.ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error updating Registration {registration_id}: {e}", exc_info=True)
             raise
+
+
+class TicketHoldSerializer(serializers.Serializer):
+    ticket_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1, max_value=10, default=1)
+
+    def validate(self, attrs):
+        ticket_id = attrs.get("ticket_id")
+        logger.info(f"Validating TicketHold: ticket_id={ticket_id}, quantity={attrs.get('quantity')}")
+        meta = get_ticket_meta(ticket_id)
+        if meta is None:
+            logger.warning(f"TicketHold validation failed: ticket {ticket_id} not found")
+            raise serializers.ValidationError("Ticket not found.")
+        now = timezone.now().timestamp()
+        if not (meta["sales_start"] <= now <= meta["sales_end"]):
+            logger.warning(f"TicketHold validation failed: ticket {ticket_id} is not on sale")
+            raise serializers.ValidationError("Ticket sales are closed.")
+        _require_admission(self.context.get("request"), meta)
+        return attrs
+
+
+class BulkRegistrationItemSerializer(serializers.Serializer):
+    user_id = serializers.UUIDField()
+    ticket_id = serializers.UUIDField()
+
+
+class BulkRegistrationSerializer(serializers.Serializer):
+    registrations = BulkRegistrationItemSerializer(many=True, allow_empty=False, max_length=500)
+
+    def validate(self, attrs):
+        items = attrs["registrations"]
+        logger.info(f"Validating bulk Registration: {len(items)} items")
+        try:
+            user_ids = {item["user_id"] for item in items}
+            ticket_ids = {item["ticket_id"] for item in items}
+            for ticket_id in ticket_ids:
+                meta = get_ticket_meta(ticket_id)
+                if meta is not None:
+                    _require_admission(self.context.get("request"), meta)
+            users = User.objects.in_bulk(user_ids)
+            tickets = Ticket.objects.select_related("event").in_bulk(ticket_ids)
+
+            missing_users = user_ids - users.keys()
+            if missing_users:
+                logger.warning(f"Bulk Registration validation failed: unknown users {missing_users}")
+                raise serializers.ValidationError(f"Users not found: {', '.join(map(str, missing_users))}")
+            missing_tickets = ticket_ids - tickets.keys()
+            if missing_tickets:
+                logger.warning(f"Bulk Registration validation failed: unknown tickets {missing_tickets}")
+                raise serializers.ValidationError(f"Tickets not found: {', '.join(map(str, missing_tickets))}")
+            if len({ticket.event_id for ticket in tickets.values()}) > 1:
+                logger.warning("Bulk Registration validation failed: tickets span several events")
+                raise serializers.ValidationError("All tickets in a bulk registration must belong to the same event.")
+
+            now = timezone.now()
+            counts = Counter(item["ticket_id"] for item in items)
+            for ticket_id, count in counts.items():
+                ticket = tickets[ticket_id]
+                if not (ticket.sales_start <= now <= ticket.sales_end):
+                    logger.warning(f"Bulk Registration validation failed: ticket {ticket_id} is not on sale")
+                    raise serializers.ValidationError(f"Ticket sales are closed for ticket {ticket_id}.")
+                if ticket.sold + count > ticket.quota:
+                    logger.warning(f"Bulk Registration validation failed: ticket {ticket_id} lacks {count} seats")
+                    raise serializers.ValidationError(f"Not enough seats left on ticket {ticket_id}.")
+
+            attrs["_users"] = users
+            attrs["_tickets"] = tickets
+            attrs["_counts"] = counts
+            logger.info(f"Bulk Registration validation successful: {len(items)} items")
+            return attrs
+        except serializers.ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error validating bulk Registration: {e}", exc_info=True)
+            raise
+
+    def create(self, validated_data):
+        users = validated_data["_users"]
+        tickets = validated_data["_tickets"]
+        counts = validated_data["_counts"]
+        items = validated_data["registrations"]
+        logger.info(f"Creating bulk Registration: {len(items)} items over {len(counts)} tickets")
+        try:
+            with reserved_seats(counts), transaction.atomic():
+                # Lock tickets in a stable order, then the event once for the whole batch
+                for ticket_id in sorted(counts, key=str):
+                    claim_ticket_seats(tickets[ticket_id], counts[ticket_id])
+                claim_event_seats(next(iter(tickets.values())).event_id, len(items))
+                registrations = Registration.objects.bulk_create(
+                    [Registration(user=users[item["user_id"]], ticket=tickets[item["ticket_id"]]) for item in items]
+                )
+                bump_collection_version(Registration)
+                recipients = [[r.user.email, r.user.username, str(r.id), r.user.locale] for r in registrations]
+                chunk_size = settings.EMAIL_BATCH_SIZE
+                enqueue_tasks(
+                    SEND_TICKET_EMAILS_TASK,
+                    [[recipients[start : start + chunk_size]] for start in range(0, len(recipients), chunk_size)],
+                )
+            logger.info(f"Bulk Registration created successfully: {len(registrations)} registrations")
+            return registrations
+        except serializers.ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating bulk Registration: {e}", exc_info=True)
+            raise
+
+
+class WaitlistJoinSerializer(serializers.Serializer):
+    ticket_id = serializers.UUIDField()
+
+    def validate(self, attrs):
+        ticket_id = attrs.get("ticket_id")
+        logger.info(f"Validating WaitlistJoin: ticket_id={ticket_id}")
+        ticket = get_object_or_404(Ticket, pk=ticket_id)
+        if ticket.sold < ticket.quota:
+            logger.warning(f"WaitlistJoin validation failed: ticket {ticket_id} still has seats")
+            raise serializers.ValidationError("Ticket still has seats available, register instead.")
+        attrs["_ticket_obj"] = ticket
+        return attrs
+
+
+class CheckInSerializer(serializers.Serializer):
+    token = serializers.CharField(max_length=200)
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from common.redis_client import get_redis_client
+from tickets.models import Ticket
+from .inventory import INVENTORY_KEY, release_event_seats
+from loguru import logger
+
+
+def _drop_inventory(ticket_id):
+    try:
+        get_redis_client().delete(INVENTORY_KEY.format(ticket_id))
+    except Exception as e:
+        logger.warning(f"Could not drop the Redis inventory of ticket {ticket_id}: {e}")
+
+
+@receiver([post_save, post_delete], sender=Ticket, dispatch_uid="ticket_inventory_reseed")
+def reseed_ticket_inventory(sender, instance, created=False, **kwargs):
+    # A quota edit changes the seats left; the next hold or claim reseeds the counter from PostgreSQL
+    if not created:
+        transaction.on_commit(lambda: _drop_inventory(instance.pk))
+
+
+@receiver(pre_delete, sender=Ticket, dispatch_uid="ticket_release_event_seats")
+def release_deleted_ticket_seats(sender, instance, **kwargs):
+    # Registrations cascade with the ticket; its sold seats go back to the event in the same transaction
+    sold = Ticket.objects.select_for_update().filter(pk=instance.pk).values_list("sold", flat=True).first()
+    if sold:
+        release_event_seats(instance.event_id, sold)
+        logger.info(f"Released {sold} seat(s) of deleted ticket {instance.pk} from event {instance.event_id}")
@@ -1,83 +1,139 @@
-from datetime import timedelta, timezone
 from celery import shared_task
-from django.core.mail import EmailMultiAlternatives
-
-from events.models import Event
-from registrations.models import Registration
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from accounts.models import User
+from events.models import Event, ScheduledReminder
+from registrations.checkin import flush_checkins
+from registrations.digest import buffer_digest_notifications, flush_due_digests
+from registrations.emails import (
+    EVENT_REMINDER,
+    TICKET_CONFIRMATION,
+    TICKET_DIGEST,
+    reminder_offset_context,
+    render_email,
+    render_emails,
+)
+from registrations.holds import release_expired_holds, sync_inventory
+from registrations.models import Registration, ReminderLog
+from common.mail import EMAIL_TASK_OPTIONS, send_with_retry
+from common.outbox import enqueue_task
+from registrations.waitlist import promote_next
+from tickets.models import Ticket
 
 from django.utils.dateparse import parse_datetime
 from loguru import logger
 
 
-@shared_task
-def send_ticket_email(user_email, username, registration_id):
+def build_ticket_email(user_email, username, registration_id, locale=None):
+    return render_email(
+        TICKET_CONFIRMATION, user_email, {"username": username, "registration_id": registration_id}, locale
+    )
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+def send_ticket_email(self, user_email, username, registration_id, locale=None):
     logger.info(
         f"Starting send_ticket_email task: registration_id={registration_id}, email={user_email}, username={username}"
     )
 
+    if buffer_digest_notifications([registration_id]):
+        logger.info(f"Registration {registration_id} buffered for the digest of {user_email}")
+        return "Buffered ticket email for digest"
+
     try:
-        subject = f"Konfirmasi Registrasi Event"
-
-        text_content = f"""Halo {username},
- 
-    Terima kasih telah melakukan registrasi event!
- 
-    Berikut adalah detail pemesanan tiket Anda:
- 
-    ID Pemesanan: {registration_id}
- 
-    Silakan datang ke event 30 menit sebelum event dimulai untuk melakukan pembayaran.
- 
-    Kami tunggu kedatangan Anda, selamat menikmati event!
- 
-    Terima kasih,
-    Tim Dico Event
- 
-    Pesan ini dikirim secara otomatis. Mohon tidak membalas pesan ini.
-    """
+        logger.info(f"Preparing email for registration {registration_id} to {user_email}")
+        email = build_ticket_email(user_email, username, registration_id, locale)
+    except Exception as e:
+        logger.error(
+            f"Error building ticket email to {user_email} for registration {registration_id}: {e}", exc_info=True
+        )
+        raise
 
-        # HTML formatted version
-        html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; color: #333;">
-                <div style="max-width: 600px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
-                    <h2 style="color: #E50914; text-align: center;">Konfirmasi Registrasi Event</h2>
-                    <p>Halo <strong>{username}</strong>,</p>
-                    <p>Terima kasih telah melakukan registrasi event di <strong>Dico Event</strong>!</p>
-                    <p><strong>Detail Registrasi Anda:</strong></p>
-                    <p style="background-color: #f8f8f8; padding: 10px; border-radius: 5px;">
-                        <strong>ID Registrasi:</strong> {registration_id}
-                    </p>
-                    <p>Silakan datang <strong>30 menit sebelum event dimulai</strong> untuk melakukan pembayaran.</p>
-                    <p>Kami tunggu kedatangan Anda, selamat menikmati event!</p>
-                    <br>
-                    <p style="font-size: 12px; color: #777; text-align: center;">
-                        Pesan ini dikirim secara otomatis. Mohon tidak membalas pesan ini.
-                    </p>
-                    <p style="font-size: 12px; color: #777; text-align: center;">
-                        <strong>Dico Event Team</strong>
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
+    sent = send_with_retry(self, [email], lambda failed: (user_email, username, registration_id, locale))
+    logger.info(f"Ticket email to {user_email} for registration {registration_id}: {sent}/1 sent")
+    return f"Sent {sent} ticket emails"
 
-        logger.info(f"Preparing email for registration {registration_id} to {user_email}")
-        email = EmailMultiAlternatives(subject, text_content, "no-reply@dicoevent.com", [user_email])
-        email.attach_alternative(html_content, "text/html")
-        email.send()
 
-        logger.info(f"Email sent successfully to {user_email} for registration {registration_id}")
-        return f"Email sent to {user_email}"
+@shared_task(**EMAIL_TASK_OPTIONS)
+def send_ticket_emails(self, recipients):
+    """Send confirmation emails to ``[user_email, username, registration_id, locale]`` lists over one connection."""
+    logger.info(f"Starting send_ticket_emails task: {len(recipients)} recipients")
+
+    buffered = buffer_digest_notifications([registration_id for _, _, registration_id in recipients])
+    if buffered:
+        recipients = [recipient for recipient in recipients if str(recipient[2]) not in buffered]
+        logger.info(f"Buffered {len(buffered)} ticket emails for digests, sending {len(recipients)} now")
+        if not recipients:
+            return "Buffered ticket emails for digest"
+
+    try:
+        messages = render_emails(
+            TICKET_CONFIRMATION,
+            [
+                (user_email, {"username": username, "registration_id": registration_id}, *locale)
+                for user_email, username, registration_id, *locale in recipients
+            ],
+        )
     except Exception as e:
-        logger.error(
-            f"Error sending ticket email to {user_email} for registration {registration_id}: {e}", exc_info=True
+        logger.error(f"Error building batch of {len(recipients)} ticket emails: {e}", exc_info=True)
+        raise
+
+    sent = send_with_retry(self, messages, lambda failed: ([recipients[index] for index in failed],))
+    logger.info(f"Ticket emails sent: {sent}/{len(messages)}")
+    return f"Sent {sent} ticket emails"
+
+
+def build_ticket_digest_email(user_email, username, registrations, locale=None):
+    return render_email(TICKET_DIGEST, user_email, {"username": username, "registrations": registrations}, locale)
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+def send_ticket_digest(self, user_id, registration_ids):
+    """Send one confirmation email covering every buffered registration of a digest-mode user."""
+    logger.info(f"Starting send_ticket_digest task: user_id={user_id}, {len(registration_ids)} registrations")
+
+    try:
+        user = User.objects.only("email", "username", "locale").get(pk=user_id)
+        registrations = list(
+            Registration.objects.filter(pk__in=registration_ids, status="active")
+            .select_related("ticket__event")
+            .order_by("registered_at")
         )
+        if not registrations:
+            logger.info(f"No active registrations left for the digest of user {user_id}")
+            return "Nothing to send"
+        email = build_ticket_digest_email(user.email, user.username, registrations, user.locale)
+    except Exception as e:
+        logger.error(f"Error building ticket digest for user {user_id}: {e}", exc_info=True)
         raise
 
+    sent = send_with_retry(self, [email], lambda failed: (user_id, registration_ids))
+    logger.info(f"Ticket digest for user {user_id} with {len(registrations)} registrations: {sent}/1 sent")
+    return f"Sent {sent} ticket digests"
+
 
 @shared_task
-def send_event_reminder_email(user_email, username, event_start_time_str):
+def flush_ticket_digests():
+    logger.info("Starting flush_ticket_digests task")
+
+    try:
+        flushed = flush_due_digests()
+        return f"Flushed {flushed} ticket digests"
+    except Exception as e:
+        logger.error(f"Error in flush_ticket_digests task: {e}", exc_info=True)
+        raise
+
+
+def build_event_reminder_email(user_email, username, event_start_time, offset_minutes=120, locale=None):
+    context = {"username": username, "start_time": event_start_time, **reminder_offset_context(offset_minutes)}
+    return render_email(EVENT_REMINDER, user_email, context, locale)
+
+
+@shared_task(rate_limit=settings.BULK_EMAIL_RATE_LIMIT, **EMAIL_TASK_OPTIONS)
+def send_event_reminder_email(self, user_email, username, event_start_time_str, offset_minutes=120, locale=None):
     logger.info(
         f"Starting send_event_reminder_email task: email={user_email}, username={username}, event_start_time={event_start_time_str}"
     )
@@ -87,113 +143,204 @@ def send_event_reminder_email(user_email, username, event_start_time_str):
         if not event_start_time:
             raise ValueError(f"Invalid event_start_time format: {event_start_time_str}")
 
-        subject = f"Pengingat: Event Dimulai dalam 2 Jam"
+        logger.info(f"Preparing reminder email for {user_email}, event starts at {event_start_time}")
+        email = build_event_reminder_email(user_email, username, event_start_time, offset_minutes, locale)
+    except Exception as e:
+        logger.error(f"Error building reminder email to {user_email}: {e}", exc_info=True)
+        raise
+
+    sent = send_with_retry(
+        self, [email], lambda failed: (user_email, username, event_start_time_str, offset_minutes, locale)
+    )
+    logger.info(f"Reminder email to {user_email}: {sent}/1 sent")
+    return f"Sent {sent} reminder emails"
 
-        formatted_time = event_start_time.strftime("%d %B %Y, pukul %H:%M WIB")
 
-        text_content = f"""Halo {username},
+@shared_task(rate_limit=settings.BULK_EMAIL_RATE_LIMIT, **EMAIL_TASK_OPTIONS)
+def send_event_reminder_emails(self, recipients, event_start_time_str, offset_minutes=120):
+    """Send reminders for ``[user_email, username, locale]`` recipients over one SMTP connection."""
+    logger.info(f"Starting send_event_reminder_emails task: {len(recipients)} recipients")
 
-    Ini adalah pengingat bahwa event yang Anda daftarkan akan dimulai dalam 2 jam!
+    try:
+        event_start_time = parse_datetime(event_start_time_str)
+        if not event_start_time:
+            raise ValueError(f"Invalid event_start_time format: {event_start_time_str}")
 
-    - Waktu Mulai: {formatted_time}
+        messages = render_emails(
+            EVENT_REMINDER,
+            [(email, {"username": username}, *locale) for email, username, *locale in recipients],
+            {"start_time": event_start_time, **reminder_offset_context(offset_minutes)},
+        )
+    except Exception as e:
+        logger.error(f"Error building batch of {len(recipients)} reminder emails: {e}", exc_info=True)
+        raise
 
-    Silakan datang 30 menit sebelum event dimulai untuk melakukan pembayaran dan check-in.
+    sent = send_with_retry(
+        self,
+        messages,
+        lambda failed: ([recipients[index] for index in failed], event_start_time_str, offset_minutes),
+    )
+    logger.info(f"Reminder emails sent: {sent}/{len(messages)}")
+    return f"Sent {sent} reminder emails"
 
-    Kami tunggu kedatangan Anda!
 
-    Terima kasih,
-    Tim Dico Event
+def iter_reminder_chunks(event_id, reminder_type, chunk_size):
+    """Yield ``(id, email, username, locale)`` rows of an event's unreminded registrations, ``chunk_size`` at a time.
 
-    Pesan ini dikirim secara otomatis. Mohon tidak membalas pesan ini.
+    Uses keyset pagination on the primary key so each chunk is an index range scan and memory
+    stays flat regardless of attendee count. Registrations already in the reminder ledger are
+    dropped with a NOT EXISTS anti-join served by the ledger's unique index.
     """
+    already_reminded = ReminderLog.objects.filter(registration=OuterRef("pk"), reminder_type=reminder_type)
+    registrations = (
+        Registration.objects.filter(ticket__event_id=event_id, status="active")
+        .filter(~Exists(already_reminded))
+        .order_by("id")
+    )
+    after_id = None
+    while True:
+        page = registrations.filter(id__gt=after_id) if after_id else registrations
+        rows = list(page.values_list("id", "user__email", "user__username", "user__locale")[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+_CLAIM_REMINDERS_SQL = """
+INSERT INTO reminder_logs (id, registration_id, reminder_type, created_at)
+SELECT gen_random_uuid(), registration_id, %s, now()
+FROM unnest(%s::uuid[]) AS registration_id
+ON CONFLICT (registration_id, reminder_type) DO NOTHING
+RETURNING registration_id
+"""
+
+
+def claim_reminders(registration_ids, reminder_type):
+    """Insert ledger rows for ``registration_ids`` and return the ids whose row this call inserted.
+
+    A concurrent job inserting the same rows waits on the unique index until this transaction
+    ends and then gets none of them back, so only one job ever sends a given reminder.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _CLAIM_REMINDERS_SQL, [reminder_type, [str(registration_id) for registration_id in registration_ids]]
+        )
+        return {str(row[0]) for row in cursor.fetchall()}
+
+
+@shared_task(bind=True)
+def send_event_reminders(self, event_id, offset_minutes):
+    logger.info(f"Starting send_event_reminders task: event_id={event_id}, offset_minutes={offset_minutes}")
+
+    try:
+        # Rescheduled or cancelled events drop their ScheduledReminder rows; skip stale jobs
+        scheduled = ScheduledReminder.objects.filter(task_id=self.request.id, event_id=event_id)
+        if not scheduled.exists():
+            logger.info(f"Reminder job {self.request.id} for event {event_id} is no longer scheduled, skipping")
+            return f"Skipped stale reminder job for event {event_id}"
+
+        event = Event.objects.only("id", "name", "start_time", "status").get(pk=event_id)
+        if event.status != "scheduled":
+            logger.info(f"Event {event_id} is {event.status}, skipping reminders")
+            return f"Skipped reminders for {event.status} event {event_id}"
+
+        # Keyed by the start time as well, so a rescheduled event reminds again at an offset already sent
+        reminder_type = f"event_start_{offset_minutes}m@{int(event.start_time.timestamp())}"
+        chunk_size = settings.EMAIL_BATCH_SIZE
+        sent_count = 0
 
-        html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; color: #333;">
-                <div style="max-width: 600px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
-                    <h2 style="color: #E50914; text-align: center;">⏰ Pengingat Event</h2>
-                    <p>Halo <strong>{username}</strong>,</p>
-                    <p>Ini adalah pengingat bahwa event yang Anda daftarkan akan dimulai dalam <strong>2 jam</strong>!</p>
-                    
-                    <div style="background-color: #f8f8f8; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                        <p><strong>Detail Event:</strong></p>
-                        <p><strong>Waktu Mulai:</strong> {formatted_time}</p>
-                    </div>
-                    
-                    <p>Silakan datang <strong>30 menit sebelum event dimulai</strong> untuk melakukan pembayaran dan check-in.</p>
-                    <p>Kami tunggu kedatangan Anda! 🎉</p>
-                    
-                    <br>
-                    <p style="font-size: 12px; color: #777; text-align: center;">
-                        Pesan ini dikirim secara otomatis. Mohon tidak membalas pesan ini.
-                    </p>
-                    <p style="font-size: 12px; color: #777; text-align: center;">
-                        <strong>Dico Event Team</strong>
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
-
-        logger.info(f"Preparing reminder email for {user_email}, event starts at {formatted_time}")
-        email = EmailMultiAlternatives(subject, text_content, "no-reply@dicoevent.com", [user_email])
-        email.attach_alternative(html_content, "text/html")
-        email.send()
-
-        logger.info(f"Reminder email sent successfully to {user_email}")
-        return f"Reminder email sent to {user_email}"
+        for chunk_number, rows in enumerate(iter_reminder_chunks(event.id, reminder_type, chunk_size), start=1):
+            # Ledger rows and the send task commit together, so a redelivered or restarted job
+            # skips these registrations and a crash never marks unsent reminders as sent. Only the
+            # rows this job inserted are sent: an overlapping job reading the same page gets none.
+            with transaction.atomic():
+                claimed = claim_reminders([row[0] for row in rows], reminder_type)
+                recipients = [
+                    [email, username, locale]
+                    for registration_id, email, username, locale in rows
+                    if str(registration_id) in claimed
+                ]
+                if recipients:
+                    enqueue_task(
+                        "registrations.task.send_event_reminder_emails",
+                        recipients,
+                        event.start_time.isoformat(),
+                        offset_minutes,
+                    )
+            sent_count += len(recipients)
+            logger.info(
+                f"Event {event.id}: queued reminder chunk {chunk_number} "
+                f"({len(recipients)} of {len(rows)} recipients claimed, {sent_count} total)"
+            )
+
+        scheduled.delete()
+        result = f"Queued {sent_count} reminders for event {event_id} ({offset_minutes}m before start)"
+        logger.info(result)
+        return result
     except Exception as e:
-        logger.error(f"Error sending reminder email to {user_email}: {e}", exc_info=True)
+        logger.error(f"Error in send_event_reminders task for event {event_id}: {e}", exc_info=True)
         raise
 
 
 @shared_task
-def send_event_reminders():
-    logger.info("Starting send_event_reminders scheduled task")
-
+def release_expired_ticket_holds():
+    logger.info("Starting release_expired_ticket_holds scheduled task")
     try:
-        now = timezone.now()
-        two_hours_from_now = now + timedelta(hours=2)
-
-        time_window_start = two_hours_from_now - timedelta(minutes=15)
-        time_window_end = two_hours_from_now + timedelta(minutes=15)
-
-        logger.info(f"Checking for events starting between {time_window_start} and {time_window_end}")
+        returned = release_expired_holds()
+        result = f"Returned {returned} seats from expired holds"
+        logger.info(result)
+        return result
+    except Exception as e:
+        logger.error(f"Error in release_expired_ticket_holds task: {e}", exc_info=True)
+        raise
 
-        upcoming_events = Event.objects.filter(
-            start_time__gte=time_window_start,
-            start_time__lte=time_window_end,
-            status="scheduled",
-        ).select_related("organizer")
 
-        event_count = upcoming_events.count()
-        logger.info(f"Found {event_count} upcoming events in the time window")
+@shared_task
+def sync_ticket_inventory():
+    """Seed the Redis inventory counters lost to a Redis restart or eviction from the registrations table."""
+    logger.info("Starting sync_ticket_inventory task")
+    try:
+        tickets = (
+            Ticket.objects.filter(sales_end__gte=timezone.now())
+            .annotate(registered=Count("registrations", filter=Q(registrations__status="active")))
+            .values_list("id", "quota", "registered")
+        )
+        counters = [(ticket_id, max(quota - registered, 0)) for ticket_id, quota, registered in tickets]
+        seeded = sync_inventory(counters)
+        result = f"Seeded missing inventory for {seeded} of {len(counters)} tickets"
+        logger.info(result)
+        return result
+    except Exception as e:
+        logger.error(f"Error in sync_ticket_inventory task: {e}", exc_info=True)
+        raise
 
-        sent_count = 0
 
-        for event in upcoming_events:
-            logger.info(f"Processing event {event.id}: {event.name}, start_time: {event.start_time}")
-            registrations = Registration.objects.filter(ticket__event=event).select_related("user")
-            registration_count = registrations.count()
-            logger.info(f"Found {registration_count} registrations for event {event.id}")
-
-            for registration in registrations:
-                try:
-                    send_event_reminder_email.delay(
-                        registration.user.email,
-                        registration.user.username,
-                        event.start_time.isoformat(),
-                    )
-                    sent_count += 1
-                    logger.debug(
-                        f"Queued reminder email for registration {registration.id}, user: {registration.user.email}"
-                    )
-                except Exception as e:
-                    logger.error(f"Error queuing reminder email for registration {registration.id}: {e}", exc_info=True)
+@shared_task
+def promote_waitlist(ticket_id):
+    logger.info(f"Starting promote_waitlist task: ticket_id={ticket_id}")
+    try:
+        ticket = Ticket.objects.select_related("event").get(pk=ticket_id)
+        registration = promote_next(ticket)
+        if registration is None:
+            logger.info(f"No waitlisted user promoted for ticket {ticket_id}")
+            return f"No promotion for ticket {ticket_id}"
 
-        result = f"Processed {event_count} events, sent {sent_count} reminders"
+        result = f"Promoted user {registration.user_id} to registration {registration.id}"
         logger.info(result)
         return result
     except Exception as e:
-        logger.error(f"Error in send_event_reminders task: {e}", exc_info=True)
+        logger.error(f"Error in promote_waitlist task for ticket {ticket_id}: {e}", exc_info=True)
+        raise
+
+
+@shared_task
+def flush_registration_checkins():
+    try:
+        flushed = flush_checkins()
+        if flushed:
+            logger.info(f"Persisted {flushed} check-ins")
+        return flushed
+    except Exception as e:
+        logger.error(f"Error in flush_registration_checkins task: {e}", exc_info=True)
         raise
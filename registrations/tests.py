@@ -1,3 +1,408 @@
-from django.test import TestCase
+import threading
+import time
+import unittest
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import AssignRole, Group, User
+from common.models import OutboxMessage
+from common.permissions import invalidate_checkin_event, invalidate_checkin_roles
+from common.redis_client import get_redis_client
+from events.models import Event
+from tickets.models import Ticket
+from events.waitingroom import issue_admission_token
+from .checkin import CHECKED_IN_KEY, PENDING_KEY, make_checkin_token
+from .holds import HOLD_EXPIRY_KEY, TICKET_META_KEY, get_ticket_meta, sync_inventory
+from .inventory import INVENTORY_KEY
+from .models import Registration, ReminderLog, WaitlistEntry
+from .emails import TICKET_CONFIRMATION, render_emails
+from .serializers import SEND_TICKET_EMAIL_TASK, BulkRegistrationSerializer, RegistrationSerializer
+from .task import claim_reminders, iter_reminder_chunks
+from .views import RegistrationViewSet
+from .waitlist import WAITLIST_KEY
+
+
+# Needs a database with row-level locking; SQLite serialises writers with table locks instead
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """Many simultaneous registrations for the last seats of a ticket must not oversell it."""
+
+    attempts = 20
+    quota = 5
+
+    def setUp(self):
+        now = timezone.now()
+        organizer = User.objects.create(username="organizer", email="organizer@example.com")
+        self.event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=organizer,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event,
+            name="Regular",
+            price=100000,
+            sales_start=now - timedelta(days=1),
+            sales_end=now + timedelta(days=1),
+            quota=self.quota,
+        )
+        self.addCleanup(get_redis_client().delete, INVENTORY_KEY.format(self.ticket.id))
+        self.users = [
+            User.objects.create(username=f"attendee{i}", email=f"attendee{i}@example.com") for i in range(self.attempts)
+        ]
+
+    def _register(self, user, barrier, outcomes):
+        try:
+            barrier.wait()
+            serializer = RegistrationSerializer(data={"user_id": str(user.id), "ticket_id": str(self.ticket.id)})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            outcomes.append("created")
+        except serializers.ValidationError:
+            outcomes.append("rejected")
+        except Exception as e:
+            outcomes.append(e)
+        finally:
+            # Each thread has its own connection; leave none open for the test database teardown
+            connection.close()
+
+    def test_concurrent_creates_never_oversell(self):
+        barrier = threading.Barrier(self.attempts, timeout=10)
+        outcomes = []
+        threads = [threading.Thread(target=self._register, args=(user, barrier, outcomes)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads), "Registration threads deadlocked or timed out")
+        self.assertEqual([outcome for outcome in outcomes if outcome not in ("created", "rejected")], [])
+        self.assertEqual(outcomes.count("created"), self.quota)
+        self.assertEqual(outcomes.count("rejected"), self.attempts - self.quota)
+
+        self.ticket.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.ticket.sold, self.quota)
+        self.assertEqual(self.event.sold, self.quota)
+        self.assertEqual(Registration.objects.filter(ticket=self.ticket, status="active").count(), self.quota)
+
+
+class AdmissionTokenTests(TestCase):
+    """Registrations for a waiting-room event are refused without an admission token, before any query."""
+
+    def setUp(self):
+        now = timezone.now()
+        self.user = User.objects.create(username="attendee", email="attendee@example.com")
+        event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            admission_rate=10,
+            category="music",
+            organizer=self.user,
+        )
+        self.ticket = Ticket.objects.create(
+            event=event,
+            name="Regular",
+            price=100000,
+            sales_start=now - timedelta(days=1),
+            sales_end=now + timedelta(days=1),
+            quota=10,
+        )
+        self.addCleanup(cache.delete, TICKET_META_KEY.format(self.ticket.id))
+        get_ticket_meta(self.ticket.id)
+
+    def _request(self, token=None):
+        headers = {"HTTP_X_ADMISSION_TOKEN": token} if token else {}
+        request = APIRequestFactory().post("/api/registrations/", **headers)
+        request.user = self.user
+        return request
+
+    def test_unadmitted_registration_is_refused_without_queries(self):
+        data = {"user_id": str(self.user.id), "ticket_id": str(self.ticket.id)}
+        with self.assertNumQueries(0):
+            single = RegistrationSerializer(data=data, context={"request": self._request()})
+            self.assertFalse(single.is_valid())
+            bulk = BulkRegistrationSerializer(data={"registrations": [data]}, context={"request": self._request()})
+            self.assertFalse(bulk.is_valid())
+        for serializer in (single, bulk):
+            self.assertIn("A valid admission token is required for this event.", str(serializer.errors))
+
+    def test_admitted_registration_passes_validation(self):
+        token = issue_admission_token(self.ticket.event_id, self.user.id)
+        data = {"user_id": str(self.user.id), "ticket_id": str(self.ticket.id)}
+        self.assertTrue(RegistrationSerializer(data=data, context={"request": self._request(token)}).is_valid())
+        bulk = BulkRegistrationSerializer(data={"registrations": [data]}, context={"request": self._request(token)})
+        self.assertTrue(bulk.is_valid(), bulk.errors)
+
+
+class SyncInventoryTests(TestCase):
+    def setUp(self):
+        self.redis = get_redis_client()
+        self.live, self.lost = str(uuid.uuid4()), str(uuid.uuid4())
+        keys = [INVENTORY_KEY.format(self.live), INVENTORY_KEY.format(self.lost), HOLD_EXPIRY_KEY.format(self.lost)]
+        self.addCleanup(self.redis.delete, *keys)
+
+    def test_only_missing_counters_are_seeded(self):
+        # A claim in flight has taken a seat from Redis that PostgreSQL does not show as sold yet
+        self.redis.set(INVENTORY_KEY.format(self.live), 4)
+        self.redis.zadd(HOLD_EXPIRY_KEY.format(self.lost), {"hold:2": time.time() + 600})
+
+        self.assertEqual(sync_inventory([(self.live, 5), (self.lost, 5)]), 1)
+        self.assertEqual(self.redis.get(INVENTORY_KEY.format(self.live)), "4")
+        self.assertEqual(self.redis.get(INVENTORY_KEY.format(self.lost)), "3")
+
+
+class TicketMoveTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.user = User.objects.create(username="attendee", email="attendee@example.com")
+        self.waiting = User.objects.create(username="waiting", email="waiting@example.com")
+        self.event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            sold=1,
+            category="music",
+            organizer=self.user,
+        )
+        ticket = {"event": self.event, "price": 100000, "sales_start": now, "sales_end": now + timedelta(days=1)}
+        self.old = Ticket.objects.create(name="VIP", quota=1, sold=1, **ticket)
+        self.new = Ticket.objects.create(name="Regular", quota=5, **ticket)
+        self.registration = Registration.objects.create(user=self.user, ticket=self.old)
+        WaitlistEntry.objects.create(ticket=self.old, user=self.waiting)
+
+        self.redis = get_redis_client()
+        self.redis.set(INVENTORY_KEY.format(self.old.id), 0)
+        self.redis.set(INVENTORY_KEY.format(self.new.id), 5)
+        self.addCleanup(
+            self.redis.delete,
+            INVENTORY_KEY.format(self.old.id),
+            INVENTORY_KEY.format(self.new.id),
+            WAITLIST_KEY.format(self.old.id),
+        )
+
+    def test_moving_away_hands_the_old_seat_to_the_waitlist(self):
+        serializer = RegistrationSerializer(self.registration, data={"ticket_id": str(self.new.id)}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+
+        self.assertTrue(Registration.objects.filter(user=self.waiting, ticket=self.old, status="active").exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        # The freed seat never went back on sale
+        self.assertEqual(self.redis.get(INVENTORY_KEY.format(self.old.id)), "0")
+        self.assertEqual(self.redis.get(INVENTORY_KEY.format(self.new.id)), "4")
+        for counter, sold in ((self.old, 1), (self.new, 1), (self.event, 2)):
+            counter.refresh_from_db()
+            self.assertEqual(counter.sold, sold)
+
+
+@override_settings(EMAIL_DEFAULT_LOCALE="id")
+class EmailLocaleTests(TestCase):
+    def test_each_recipient_gets_their_own_locale(self):
+        context = {"username": "attendee", "registration_id": "1"}
+        messages = render_emails(
+            TICKET_CONFIRMATION,
+            [("en@example.com", context, "en"), ("id@example.com", context, "id"), ("unset@example.com", context, "")],
+        )
+        self.assertEqual(
+            [message.to for message in messages], [["en@example.com"], ["id@example.com"], ["unset@example.com"]]
+        )
+        self.assertEqual(
+            [message.subject for message in messages],
+            ["Event Registration Confirmation", "Konfirmasi Registrasi Event", "Konfirmasi Registrasi Event"],
+        )
+
+    def test_ticket_email_is_queued_with_the_user_locale(self):
+        now = timezone.now()
+        user = User.objects.create(username="attendee", email="attendee@example.com", locale="en")
+        event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=user,
+        )
+        ticket = Ticket.objects.create(
+            event=event, name="Regular", price=100000, sales_start=now, sales_end=now + timedelta(days=1), quota=5
+        )
+        self.addCleanup(get_redis_client().delete, INVENTORY_KEY.format(ticket.id))
+        serializer = RegistrationSerializer(data={"user_id": str(user.id), "ticket_id": str(ticket.id)})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        registration = serializer.save()
+
+        message = OutboxMessage.objects.get(task_name="registrations.task.send_ticket_email")
+        self.assertEqual(message.args, [user.email, user.username, str(registration.id), "en"])
+
+
+class CheckInPermissionTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        organizers = Group.objects.create(name="organizer")
+        self.organizer = User.objects.create(username="organizer", email="organizer@example.com")
+        self.other = User.objects.create(username="other", email="other@example.com")
+        self.role = AssignRole.objects.create(user=self.organizer, group=organizers)
+        AssignRole.objects.create(user=self.other, group=organizers)
+        event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=self.organizer,
+        )
+        registration_id = uuid.uuid4()
+        self.token = make_checkin_token(registration_id, event.id)
+        redis = get_redis_client()
+        self.addCleanup(redis.delete, CHECKED_IN_KEY.format(event.id))
+        self.addCleanup(
+            lambda: [
+                redis.lrem(PENDING_KEY, 0, item)
+                for item in redis.lrange(PENDING_KEY, 0, -1)
+                if item.startswith(str(registration_id))
+            ]
+        )
+        self.addCleanup(invalidate_checkin_roles, self.organizer.id, self.other.id)
+        self.addCleanup(invalidate_checkin_event, event.id)
+
+    def _scan(self, user):
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return api.post("/api/checkin/", {"token": self.token}, format="json")
+
+    def test_organizers_check_in_only_to_their_own_events(self):
+        self.assertEqual(self._scan(self.other).status_code, 403)
+        self.assertEqual(self._scan(self.organizer).status_code, 200)
+
+    def test_revoked_role_stops_working_at_once(self):
+        self.assertEqual(self._scan(self.organizer).status_code, 200)
+        self.role.delete()
+        self.assertEqual(self._scan(self.organizer).status_code, 403)
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "The ledger claim is PostgreSQL INSERT ... ON CONFLICT ... RETURNING"
+)
+class ReminderLedgerTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        organizer = User.objects.create(username="organizer", email="organizer@example.com")
+        self.event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(hours=2),
+            end_time=now + timedelta(hours=5),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=organizer,
+        )
+        ticket = Ticket.objects.create(
+            event=self.event, name="Regular", price=100000, sales_start=now, sales_end=now + timedelta(days=1), quota=5
+        )
+        attendees = [User.objects.create(username=f"attendee{i}", email=f"attendee{i}@example.com") for i in range(3)]
+        self.registrations = [str(Registration.objects.create(user=user, ticket=ticket).id) for user in attendees]
+
+    def test_claim_returns_only_the_rows_it_inserted(self):
+        first, second, third = self.registrations
+        self.assertEqual(claim_reminders([first, second], "event_start_120m"), {first, second})
+        # An overlapping run claims only what the first one left
+        self.assertEqual(claim_reminders(self.registrations, "event_start_120m"), {third})
+        self.assertEqual(claim_reminders(self.registrations, "event_start_120m"), set())
+        self.assertEqual(ReminderLog.objects.filter(reminder_type="event_start_120m").count(), 3)
+        # Another reminder type has a ledger of its own
+        self.assertEqual(claim_reminders([first], "event_start_30m"), {first})
+
+    def test_reminded_registrations_drop_out_of_the_chunks(self):
+        claim_reminders(self.registrations[:2], "event_start_120m")
+        rows = [row for chunk in iter_reminder_chunks(self.event.id, "event_start_120m", 1) for row in chunk]
+        self.assertEqual([str(row[0]) for row in rows], self.registrations[2:])
+
+
+class IdempotentRegistrationTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="x")
+        self.attendee = User.objects.create(username="attendee", email="attendee@example.com")
+        event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=self.admin,
+        )
+        self.ticket = Ticket.objects.create(
+            event=event, name="Regular", price=100000, sales_start=now, sales_end=now + timedelta(days=1), quota=5
+        )
+        self.key = str(uuid.uuid4())
+        self.cache_key = f"idempotency:registration:create:{self.admin.pk}:{self.key}"
+        self.addCleanup(cache.delete_many, [self.cache_key, f"{self.cache_key}:lock"])
+        self.addCleanup(cache.delete, TICKET_META_KEY.format(self.ticket.id))
+        self.addCleanup(get_redis_client().delete, INVENTORY_KEY.format(self.ticket.id))
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def _post(self, user):
+        data = {"user_id": str(user.id), "ticket_id": str(self.ticket.id)}
+        return self.api.post("/api/registrations/", data, format="json", HTTP_IDEMPOTENCY_KEY=self.key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self._post(self.attendee)
+        self.assertEqual(first.status_code, 201)
+        retry = self._post(self.attendee)
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(Registration.objects.filter(ticket=self.ticket).count(), 1)
+        self.assertEqual(OutboxMessage.objects.filter(task_name=SEND_TICKET_EMAIL_TASK).count(), 1)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self._post(self.attendee)
+        other = User.objects.create(username="other", email="other@example.com")
+        self.assertEqual(self._post(other).status_code, 422)
+        self.assertFalse(Registration.objects.filter(user=other).exists())
+
+    def test_duplicate_of_an_in_flight_request_does_not_run_the_action(self):
+        # A first request holding the key has not finished yet
+        cache.add(f"{self.cache_key}:lock", "in-flight", timeout=30)
+        with mock.patch.object(RegistrationViewSet, "idempotency_wait_timeout", 0.2):
+            response = self._post(self.attendee)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Registration.objects.exists())
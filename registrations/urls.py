@@ -1,9 +1,11 @@
 from rest_framework.routers import DefaultRouter
-from .views import RegistrationViewSet
+from .views import CheckInViewSet, RegistrationViewSet, WaitlistViewSet
 from django.urls import include, path
 
 router = DefaultRouter()
 router.register(r"registrations", RegistrationViewSet, basename="registration")
+router.register(r"waitlist", WaitlistViewSet, basename="waitlist")
+router.register(r"checkin", CheckInViewSet, basename="checkin")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,35 +1,49 @@
-from django.shortcuts import render
+from django.db import transaction
 from rest_framework import viewsets, status
-from rest_framework.pagination import PageNumberPagination, Response
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from .checkin import read_checkin_token, record_checkin, revoke_checkin
+from .holds import confirm_hold, create_hold, release_hold
 from .models import Registration
-from .serializers import RegistrationSerializer
-from common.permissions import UserPermission
+from .serializers import (
+    BulkRegistrationSerializer,
+    CheckInSerializer,
+    RegistrationSerializer,
+    TicketHoldSerializer,
+    WaitlistJoinSerializer,
+)
+from .waitlist import get_position, join_waitlist, leave_waitlist, release_to_waitlist
+from accounts.models import User
+from common.mixins import ConditionalGetMixin, IdempotentCreateMixin
+from common.pagination import EnvelopePagination
+from common.permissions import IsCheckInStaff, UserPermission
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from tickets.models import Ticket
 
-from .task import send_ticket_email
 from loguru import logger
 
 
-class RegistrationsPagination(PageNumberPagination):
-    page_size = 10
-
-    def get_paginated_response(self, data):
-        return Response(
-            {
-                "count": self.page.paginator.count,
-                "next": self.get_next_link(),
-                "previous": self.get_previous_link(),
-                "registrations": data,
-            }
-        )
+class RegistrationsPagination(EnvelopePagination):
+    results_key = "registrations"
+    cursor_ordering = ("-registered_at", "-id")
 
 
-class RegistrationViewSet(viewsets.ModelViewSet):
+class RegistrationViewSet(ConditionalGetMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     queryset = Registration.objects.select_related("user", "ticket").all().order_by("-registered_at")
     serializer_class = RegistrationSerializer
     permission_classes = [IsAuthenticated, UserPermission]
     pagination_class = RegistrationsPagination
+    idempotent_actions = ("create", "bulk", "confirm_hold")
+    conditional_list_models = (User, Ticket)
+    conditional_related_timestamps = ("user__updated_at", "ticket__updated_at")
+
+    def get_permissions(self):
+        if self.action in ("hold", "confirm_hold", "release_hold"):
+            return [IsAuthenticated()]
+        return super().get_permissions()
 
     def list(self, request, *args, **kwargs):
         logger.info(f"Registration list requested by user: {request.user.username}")
@@ -62,15 +76,7 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         )
         try:
             response = super().create(request, *args, **kwargs)
-            registration_id = response.data.get("id")
-            username = response.data.get("user")
-
-            registration = Registration.objects.select_related("user").get(id=registration_id)
-            user_email = registration.user.email
-
-            logger.info(f"Registration created successfully: {registration_id}, sending email to {user_email}")
-            send_ticket_email.delay(user_email, username, registration_id)
-            logger.info(f"Email task queued for registration {registration_id}")
+            logger.info(f"Registration created successfully: {response.data.get('id')}")
             return response
         except Exception as e:
             logger.error(f"Error creating registration: {e}", exc_info=True)
@@ -89,6 +95,14 @@ class RegistrationViewSet(viewsets.ModelViewSet):
             logger.error(f"Error updating registration {registration_id}: {e}", exc_info=True)
             raise
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if instance.status == "active":
+                release_to_waitlist(instance.ticket)
+            registration_id = instance.pk
+            instance.delete()
+            transaction.on_commit(lambda: revoke_checkin(registration_id))
+
     def destroy(self, request, *args, **kwargs):
         registration_id = kwargs.get("pk")
         logger.info(
@@ -101,3 +115,142 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.error(f"Error deleting registration {registration_id}: {e}", exc_info=True)
             raise
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        logger.info(f"Bulk registration requested by user: {request.user.username}")
+        try:
+            serializer = BulkRegistrationSerializer(data=request.data, context=self.get_serializer_context())
+            serializer.is_valid(raise_exception=True)
+            logger.info(f"Bulk registration validated: {len(serializer.validated_data['registrations'])} items")
+            registrations = serializer.save()
+            logger.info(f"Bulk registration created: {len(registrations)} registrations")
+
+            return Response(
+                {
+                    "count": len(registrations),
+                    "registrations": self.get_serializer(registrations, many=True).data,
+                },
+                status=status.HTTP_201_CREATED,
+            )
+        except ValidationError as e:
+            logger.warning(f"Invalid bulk registration request: {e.detail}")
+            raise
+        except Exception as e:
+            logger.error(f"Error creating bulk registration: {e}", exc_info=True)
+            raise
+
+    @action(detail=False, methods=["post"], url_path="holds")
+    def hold(self, request):
+        logger.info(f"Ticket hold requested by user: {request.user.username}, data: {request.data}")
+        try:
+            serializer = TicketHoldSerializer(data=request.data, context=self.get_serializer_context())
+            serializer.is_valid(raise_exception=True)
+            hold = create_hold(
+                serializer.validated_data["ticket_id"], request.user.id, serializer.validated_data["quantity"]
+            )
+            return Response(hold, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.error(f"Error creating ticket hold: {e}", exc_info=True)
+            raise
+
+    @action(detail=False, methods=["post"], url_path=r"holds/(?P<hold_id>[0-9a-f-]+)/confirm")
+    def confirm_hold(self, request, hold_id=None):
+        logger.info(f"Ticket hold confirm requested by user: {request.user.username}, hold_id: {hold_id}")
+        try:
+            registrations = confirm_hold(hold_id, request.user)
+            serializer = self.get_serializer(registrations, many=True)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.error(f"Error confirming ticket hold {hold_id}: {e}", exc_info=True)
+            raise
+
+    @action(detail=False, methods=["delete"], url_path=r"holds/(?P<hold_id>[0-9a-f-]+)")
+    def release_hold(self, request, hold_id=None):
+        logger.info(f"Ticket hold release requested by user: {request.user.username}, hold_id: {hold_id}")
+        try:
+            release_hold(hold_id, request.user.id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except Exception as e:
+            logger.error(f"Error releasing ticket hold {hold_id}: {e}", exc_info=True)
+            raise
+
+
+class WaitlistViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request):
+        logger.info(
+            f"Waitlist join requested by user: {request.user.username}, ticket_id: {request.data.get('ticket_id')}"
+        )
+        try:
+            serializer = WaitlistJoinSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            position = join_waitlist(serializer.validated_data["_ticket_obj"], request.user)
+            logger.info(f"User {request.user.username} joined waitlist at position {position['position']}")
+            return Response(position, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.error(f"Error joining waitlist: {e}", exc_info=True)
+            raise
+
+    def retrieve(self, request, pk=None):
+        logger.info(f"Waitlist position requested by user: {request.user.username}, ticket_id: {pk}")
+        try:
+            position = get_position(pk, request.user.id)
+            if position is None:
+                raise NotFound("You are not on the waitlist for this ticket.")
+            return Response(position, status=status.HTTP_200_OK)
+        except NotFound:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving waitlist position for ticket {pk}: {e}", exc_info=True)
+            raise
+
+    def destroy(self, request, pk=None):
+        logger.info(f"Waitlist leave requested by user: {request.user.username}, ticket_id: {pk}")
+        try:
+            if not leave_waitlist(pk, request.user.id):
+                raise NotFound("You are not on the waitlist for this ticket.")
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except NotFound:
+            raise
+        except Exception as e:
+            logger.error(f"Error leaving waitlist for ticket {pk}: {e}", exc_info=True)
+            raise
+
+
+class CheckInViewSet(viewsets.ViewSet):
+    # Scanners authenticate from JWT claims and the token is verified offline, so a scan is
+    # one HMAC check plus one Redis round trip. flush_registration_checkins persists them.
+    authentication_classes = [JWTStatelessUserAuthentication]
+    permission_classes = [IsAuthenticated, IsCheckInStaff]
+
+    def create(self, request):
+        try:
+            serializer = CheckInSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            decoded = read_checkin_token(serializer.validated_data["token"])
+            if decoded is None:
+                logger.warning(f"Invalid check-in token scanned by user: {request.user.id}")
+                return Response({"detail": "Invalid check-in token."}, status=status.HTTP_400_BAD_REQUEST)
+
+            registration_id, event_id = decoded
+            self.check_object_permissions(request, event_id)
+            result = record_checkin(registration_id, event_id)
+            if result == -1:
+                logger.warning(f"Check-in rejected for cancelled registration {registration_id}")
+                return Response({"detail": "Registration was cancelled."}, status=status.HTTP_400_BAD_REQUEST)
+            if result == 0:
+                logger.info(f"Duplicate check-in scan for registration {registration_id}")
+                return Response(
+                    {"detail": "Already checked in.", "registration_id": registration_id, "event_id": event_id},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            logger.info(f"Registration {registration_id} checked in to event {event_id}")
+            return Response({"registration_id": registration_id, "event_id": event_id}, status=status.HTTP_200_OK)
+        except PermissionDenied:
+            logger.warning(f"User {request.user.id} may not check attendees in to this event")
+            raise
+        except Exception as e:
+            logger.error(f"Error checking in: {e}", exc_info=True)
+            raise
@@ -0,0 +1,189 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from common.outbox import enqueue_task
+from common.redis_client import get_redis_client
+from common.versions import bump_collection_version
+from .checkin import revoke_checkin
+from .holds import reserved_seats
+from .inventory import claim_seats, release_seats
+from .models import Registration, WaitlistEntry
+from loguru import logger
+
+WAITLIST_KEY = "waitlist:ticket:{}"
+
+
+def _ensure_loaded(client, ticket_id):
+    """Rebuild the Redis sorted set of a ticket from ``waitlist_entries`` if Redis lost it."""
+    key = WAITLIST_KEY.format(ticket_id)
+    if client.exists(key):
+        return key
+    entries = (
+        WaitlistEntry.objects.filter(ticket_id=ticket_id).order_by("joined_at").values_list("user_id", "joined_at")
+    )
+    pipe = client.pipeline(transaction=False)
+    loaded = 0
+    for user_id, joined_at in entries.iterator(chunk_size=5000):
+        pipe.zadd(key, {str(user_id): joined_at.timestamp()}, nx=True)
+        loaded += 1
+        if loaded % 5000 == 0:
+            pipe.execute()
+    pipe.execute()
+    if loaded:
+        logger.info(f"Rebuilt waitlist for ticket {ticket_id} from database: {loaded} entries")
+    return key
+
+
+def join_waitlist(ticket, user):
+    try:
+        entry = WaitlistEntry.objects.create(ticket=ticket, user=user)
+    except IntegrityError:
+        logger.warning(f"User {user.id} is already on the waitlist of ticket {ticket.id}")
+        raise serializers.ValidationError("You are already on the waitlist for this ticket.")
+    client = get_redis_client()
+    key = _ensure_loaded(client, ticket.id)
+    client.zadd(key, {str(user.id): entry.joined_at.timestamp()}, nx=True)
+    logger.info(f"User {user.id} joined waitlist of ticket {ticket.id}")
+    return get_position(ticket.id, user.id)
+
+
+def leave_waitlist(ticket_id, user_id):
+    deleted, _ = WaitlistEntry.objects.filter(ticket_id=ticket_id, user_id=user_id).delete()
+    get_redis_client().zrem(WAITLIST_KEY.format(ticket_id), str(user_id))
+    logger.info(f"User {user_id} left waitlist of ticket {ticket_id}")
+    return bool(deleted)
+
+
+def get_position(ticket_id, user_id):
+    """1-based waitlist position of a user, or ``None`` if they are not waiting. ZRANK is O(log n)."""
+    client = get_redis_client()
+    key = _ensure_loaded(client, ticket_id)
+    pipe = client.pipeline(transaction=False)
+    pipe.zrank(key, str(user_id))
+    pipe.zcard(key)
+    rank, size = pipe.execute()
+    if rank is None:
+        return None
+    return {"ticket_id": str(ticket_id), "position": rank + 1, "waiting": size}
+
+
+def cancel_registration(registration):
+    """Cancel an active registration and pass its seat to the waitlist, or back to inventory if nobody waits."""
+    with transaction.atomic():
+        cancelled = Registration.objects.filter(pk=registration.pk, status="active").update(
+            status="cancelled", updated_at=timezone.now()
+        )
+        if not cancelled:
+            return False
+        bump_collection_version(Registration)
+        release_to_waitlist(registration.ticket)
+        transaction.on_commit(lambda: revoke_checkin(registration.pk))
+    logger.info(f"Registration {registration.pk} cancelled, seat released to waitlist")
+    return True
+
+
+class _LeftWaitlist(Exception):
+    pass
+
+
+def _forget(ticket_id, user_id):
+    try:
+        get_redis_client().zrem(WAITLIST_KEY.format(ticket_id), str(user_id))
+    except Exception as e:
+        # promote_next skips members whose waitlist entry is gone
+        logger.warning(f"Could not remove user {user_id} from the Redis waitlist of ticket {ticket_id}: {e}")
+
+
+def _register_from_waitlist(entry, ticket):
+    registration = Registration.objects.create(user=entry.user, ticket=ticket)
+    entry.delete()
+    enqueue_task(
+        "registrations.task.send_ticket_email",
+        entry.user.email,
+        entry.user.username,
+        str(registration.id),
+        entry.user.locale,
+    )
+    return registration
+
+
+def hand_to_waitlist(ticket):
+    """Give one freed seat of ``ticket`` to the head of its waitlist. Must be called inside ``transaction.atomic()``.
+
+    Returns the new registration, or ``None`` if nobody is waiting or the ticket is not on sale. The
+    seat changes hands in the same transaction: ``sold`` is unchanged and no ticket or event row is
+    touched, so callers that release seats themselves keep their own lock order.
+    """
+    now = timezone.now()
+    entry = (
+        WaitlistEntry.objects.select_for_update(skip_locked=True, of=("self",))
+        .select_related("user")
+        .filter(
+            ticket_id=ticket.pk,
+            ticket__sales_start__lte=now,
+            ticket__sales_end__gte=now,
+            ticket__event__status="scheduled",
+        )
+        .order_by("joined_at")
+        .first()
+    )
+    if entry is None:
+        return None
+
+    registration = _register_from_waitlist(entry, ticket)
+    transaction.on_commit(lambda: _forget(ticket.pk, entry.user_id))
+    logger.info(f"Seat on ticket {ticket.pk} handed to waitlisted user {entry.user_id}: registration {registration.id}")
+    return registration
+
+
+def release_to_waitlist(ticket):
+    """Free one seat of ``ticket``. Must be called inside ``transaction.atomic()``.
+
+    If anyone is waiting and the ticket is on sale, the seat goes straight to the head of the
+    waitlist (see ``hand_to_waitlist``) and never reaches inventory, where clients retrying in a
+    loop would take it first. Otherwise it goes back to inventory.
+    """
+    registration = hand_to_waitlist(ticket)
+    if registration is None:
+        release_seats(ticket.pk, ticket.event_id)
+    return registration
+
+
+def promote_next(ticket):
+    """Give a free seat on ``ticket`` to the head of its waitlist. Returns the new registration or ``None``."""
+    client = get_redis_client()
+    key = _ensure_loaded(client, ticket.id)
+    while True:
+        popped = client.zpopmin(key)
+        if not popped:
+            return None
+        user_id, joined_at = popped[0]
+        try:
+            with reserved_seats({ticket.pk: 1}), transaction.atomic():
+                entry = (
+                    WaitlistEntry.objects.select_for_update(of=("self",))
+                    .select_related("user")
+                    .filter(ticket_id=ticket.id, user_id=user_id)
+                    .first()
+                )
+                if entry is None:
+                    raise _LeftWaitlist()
+                claim_seats(ticket)
+                registration = _register_from_waitlist(entry, ticket)
+        except _LeftWaitlist:
+            # Left the waitlist, or was handed a seat, after Redis was rebuilt
+            continue
+        except serializers.ValidationError:
+            client.zadd(key, {user_id: joined_at}, nx=True)
+            logger.info(f"No seat to promote on ticket {ticket.id}, user {user_id} stays at the head of the waitlist")
+            return None
+        except Exception:
+            # The database still lists them and _ensure_loaded only rebuilds a missing set, so put them back
+            client.zadd(key, {user_id: joined_at}, nx=True)
+            logger.warning(
+                f"Promotion of user {user_id} on ticket {ticket.id} failed, kept at the head of the waitlist"
+            )
+            raise
+        logger.info(f"User {user_id} promoted from waitlist of ticket {ticket.id}: registration {registration.id}")
+        return registration
@@ -0,0 +1,7 @@
+from common.mixins import invalidate_details
+
+TICKET_DETAIL_KEY = "ticket_detail_{}"
+
+
+def invalidate_ticket_details(*ticket_ids):
+    invalidate_details(TICKET_DETAIL_KEY, ticket_ids)
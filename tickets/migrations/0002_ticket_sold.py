@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="sold",
+            field=models.IntegerField(default=0),
+        ),
+    ]
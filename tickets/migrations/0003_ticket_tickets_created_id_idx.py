@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0002_ticket_sold"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["created_at", "id"], name="tickets_created_id_idx"
+            ),
+        ),
+    ]
@@ -12,6 +12,7 @@ class Ticket(models.Model):
     sales_start = models.DateTimeField(blank=False, null=False)
     sales_end = models.DateTimeField(blank=False, null=False)
     quota = models.IntegerField(blank=False, null=False)
+    sold = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,3 +21,4 @@ class Ticket(models.Model):
 
     class Meta:
         db_table = "tickets"
+        indexes = [models.Index(fields=["created_at", "id"], name="tickets_created_id_idx")]
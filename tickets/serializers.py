@@ -3,7 +3,6 @@ from rest_framework import serializers
 from events.models import Event
 from .models import Ticket
 
-from django.core.cache import cache
 from loguru import logger
 
 
@@ -12,7 +11,7 @@ class TicketSerializer(serializers.ModelSerializer):
     sales_end = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
     event_id = serializers.UUIDField(write_only=True)
     event = serializers.SerializerMethodField(read_only=True)
-    CACHE_KEY_DETAIL = "ticket_detail_{}"
+    remaining = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Ticket
@@ -25,14 +24,19 @@ class TicketSerializer(serializers.ModelSerializer):
             "sales_start",
             "sales_end",
             "quota",
+            "sold",
+            "remaining",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at"]
+        read_only_fields = ["id", "sold", "created_at", "updated_at"]
 
     def get_event(self, obj):
         return obj.event.name
 
+    def get_remaining(self, obj):
+        return max(obj.quota - obj.sold, 0)
+
     def validate(self, attrs):
         event_id = attrs.get("event_id")
         sales_start = attrs.get("sales_start")
@@ -77,9 +81,7 @@ class TicketSerializer(serializers.ModelSerializer):
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
             instance.save()
-            cache_key = self.CACHE_KEY_DETAIL.format(instance.id)
-            cache.delete(cache_key)
-            logger.info(f"Ticket updated successfully: {ticket_id}, cache invalidated")
+            logger.info(f"Ticket updated successfully: {ticket_id}")
             return instance
         except Exception as e:
             logger.error(f"Error updating Ticket {ticket_id}: {e}", exc_info=True)
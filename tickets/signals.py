@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from events.models import Event
+from .caching import invalidate_ticket_details
+from .models import Ticket
+
+
+@receiver([post_save, post_delete], sender=Ticket, dispatch_uid="ticket_detail_cache")
+def invalidate_ticket_detail(sender, instance, **kwargs):
+    invalidate_ticket_details(instance.pk)
+
+
+@receiver(post_save, sender=Event, dispatch_uid="ticket_detail_cache_event")
+def invalidate_event_ticket_details(sender, instance, created=False, update_fields=None, **kwargs):
+    # Ticket details embed the event name
+    if created or (update_fields is not None and "name" not in update_fields):
+        return
+    invalidate_ticket_details(*Ticket.objects.filter(event_id=instance.pk).values_list("id", flat=True))
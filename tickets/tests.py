@@ -1,3 +1,97 @@
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from events.models import Event
+from registrations.inventory import claim_ticket_seats
+from registrations.models import Registration
+from .caching import TICKET_DETAIL_KEY
+from .models import Ticket
+
+
+class TicketDeletionTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="x")
+        self.event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            sold=5,
+            category="music",
+            organizer=self.admin,
+        )
+        ticket = {"event": self.event, "price": 100000, "sales_start": now, "sales_end": now + timedelta(days=1)}
+        self.regular = Ticket.objects.create(name="Regular", quota=10, sold=3, **ticket)
+        self.vip = Ticket.objects.create(name="VIP", quota=10, sold=2, **ticket)
+        for i in range(3):
+            attendee = User.objects.create(username=f"attendee{i}", email=f"attendee{i}@example.com")
+            Registration.objects.create(user=attendee, ticket=self.regular)
+
+    def test_deleting_a_ticket_releases_its_seats_from_the_event(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.delete(f"/api/tickets/{self.regular.id}/")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Registration.objects.filter(ticket_id=self.regular.id).exists())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.sold, self.vip.sold)
+
+
+class TicketDetailCacheTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.user = User.objects.create(username="attendee", email="attendee@example.com")
+        self.event = Event.objects.create(
+            name="Konser Jazz",
+            description="",
+            location="Jakarta",
+            start_time=now + timedelta(days=7),
+            end_time=now + timedelta(days=7, hours=3),
+            status="scheduled",
+            quota=100,
+            category="music",
+            organizer=self.user,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, name="Regular", price=100000, sales_start=now, sales_end=now + timedelta(days=1), quota=10
+        )
+        self.addCleanup(cache.delete, TICKET_DETAIL_KEY.format(self.ticket.id))
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def _get(self):
+        return self.api.get(f"/api/tickets/{self.ticket.id}/", HTTP_ACCEPT="application/json")
+
+    def test_hit_serves_the_cached_bytes_without_queries(self):
+        first = self._get()
+        self.assertEqual(first["X-Data-Source"], "database")
+        with self.assertNumQueries(0):
+            second = self._get()
+        self.assertEqual(second["X-Data-Source"], "cache")
+        self.assertEqual(second.content, first.content)
+
+    def test_writes_to_embedded_and_counter_fields_invalidate_the_entry(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.name = "Konser Jazz Malam"
+            self.event.save()
+        response = self._get()
+        self.assertEqual(response["X-Data-Source"], "database")
+        self.assertIn("Konser Jazz Malam", response.content.decode())
 
-# Create your tests here.
+        # Seat claims update the counter with a queryset UPDATE, bypassing save() and its signals
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_ticket_seats(self.ticket, 2)
+        response = self._get()
+        self.assertEqual(response["X-Data-Source"], "database")
+        self.assertEqual(response.json()["sold"], 2)
@@ -1,33 +1,28 @@
-from rest_framework import viewsets, status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
+from .caching import TICKET_DETAIL_KEY
+from events.models import Event
 from .models import Ticket
 from .serializers import TicketSerializer
+from common.mixins import CachedDetailMixin, ConditionalGetMixin
+from common.pagination import EnvelopePagination
 from common.permissions import IsSuperUserOrAdminOrOrganizer
-from django.core.cache import cache
 from loguru import logger
 
 
-class TicketsPagination(PageNumberPagination):
-    page_size = 10
-
-    def get_paginated_response(self, data):
-        return Response(
-            {
-                "count": self.page.paginator.count,
-                "next": self.get_next_link(),
-                "previous": self.get_previous_link(),
-                "tickets": data,
-            }
-        )
+class TicketsPagination(EnvelopePagination):
+    results_key = "tickets"
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(ConditionalGetMixin, CachedDetailMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.select_related("event").all().order_by("-created_at")
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated, IsSuperUserOrAdminOrOrganizer]
     pagination_class = TicketsPagination
+    detail_cache_key = TICKET_DETAIL_KEY
+    object_permission_fields = ("event_id",)
+    conditional_list_models = (Event,)
+    conditional_related_timestamps = ("event__updated_at",)
 
     def list(self, request, *args, **kwargs):
         logger.info(f"Ticket list requested by user: {request.user.username}")
@@ -43,22 +38,9 @@ class TicketViewSet(viewsets.ModelViewSet):
         ticket_id = kwargs.get("pk")
         logger.info(f"Ticket retrieve requested by user: {request.user.username}, ticket_id: {ticket_id}")
         try:
-            instance = self.get_object()
-            cache_key = TicketSerializer.CACHE_KEY_DETAIL.format(instance.id)
-            cached_ticket = cache.get(cache_key)
-            if cached_ticket:
-                serializer = self.get_serializer(cached_ticket)
-                response = Response(serializer.data, status=status.HTTP_200_OK)
-                response["X-Data-Source"] = "cache"
-                logger.info(f"Ticket {ticket_id} retrieved from cache")
-                return response
-            else:
-                serializer = self.get_serializer(instance)
-                response = Response(serializer.data, status=status.HTTP_200_OK)
-                response["X-Data-Source"] = "database"
-                cache.set(cache_key, instance, timeout=3600)
-                logger.info(f"Ticket {ticket_id} retrieved from database and cached")
-                return response
+            response = super().retrieve(request, *args, **kwargs)
+            logger.info(f"Ticket {ticket_id} retrieved from {response.get('X-Data-Source', 'database')}")
+            return response
         except Exception as e:
             logger.error(f"Error retrieving ticket {ticket_id}: {e}", exc_info=True)
             raise
@@ -82,9 +64,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         logger.info(f"Ticket update requested by user: {request.user.username}, ticket_id: {ticket_id}")
         try:
             response = super().update(request, *args, **kwargs)
-            cache_key = self.serializer_class.CACHE_KEY_DETAIL.format(ticket_id)
-            cache.delete(cache_key)
-            logger.info(f"Ticket updated successfully: {ticket_id}, cache invalidated")
+            logger.info(f"Ticket updated successfully: {ticket_id}")
             return response
         except Exception as e:
             logger.error(f"Error updating ticket {ticket_id}: {e}", exc_info=True)
@@ -94,11 +74,8 @@ class TicketViewSet(viewsets.ModelViewSet):
         ticket_id = kwargs.get("pk")
         logger.info(f"Ticket delete requested by user: {request.user.username}, ticket_id: {ticket_id}")
         try:
-            instance = self.get_object()
-            cache_key = TicketSerializer.CACHE_KEY_DETAIL.format(instance.id)
-            cache.delete(cache_key)
             response = super().destroy(request, *args, **kwargs)
-            logger.info(f"Ticket deleted successfully: {ticket_id}, cache invalidated")
+            logger.info(f"Ticket deleted successfully: {ticket_id}")
             return response
         except Exception as e:
             logger.error(f"Error deleting ticket {ticket_id}: {e}", exc_info=True)